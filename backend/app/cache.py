@@ -0,0 +1,107 @@
+"""
+Bounded in-process caches
+
+Each worker keeps its own ``LRUCache``; entries are evicted least recently used
+first, expire after ``ttl`` seconds and are dropped explicitly (usually from a
+pub/sub handler, see ``app.pubsub``) when the underlying row changes. Lookups
+are counted in ``cache_lookups_total`` so the hit ratio can be graphed per
+cache:
+
+    sum(rate(cache_lookups_total{result="hit"}[5m])) / sum(rate(cache_lookups_total[5m]))
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.metrics import CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_LOOKUPS
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so loads that raced one are not stored
+        self._generation = 0
+        # When each key was last invalidated, for callers loading from a source
+        # that may lag behind the change (see invalidated_within)
+        self._invalidated: dict[Hashable, float] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            size = len(self._entries)
+        CACHE_LOOKUPS.labels(self.name, "miss" if entry is None else "hit").inc()
+        CACHE_ENTRIES.labels(self.name).set(size)
+        return None if entry is None else entry[1]
+
+    def generation(self) -> int:
+        """Token to pass to ``set`` for a value loaded after this call"""
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Store ``value`` unless something was invalidated since ``generation``"""
+        if self.maxsize <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+            size = len(self._entries)
+        if evicted:
+            CACHE_EVICTIONS.labels(self.name).inc(evicted)
+        CACHE_ENTRIES.labels(self.name).set(size)
+
+    def invalidate(self, key: Hashable):
+        now = time.monotonic()
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+            self._invalidated[key] = now
+            if len(self._invalidated) > max(self.maxsize, 1000):
+                cutoff = now - self.ttl
+                self._invalidated = {k: t for k, t in self._invalidated.items() if t >= cutoff}
+            size = len(self._entries)
+        CACHE_ENTRIES.labels(self.name).set(size)
+
+    def invalidated_within(self, key: Hashable, seconds: float) -> bool:
+        """Whether ``key`` was invalidated less than ``seconds`` ago"""
+        with self._lock:
+            invalidated_at = self._invalidated.get(key)
+        return invalidated_at is not None and time.monotonic() - invalidated_at < seconds
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._invalidated.clear()
+            self.hits = self.misses = 0
+        CACHE_ENTRIES.labels(self.name).set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
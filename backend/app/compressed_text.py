@@ -0,0 +1,109 @@
+"""
+Compressed text columns
+
+``CompressedText`` stores a ``str`` as bytes with a one-byte codec header, so
+rows written with any ``OBITUARY_TEXT_CODEC`` stay readable after it changes:
+
+``none`` (default)
+    UTF-8, uncompressed.
+``zlib``
+    zlib at ``OBITUARY_TEXT_ZLIB_LEVEL``; standard library only.
+``zstd``
+    Zstandard (``pip install zstandard``), optionally with a dictionary trained
+    on existing obituaries (``OBITUARY_TEXT_ZSTD_DICT``, see ``train``), which
+    matters for short texts that share phrasing. The frame records the
+    dictionary id; keep every dictionary that was ever used for writing.
+
+Values are decoded when the column is loaded. ``Obituary.obituary_text`` is
+also deferred, so queries that do not need the text never fetch or
+decompress it.
+"""
+import threading
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+_local = threading.local()
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+
+@lru_cache
+def _zstd_dictionary() -> Optional["zstandard.ZstdCompressionDict"]:
+    if not settings.OBITUARY_TEXT_ZSTD_DICT:
+        return None
+    with open(settings.OBITUARY_TEXT_ZSTD_DICT, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+@lru_cache
+def _zstd_compressor() -> "zstandard.ZstdCompressor":
+    if zstandard is None:
+        raise RuntimeError("OBITUARY_TEXT_CODEC=zstd needs the zstandard package")
+    return zstandard.ZstdCompressor(level=settings.OBITUARY_TEXT_ZSTD_LEVEL, dict_data=_zstd_dictionary())
+
+
+def _zstd_decompressor() -> "zstandard.ZstdDecompressor":
+    # Decompressors are not thread-safe; one per thread, reused across values
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None or _local.dictionary is not _zstd_dictionary():
+        _local.dictionary = _zstd_dictionary()
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor(dict_data=_local.dictionary)
+    return decompressor
+
+
+def encode(text: str, codec: Optional[str] = None) -> bytes:
+    """``text`` as stored with ``codec`` (default ``OBITUARY_TEXT_CODEC``)"""
+    codec = codec or settings.OBITUARY_TEXT_CODEC
+    data = text.encode()
+    if codec == "zlib":
+        return ZLIB + zlib.compress(data, settings.OBITUARY_TEXT_ZLIB_LEVEL)
+    if codec == "zstd":
+        return ZSTD + _zstd_compressor().compress(data)
+    if codec == "none":
+        return RAW + data
+    raise ValueError(f"Unknown OBITUARY_TEXT_CODEC {codec!r}")
+
+
+def decode(stored: bytes) -> str:
+    header, data = stored[:1], stored[1:]
+    if header == ZLIB:
+        return zlib.decompress(data).decode()
+    if header == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed text needs the zstandard package")
+        return _zstd_decompressor().decompress(data).decode()
+    if header == RAW:
+        return data.decode()
+    raise ValueError(f"Unknown compressed text header {header!r}")
+
+
+def train(samples: list[str], size: int = 32 * 1024) -> bytes:
+    """A zstd dictionary trained on ``samples`` (a few thousand obituaries)"""
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary needs the zstandard package")
+    return zstandard.train_dictionary(size, [sample.encode() for sample in samples]).as_bytes()
+
+
+class CompressedText(TypeDecorator):
+    """``str`` in Python, compressed bytes in the database"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decode(bytes(value))
@@ -5,10 +5,117 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
       DATABASE_URL: str
+      # Comma-separated read replica URLs; reads fall back to DATABASE_URL when empty
+      DATABASE_REPLICA_URLS: str = ""
+      # After a write, that user's reads go to the primary for this long
+      READ_YOUR_WRITES_SECONDS: float = 5.0
       SECRET_KEY: str
       ALGORITHM: str = "HS256"
       ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
       DEBUG: bool = False
+      # Create missing tables at start-up; disable when using Alembic migrations
+      AUTO_CREATE_SCHEMA: bool = True
+
+      # Statements slower than this are logged with their parameters
+      SLOW_QUERY_MS: float = 200.0
+      # Requests issuing more statements than this are logged as likely N+1
+      QUERY_COUNT_WARN: int = 25
+
+      # Structured request logging
+      LOG_LEVEL: str = "INFO"
+      # Fraction of successful requests logged; errors and slow requests always are
+      LOG_SAMPLE_RATE: float = 1.0
+      LOG_SLOW_REQUEST_MS: float = 2000.0
+
+      # Server (python -m app.serve)
+      HOST: str = "0.0.0.0"
+      PORT: int = 8000
+      # Worker processes; 0 means one per CPU
+      WEB_CONCURRENCY: int = 0
+      # Recycle a worker after this many requests (+ random jitter); 0 disables
+      MAX_REQUESTS: int = 0
+      MAX_REQUESTS_JITTER: int = 0
+      # Seconds to drain in-flight requests (LLM + TTS can take over a minute) on SIGTERM
+      GRACEFUL_TIMEOUT: int = 120
+
+      # Idempotency-Key handling for POST /obituaries/
+      IDEMPOTENCY_TTL_HOURS: int = 24
+      # How long a duplicate waits for the in-flight original before answering 409
+      IDEMPOTENCY_WAIT_SECONDS: float = 120.0
+      # In-flight keys older than this are treated as abandoned (crashed worker)
+      IDEMPOTENCY_LOCK_SECONDS: int = 600
+      # Expired keys are bulk-deleted by claim_key at most this often per worker
+      IDEMPOTENCY_PURGE_SECONDS: float = 60.0
+
+      # Cross-worker pub/sub: auto, local, socket or postgres (see app.pubsub)
+      PUBSUB_BACKEND: str = "auto"
+      PUBSUB_SOCKET_DIR: str = ""
+
+      # Per-worker cache of serialized obituaries for GET /obituaries/{id}; 0 disables
+      OBITUARY_CACHE_SIZE: int = 1024
+      # Upper bound on staleness if an invalidation is missed (e.g. lagging replica)
+      OBITUARY_CACHE_TTL_SECONDS: float = 300.0
+
+      # Newest public obituaries each worker serves GET /obituaries/ from; 0 disables
+      PUBLIC_FEED_SIZE: int = 500
+      # Full reload from the primary, repairing anything pub/sub missed
+      PUBLIC_FEED_RECONCILE_SECONDS: float = 60.0
+
+      # TF-IDF index for GET /obituaries/{id}/similar: terms kept per obituary, full
+      # rebuild interval, and documents added since the build before they are merged in
+      SIMILAR_DOC_TERMS: int = 32
+      SIMILAR_REBUILD_SECONDS: float = 3600.0
+      SIMILAR_MAX_DELTA: int = 5000
+
+      # Skip TTS on create; GET /obituaries/{id}/audio synthesizes on first playback
+      LAZY_TTS: bool = False
+
+      # S3 buckets written by the Lambdas; media cleanup only touches these (disabled when empty)
+      IMAGES_BUCKET: str = ""
+      AUDIO_BUCKET: str = ""
+      # Local S3 stand-in (e.g. moto_server, MinIO); empty uses AWS
+      S3_ENDPOINT_URL: str = ""
+      # python -m app.media_gc leaves unreferenced objects younger than this alone
+      MEDIA_GC_GRACE_HOURS: float = 24.0
+
+      # Groq models in order of preference as model:latency_budget_seconds; slow or
+      # failing models are skipped in favour of the next (see app.services.model_router)
+      GROQ_MODELS: str = "llama-3.3-70b-versatile:8,llama-3.1-8b-instant:4"
+      # Total time text generation may take across fallbacks before the template is used
+      LLM_DEADLINE_SECONDS: float = 12.0
+      # Rolling window the router computes p95 latency and error rate over
+      MODEL_ROUTER_WINDOW: int = 50
+      MODEL_ROUTER_WINDOW_SECONDS: float = 300.0
+      MODEL_ROUTER_MAX_ERROR_RATE: float = 0.25
+      # Send a duplicate Groq call when the first is slower than this quantile of the
+      # model's recent latency (0 disables hedging), for at most this share of calls
+      LLM_HEDGE_PERCENTILE: float = 0.0
+      LLM_HEDGE_MAX_RATE: float = 0.1
+
+      # Per-worker slots for Groq and TTS calls, shared fairly between users (app.scheduler)
+      SCHEDULER_GENERATION_CONCURRENCY: int = 16
+      SCHEDULER_TTS_CONCURRENCY: int = 16
+      SCHEDULER_PER_USER_CONCURRENCY: int = 2
+
+      # GET /obituaries/events: keep-alive comment interval, and how long a stream
+      # lasts before the client reconnects (keep below GRACEFUL_TIMEOUT)
+      SSE_HEARTBEAT_SECONDS: float = 15.0
+      SSE_STREAM_SECONDS: float = 90.0
+
+      # Brotli (if installed) or gzip for JSON/text responses of at least COMPRESSION_MIN_BYTES;
+      # bodies from COMPRESSION_THREAD_MIN_BYTES are compressed off the event loop
+      COMPRESSION: bool = True
+      COMPRESSION_MIN_BYTES: int = 1024
+      COMPRESSION_THREAD_MIN_BYTES: int = 65536
+      GZIP_LEVEL: int = 4
+      BROTLI_QUALITY: int = 2
+
+      # Codec for newly written obituary_text: none (default), zlib or zstd (pip install zstandard);
+      # OBITUARY_TEXT_ZSTD_DICT is an optional dictionary file from app.compressed_text.train
+      OBITUARY_TEXT_CODEC: str = "none"
+      OBITUARY_TEXT_ZLIB_LEVEL: int = 6
+      OBITUARY_TEXT_ZSTD_LEVEL: int = 3
+      OBITUARY_TEXT_ZSTD_DICT: str = ""
 
       
       GROQ_API_KEY: str 
@@ -1,13 +1,34 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from app import read_your_writes
 from app.config import settings
+from app.query_stats import instrument_engine
 
 
 engine = create_engine(settings.DATABASE_URL)
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replicas, used round-robin by get_read_db (see app.dependencies)
+replica_engines = [
+    create_engine(url.strip())
+    for url in settings.DATABASE_REPLICA_URLS.split(",")
+    if url.strip()
+]
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine)
+
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+_replica_counter = itertools.count()
+
 
 Base = declarative_base()
 
@@ -17,4 +38,46 @@ def get_db():
     try:
       yield db
     finally:
-      db.close()
\ No newline at end of file
+      db.close()
+
+
+def get_replica_session() -> Optional[Session]:
+    """Open a session on the next replica, or None when no replicas are configured"""
+    if not ReplicaSessionLocals:
+        return None
+    session = ReplicaSessionLocals[next(_replica_counter) % len(ReplicaSessionLocals)]()
+    # Lets callers tell reads that may lag behind the primary
+    session.info["replica"] = True
+    return session
+
+
+# Read-your-writes: users who wrote within READ_YOUR_WRITES_SECONDS read from
+# the primary, so they never see a replica that has not caught up yet. This map
+# only covers the current worker; the signed marker sent back to the client
+# (app.read_your_writes) covers the others.
+_recent_writes: dict[str, float] = {}
+
+
+def record_write(user_key: str):
+    """Remember that ``user_key`` just wrote to the primary"""
+    now = time.monotonic()
+    _recent_writes[user_key] = now
+    if len(_recent_writes) > 10_000:
+        cutoff = now - settings.READ_YOUR_WRITES_SECONDS
+        for key, written_at in list(_recent_writes.items()):
+            if written_at < cutoff:
+                _recent_writes.pop(key, None)
+
+
+def wrote_recently(user_key: str) -> bool:
+    written_at = _recent_writes.get(user_key)
+    return written_at is not None and time.monotonic() - written_at < settings.READ_YOUR_WRITES_SECONDS
+
+
+@event.listens_for(Session, "after_flush")
+def _record_session_write(session, flush_context):
+    """Sessions tagged with a user (see get_read_db) mark that user on every write"""
+    user_key = session.info.get("user_key")
+    if user_key:
+        record_write(user_key)
+        read_your_writes.note_write(user_key)
@@ -1,8 +1,9 @@
-
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app import read_your_writes
+from app.database import get_db, get_replica_session, wrote_recently
 from app.services.auth_service import decode_access_token
 from app.services.user_service import get_user_by_email
 from app.models.user import User
@@ -10,9 +11,56 @@ from app.models.user import User
 # Change this from OAuth2PasswordBearer to HTTPBearer
 security = HTTPBearer()
 
+
+def _token_subject(request: Request) -> Optional[str]:
+    """Email from the request's bearer token, decoded once per request"""
+    if not hasattr(request.state, "token_subject"):
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        subject = None
+        if scheme.lower() == "bearer" and token:
+            subject = decode_access_token(token)
+        request.state.token_subject = subject
+    return request.state.token_subject
+
+
+def _wrote_recently(request: Request, subject: str) -> bool:
+    if wrote_recently(subject):
+        return True
+    marker = request.headers.get(read_your_writes.HEADER) or request.cookies.get(read_your_writes.COOKIE)
+    return read_your_writes.marker_is_recent(subject, marker)
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """
+    Session for read-only work
+
+    Uses a read replica when one is configured, except for users who wrote
+    within ``READ_YOUR_WRITES_SECONDS`` on this worker or who send a recent
+    write marker (see ``app.read_your_writes``): they read from the primary so
+    they always see their own changes. The primary session is tagged with the
+    user so its writes open that window.
+    """
+    subject = _token_subject(request)
+    if subject:
+        db.info["user_key"] = subject
+    if subject and _wrote_recently(request, subject):
+        yield db
+        return
+
+    replica = get_replica_session()
+    if replica is None:
+        yield db
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> User:
     """Get current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -21,11 +69,8 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    # Extract token from credentials
-    token = credentials.credentials
-
-    # Decode token
-    email = decode_access_token(token)
+    # Decode token (cached on the request by get_read_db)
+    email = _token_subject(request)
 
     if email is None:
         raise credentials_exception
@@ -0,0 +1,119 @@
+"""
+Per-user obituary event streams (Server-Sent Events)
+
+``GET /obituaries/events`` subscribes to the ``EventHub`` of the worker that
+serves it. The hub is fed by the ``obituaries`` pub/sub channel, so changes
+made on any worker reach every open stream of the obituary's owner.
+
+Each subscriber has a bounded queue. A client too slow to keep up has its
+backlog dropped and receives a single ``resync`` event instead, after which it
+should re-fetch ``/obituaries/my-obituaries`` once.
+
+Streams end after ``SSE_STREAM_SECONDS`` (clients reconnect automatically) so
+workers can restart without waiting on idle connections.
+"""
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from app import pubsub
+from app.responses import dump_json
+from app.services.obituary_service import OBITUARY_EVENTS
+
+# Events a subscriber may fall behind by before it is told to resync
+QUEUE_SIZE = 100
+
+
+class Subscriber:
+    """One open stream: a queue filled from any thread, drained on its event loop"""
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, message: dict):
+        """Runs on ``self.loop``"""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = {"event": "resync"}
+        self.queue.put_nowait(message)
+
+
+class EventHub:
+    """Fans obituary events out to the open streams of their owner"""
+
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscriber]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> Subscriber:
+        subscriber = Subscriber(str(user_id), asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(subscriber.user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, message: dict):
+        """pub/sub handler: queue ``message`` for its owner's streams (any thread)"""
+        user_id = message.get("user_id")
+        if user_id is None:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.put, message)
+            except RuntimeError:
+                # Its loop is closed; the stream is gone
+                self.unsubscribe(subscriber)
+
+
+hub = EventHub()
+pubsub.subscribe(OBITUARY_EVENTS, hub.publish)
+
+
+def format_event(message: dict, event_id: Optional[int] = None) -> bytes:
+    """One SSE frame; the data is the message without its routing fields"""
+    data = {key: value for key, value in message.items() if key != "user_id"}
+    frame = f"event: {message['event']}\n"
+    if event_id is not None:
+        frame = f"id: {event_id}\n" + frame
+    return frame.encode() + b"data: " + dump_json(data) + b"\n\n"
+
+
+async def stream(user_id, heartbeat: float, lifetime: float) -> AsyncIterator[bytes]:
+    """SSE body for one user: events as they come, comments as keep-alives"""
+    deadline = time.monotonic() + lifetime
+    event_id = 0
+    subscriber = hub.subscribe(user_id)
+    try:
+        # Reconnect one second after the server ends the stream
+        yield b"retry: 1000\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                if time.monotonic() < deadline:
+                    yield b": keep-alive\n\n"
+                continue
+            event_id += 1
+            yield format_event(message, event_id)
+    finally:
+        hub.unsubscribe(subscriber)
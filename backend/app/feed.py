@@ -0,0 +1,206 @@
+"""
+In-memory public feed
+
+Each worker keeps the newest ``PUBLIC_FEED_SIZE`` public obituaries, newest
+first, as serialized ``ObituaryResponse`` bodies. ``GET /obituaries/`` pages
+that fall inside it (and use no date filter) are assembled from those bytes
+without a query or a pydantic pass.
+
+The feed is loaded at start-up and kept current from the ``obituaries``
+pub/sub channel: deletions are applied at once, other events mark the
+obituary stale and it is re-read (one ``IN`` query for everything stale) by
+the next request that needs the feed. Rows the request's session cannot see
+yet (a lagging replica) stay stale and are tried again by the next request. A
+background thread reloads the whole feed every
+``PUBLIC_FEED_RECONCILE_SECONDS`` to repair anything missed, such as an
+update read from a replica before it caught up.
+"""
+import bisect
+import logging
+import threading
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app import pubsub
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import CACHE_ENTRIES, CACHE_LOOKUPS
+from app.models.obituary import Obituary
+from app.responses import dump_json
+from app.schemas.obituary import ObituaryResponse
+from app.services import obituary_service
+
+logger = logging.getLogger(__name__)
+
+
+def _sort_key(obituary: Obituary) -> tuple:
+    """Ascending order is newest first, as the list endpoint sorts"""
+    return -obituary.created_at.timestamp(), -obituary.id.int
+
+
+class PublicFeed:
+    """The newest public obituaries, pre-serialized, kept newest first"""
+
+    name = "public_feed"
+
+    def __init__(self, size: int):
+        self.size = size
+        self._lock = threading.Lock()
+        self._keys: list[tuple] = []
+        self._ids: list[UUID] = []
+        self._bodies: list[bytes] = []
+        self._loaded = False
+        # Every public obituary is in the feed (fewer than ``size`` exist)
+        self._complete = False
+        self._stale: set[UUID] = set()
+        # Deleted since the last reload began, so a reload that raced the delete drops them
+        self._deleted: set[UUID] = set()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._ids, self._bodies = [], [], []
+            self._loaded = self._complete = False
+            self._stale.clear()
+            self._deleted.clear()
+        CACHE_ENTRIES.labels(self.name).set(0)
+
+    def handle_event(self, message: dict):
+        """pub/sub handler (any thread)"""
+        obituary_id = UUID(message["id"])
+        with self._lock:
+            if message["event"] == "deleted":
+                self._deleted.add(obituary_id)
+                self._stale.discard(obituary_id)
+                self._remove(obituary_id)
+            else:
+                self._stale.add(obituary_id)
+
+    def reload(self, db: Session):
+        """Replace the feed with the newest public obituaries in ``db``"""
+        with self._lock:
+            deleted_before = set(self._deleted)
+            stale_before = set(self._stale)
+        rows = obituary_service.get_obituaries(db, limit=self.size)
+        entries = [(_sort_key(o), o.id, _serialize(o)) for o in rows]
+        with self._lock:
+            entries = [entry for entry in entries if entry[1] not in self._deleted]
+            self._keys = [entry[0] for entry in entries]
+            self._ids = [entry[1] for entry in entries]
+            self._bodies = [entry[2] for entry in entries]
+            self._complete = len(rows) < self.size
+            self._loaded = True
+            self._deleted -= deleted_before
+            # Changes published before the query started are in its result
+            self._stale -= stale_before
+            size = len(self._ids)
+        CACHE_ENTRIES.labels(self.name).set(size)
+
+    def page(self, db: Session, skip: int, limit: int) -> Optional[bytes]:
+        """Serialized ``ObituaryListResponse`` for the page, or None if it is not all in memory"""
+        if self.size <= 0 or skip < 0 or limit < 0:
+            return None
+        if not self._loaded:
+            self.reload(db)
+        elif self._stale:
+            self._refresh_stale(db)
+        with self._lock:
+            if skip + limit > len(self._bodies) and not self._complete:
+                bodies = None
+            else:
+                bodies = self._bodies[skip:skip + limit]
+        CACHE_LOOKUPS.labels(self.name, "miss" if bodies is None else "hit").inc()
+        if bodies is None:
+            return None
+        return b'{"obituaries":[' + b",".join(bodies) + b'],"total":' + str(len(bodies)).encode() + b"}"
+
+    def _refresh_stale(self, db: Session):
+        with self._lock:
+            stale, self._stale = self._stale, set()
+        rows = {o.id: o for o in obituary_service.get_obituaries_by_ids(db, stale)}
+        bodies = {o.id: _serialize(o) for o in rows.values() if o.is_public}
+        with self._lock:
+            for obituary_id, obituary in rows.items():
+                self._remove(obituary_id)
+                if obituary.is_public and obituary_id not in self._deleted:
+                    self._insert(_sort_key(obituary), obituary_id, bodies[obituary_id])
+            # Not visible to this session yet; deletions arrive as events and
+            # were already applied, so keep the rest for the next read
+            self._stale |= (stale - rows.keys()) - self._deleted
+            size = len(self._ids)
+        CACHE_ENTRIES.labels(self.name).set(size)
+
+    def _remove(self, obituary_id: UUID):
+        """Under the lock"""
+        try:
+            index = self._ids.index(obituary_id)
+        except ValueError:
+            return
+        del self._keys[index], self._ids[index], self._bodies[index]
+
+    def _insert(self, key: tuple, obituary_id: UUID, body: bytes):
+        """Under the lock; only obituaries newer than the oldest one held, unless complete"""
+        index = bisect.bisect_left(self._keys, key)
+        if index == len(self._keys) and not self._complete:
+            return
+        self._keys.insert(index, key)
+        self._ids.insert(index, obituary_id)
+        self._bodies.insert(index, body)
+        if len(self._ids) > self.size:
+            del self._keys[self.size:], self._ids[self.size:], self._bodies[self.size:]
+            self._complete = False
+
+
+def _serialize(obituary: Obituary) -> bytes:
+    return dump_json(ObituaryResponse.model_validate(obituary).model_dump())
+
+
+public_feed = PublicFeed(settings.PUBLIC_FEED_SIZE)
+pubsub.subscribe(obituary_service.OBITUARY_EVENTS, public_feed.handle_event)
+
+_stopping = threading.Event()
+_reconciler: Optional[threading.Thread] = None
+
+
+def _reload_from_primary():
+    db = SessionLocal()
+    try:
+        public_feed.reload(db)
+    finally:
+        db.close()
+
+
+def _run():
+    while not _stopping.wait(settings.PUBLIC_FEED_RECONCILE_SECONDS):
+        try:
+            _reload_from_primary()
+        except Exception:
+            logger.exception("Reconciling the public feed failed")
+
+
+def start():
+    """Warm the feed and start the reconciliation thread (called from the lifespan)"""
+    global _reconciler
+    if public_feed.size <= 0:
+        return
+    try:
+        _reload_from_primary()
+    except Exception:
+        # Loaded by the first request instead
+        logger.exception("Warming the public feed failed")
+    if _reconciler is None:
+        _stopping.clear()
+        _reconciler = threading.Thread(target=_run, name="public-feed", daemon=True)
+        _reconciler.start()
+
+
+def stop():
+    global _reconciler
+    if _reconciler is not None:
+        _stopping.set()
+        _reconciler.join(timeout=5)
+        _reconciler = None
@@ -0,0 +1,49 @@
+"""
+Primary key generation
+
+Rows are keyed by UUIDv7 (RFC 9562): a 48-bit millisecond timestamp followed
+by random bits. Keys generated later sort later, so inserts append to the right
+edge of the primary key index instead of landing on random pages, and id order
+follows ``created_at``. Within one millisecond the 12-bit ``rand_a`` field is
+used as a counter so ids from one process stay strictly increasing.
+"""
+import os
+import threading
+import time
+import uuid
+from typing import Optional, Union
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """New time-ordered UUID (version 7)"""
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF  # leave room to count up
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Counter exhausted (or clock went back): borrow the next millisecond
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
+
+
+def parse_uuid(value: Union[str, uuid.UUID]) -> Optional[uuid.UUID]:
+    """``value`` as a UUID, or None when it is not one (treated as not found)"""
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
@@ -1,17 +1,73 @@
 
 import warnings
 warnings.filterwarnings("ignore", message="error reading bcryptversion")
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routes import auth, obituaries  
+from app import feed, pubsub, similar
+from app.compression import CompressionMiddleware
+from app.config import settings
+from app.database import engine, replica_engines, Base
+from app.metrics import PrometheusMiddleware, mark_worker_exited, metrics_response
+from app.query_stats import QueryStatsMiddleware
+from app.read_your_writes import ReadYourWritesMiddleware
+from app.request_log import RequestLogMiddleware, setup_logging
+from app.responses import ORJSONResponse
+from app.routes import auth, obituaries
+from app.services import ai_service, auth_service, lambda_service, media_service
+
+
+def create_schema():
+    """Create missing tables (development; production schemas are managed with `alembic upgrade head`)"""
+    Base.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start-up and shutdown work, kept out of import time"""
+    setup_logging()
+
+    # With several workers app.serve creates the schema once and turns this off
+    if settings.AUTO_CREATE_SCHEMA:
+        create_schema()
+
+    # Create upstream clients and warm the hashing/JWT modules before traffic arrives
+    ai_service.get_client()
+    lambda_service.get_http_client()
+    auth_service.get_pwd_context()
+
+    # Hear about changes made by other workers (cache invalidation)
+    pubsub.start()
+
+    # Removes S3 media of deleted obituaries off the request path
+    media_service.start()
+
+    # First pages of GET /obituaries/ from memory
+    feed.start()
+
+    # TF-IDF index for similar obituaries, built on its own thread
+    similar.start()
+
+    yield
+
+    similar.stop()
+    feed.stop()
+    media_service.stop()
+    pubsub.stop()
+    await lambda_service.close_http_client()
+    await ai_service.close_client()
+    engine.dispose()
+    for replica_engine in replica_engines:
+        replica_engine.dispose()
+    mark_worker_exited()
+
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="The Last Show API",
     description="AI-powered obituary generator with authentication",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS
@@ -22,6 +78,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RequestLogMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(PrometheusMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -37,4 +98,8 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Orphaned media garbage collector
+
+Removes objects from ``IMAGES_BUCKET`` and ``AUDIO_BUCKET`` that no obituary
+references: media of obituaries deleted before background cleanup existed or
+while it was failing, and uploads from create requests that failed after the
+image or audio was stored.
+
+    python -m app.media_gc --dry-run
+    python -m app.media_gc --grace-hours 48 --json
+
+Referenced URLs are streamed from the ``obituaries`` table into a set of keys,
+then each bucket is listed page by page (1000 keys per ``ListObjectsV2``
+page). Objects younger than the grace period are never deleted, so uploads
+whose obituary row is still being written are safe. Orphans are removed with
+``DeleteObjects`` in batches of up to 1000 keys.
+
+A bucket that holds objects while no obituary references any key in it
+usually means the stored URLs do not match the configured bucket, so the run
+is refused (before anything is deleted) unless ``--force`` is given.
+"""
+import argparse
+import json
+import logging
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import MEDIA_BYTES_RECLAIMED
+from app.models.obituary import Obituary
+from app.services import media_service
+
+logger = logging.getLogger(__name__)
+
+
+class NoReferencesError(RuntimeError):
+    """A non-empty bucket has no referenced keys; collecting would empty it"""
+
+
+@dataclass
+class BucketReport:
+    scanned: int = 0
+    referenced: int = 0
+    too_recent: int = 0
+    orphaned: int = 0
+    deleted: int = 0
+    reclaimed_bytes: int = 0
+
+
+@dataclass
+class GCReport:
+    dry_run: bool
+    grace_hours: float
+    buckets: dict[str, BucketReport] = field(default_factory=dict)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(bucket.reclaimed_bytes for bucket in self.buckets.values())
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "reclaimed_bytes": self.reclaimed_bytes}
+
+
+def referenced_keys(db: Session) -> dict[str, set[str]]:
+    """Keys referenced by any obituary, per bucket"""
+    keys: dict[str, set[str]] = defaultdict(set)
+    rows = db.query(Obituary.image_url, Obituary.audio_url).yield_per(5000)
+    for image_url, audio_url in rows:
+        for url in (image_url, audio_url):
+            location = media_service.object_from_url(url)
+            if location is not None:
+                keys[location[0]].add(location[1])
+    return keys
+
+
+def list_objects(bucket: str) -> Iterator[dict]:
+    """Every object in ``bucket``, one ListObjectsV2 page at a time"""
+    paginator = media_service.get_s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, PaginationConfig={"PageSize": 1000}):
+        yield from page.get("Contents", [])
+
+
+def _flush(bucket: str, orphans: list[str], sizes: dict[str, int], stats: BucketReport, dry_run: bool):
+    """Delete (or count) the batch of ``orphans`` and empty it"""
+    if not dry_run:
+        deleted = media_service.delete_objects(bucket, orphans, source="orphan_gc")
+    else:
+        deleted = list(orphans)
+    stats.deleted += len(deleted)
+    reclaimed = sum(sizes.pop(key, 0) for key in deleted)
+    stats.reclaimed_bytes += reclaimed
+    if not dry_run:
+        MEDIA_BYTES_RECLAIMED.inc(reclaimed)
+    orphans.clear()
+    sizes.clear()
+
+
+def collect(
+    db: Session,
+    grace: timedelta = timedelta(hours=24),
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+    force: bool = False,
+) -> GCReport:
+    """
+    Delete (or with ``dry_run`` just count) unreferenced media older than ``grace``
+
+    Raises ``NoReferencesError`` before deleting anything if a bucket holds
+    objects but none of them is referenced, unless ``force`` is set.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - grace
+    report = GCReport(dry_run=dry_run, grace_hours=grace.total_seconds() / 3600)
+    referenced = referenced_keys(db)
+    buckets = sorted(media_service.media_buckets())
+
+    if not dry_run and not force:
+        for bucket in buckets:
+            if not referenced.get(bucket) and next(list_objects(bucket), None) is not None:
+                raise NoReferencesError(
+                    f"No obituary references an object in {bucket}, but it is not empty; "
+                    "check that stored media URLs match the bucket (use --force to collect anyway)"
+                )
+
+    for bucket in buckets:
+        stats = report.buckets[bucket] = BucketReport()
+        in_use = referenced.get(bucket, set())
+        orphans: list[str] = []
+        sizes: dict[str, int] = {}
+
+        for item in list_objects(bucket):
+            stats.scanned += 1
+            key = item["Key"]
+            if key in in_use:
+                stats.referenced += 1
+            elif item["LastModified"] > cutoff:
+                stats.too_recent += 1
+            else:
+                stats.orphaned += 1
+                orphans.append(key)
+                sizes[key] = item.get("Size", 0)
+                if len(orphans) == media_service.DELETE_BATCH_SIZE:
+                    _flush(bucket, orphans, sizes, stats, dry_run)
+        if orphans:
+            _flush(bucket, orphans, sizes, stats, dry_run)
+
+        logger.info(
+            "Media GC %s: scanned=%d referenced=%d too_recent=%d orphaned=%d deleted=%d reclaimed_bytes=%d%s",
+            bucket, stats.scanned, stats.referenced, stats.too_recent, stats.orphaned, stats.deleted,
+            stats.reclaimed_bytes, " (dry run)" if dry_run else "",
+        )
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Delete S3 media no obituary references")
+    parser.add_argument("--grace-hours", type=float, default=settings.MEDIA_GC_GRACE_HOURS,
+                        help="Never delete objects younger than this")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting them")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--force", action="store_true",
+                        help="Collect even from a non-empty bucket no obituary references")
+    args = parser.parse_args(argv)
+
+    if not media_service.media_buckets():
+        print("IMAGES_BUCKET and AUDIO_BUCKET are not set; nothing to collect", file=sys.stderr)
+        return 1
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        report = collect(db, grace=timedelta(hours=args.grace_hours), dry_run=args.dry_run, force=args.force)
+    except NoReferencesError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        verb = "would delete" if args.dry_run else "deleted"
+        for bucket, stats in report.buckets.items():
+            print(
+                f"{bucket}: scanned {stats.scanned}, referenced {stats.referenced}, "
+                f"too recent {stats.too_recent}, {verb} {stats.deleted} ({stats.reclaimed_bytes} bytes)"
+            )
+        print(f"Reclaimed {report.reclaimed_bytes} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
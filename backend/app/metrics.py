@@ -0,0 +1,187 @@
+"""
+Prometheus metrics
+
+Request metrics are recorded by ``PrometheusMiddleware`` and labelled with the
+route template (``/obituaries/{obituary_id}``) rather than the raw path, so
+label cardinality stays bounded. Upstream (Groq, Lambda) and database timings
+are recorded by the services and ``app.query_stats``.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (``app.serve`` does this for multiple
+workers) each worker writes its samples there and ``/metrics`` aggregates them.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from starlette.responses import Response
+
+# Upstream calls take seconds, so extend the default buckets past 10s
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status",
+    ["method", "route", "status"],
+    buckets=UPSTREAM_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+COMPRESSION_BYTES = Counter(
+    "response_compression_bytes_total",
+    "Response body bytes before (original) and after (compressed) compression by encoding",
+    ["encoding", "kind"],
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Groq chat completion latency by model and outcome",
+    ["model", "outcome"],
+    buckets=UPSTREAM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Groq tokens consumed by model and kind (prompt, completion)",
+    ["model", "kind"],
+)
+LLM_GENERATIONS = Counter(
+    "llm_generations_total",
+    "Obituary texts by the model that wrote them (template when every model failed)",
+    ["model"],
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Hedged Groq calls by model and event (fired, won by the hedge, capped by LLM_HEDGE_MAX_RATE)",
+    ["model", "event"],
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Lambda call latency by upstream and outcome",
+    ["upstream", "outcome"],
+    buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAMS_IN_PROGRESS = Gauge(
+    "upstream_requests_in_progress",
+    "Upstream calls currently in flight",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["operation"],
+    buckets=DB_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements issued per HTTP request by method and route template",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+MEDIA_OBJECTS_DELETED = Counter(
+    "media_objects_deleted_total",
+    "S3 media objects deleted, by source (obituary_delete, orphan_gc)",
+    ["source"],
+)
+MEDIA_BYTES_RECLAIMED = Counter(
+    "media_bytes_reclaimed_total",
+    "Bytes of orphaned S3 media removed by the garbage collector",
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "In-process cache lookups by cache and result (hit, miss)",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total",
+    "Entries evicted to stay within the cache's size bound",
+    ["cache"],
+)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "scheduler_queue_depth",
+    "Upstream calls waiting for a slot by scheduler (generation, tts) and lane",
+    ["scheduler", "lane"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_RUNNING = Gauge(
+    "scheduler_running",
+    "Upstream calls holding a slot by scheduler",
+    ["scheduler"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_WAIT = Histogram(
+    "scheduler_wait_seconds",
+    "Time upstream calls waited for a slot by scheduler and lane",
+    ["scheduler", "lane"],
+    buckets=UPSTREAM_BUCKETS,
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Entries held in in-process caches (summed over live workers)",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request count, latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            status = str(status_code)
+            HTTP_REQUESTS.labels(method, template, status).inc()
+            HTTP_REQUEST_DURATION.labels(method, template, status).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    """Render the registry in the Prometheus text exposition format"""
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_exited():
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, Uuid
+from sqlalchemy.sql import func
+from app.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    user_id = Column(Uuid, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+
+    # Hash of the request payload, so a key cannot be reused for a different request
+    request_hash = Column(String(64), nullable=False)
+
+    # Stored response; status_code is NULL while the original request is in flight
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+
+    # Indexed for the purge of expired keys (see idempotency_service.purge_expired)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
@@ -1,20 +1,46 @@
-from sqlalchemy import Column, String, DateTime, Text, Boolean, ForeignKey
+from datetime import date
+from sqlalchemy import Column, String, Date, DateTime, Boolean, ForeignKey, Index, SmallInteger, Uuid
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
+from app.compressed_text import CompressedText
 from app.database import Base
-import uuid
+from app.ids import uuid7
+
+
+def month_day(value: date) -> int:
+    """``month * 100 + day``, e.g. 1019 for 19 October"""
+    return value.month * 100 + value.day
+
+
+def _month_day_default(column: str):
+    """Insert default deriving a month-day column from the date in ``column``"""
+    def default(context):
+        value = context.get_current_parameters()[column]
+        return month_day(date.fromisoformat(value) if isinstance(value, str) else value)
+    return default
+
 
 class Obituary(Base):
     __tablename__ = "obituaries"
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey('users.id'), nullable=False)
+    __table_args__ = (
+        # A user's obituaries in creation order (my-obituaries, export) without a sort
+        Index("ix_obituaries_user_id_created_at", "user_id", "created_at"),
+    )
+    id = Column(Uuid, primary_key=True, default=uuid7)
+    user_id = Column(Uuid, ForeignKey('users.id'), nullable=False)
 
     # Person details
     name = Column(String, nullable=False)
-    birth_date = Column(String, nullable=False)  # "YYYY-MM-DD"
-    death_date = Column(String, nullable=False)  # "YYYY-MM-DD"
+    birth_date = Column(Date, nullable=False)
+    death_date = Column(Date, nullable=False, index=True)  # range filters on list endpoints
+    # Derived on insert (dates never change afterwards) for GET /obituaries/anniversaries
+    birth_month_day = Column(SmallInteger, nullable=False, default=_month_day_default("birth_date"), index=True)
+    death_month_day = Column(SmallInteger, nullable=False, default=_month_day_default("death_date"), index=True)
 
     # Generated content
-    obituary_text = Column(Text, nullable=False)  # ChatGPT generated
+    # ChatGPT generated; compressed (app.compressed_text) and only loaded when accessed or undeferred
+    obituary_text = deferred(Column(CompressedText, nullable=False))
+    text_model = Column(String, nullable=True)  # Groq model that wrote it, "template" on fallback
 
     # Media URLs
     image_url = Column(String, nullable=True)  # S3 URL for photo
@@ -0,0 +1,240 @@
+"""
+Cross-worker publish/subscribe
+
+Each worker process keeps its own in-memory state (caches, feeds, event
+streams); ``publish`` tells every worker, including this one, that something
+changed. Handlers registered with ``subscribe`` run synchronously for local
+messages and on a background thread for messages from other workers, so they
+must be quick and thread-safe.
+
+Backends (``PUBSUB_BACKEND``):
+
+``local``
+    Single process only; messages are delivered in-process.
+``socket``
+    Unix datagram sockets in ``PUBSUB_SOCKET_DIR``, one per worker. A stand-in
+    for Postgres on a single host (SQLite, development). ``app.serve`` creates
+    the directory when running several workers.
+``postgres``
+    ``LISTEN``/``NOTIFY`` on the primary database, for workers on any host.
+``auto`` (default)
+    ``postgres`` for a PostgreSQL ``DATABASE_URL``, else ``socket`` when
+    ``PUBSUB_SOCKET_DIR`` is set, else ``local``.
+
+Payloads are small JSON objects (NOTIFY is limited to 8000 bytes): send ids
+and let receivers reload what they need.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.config import settings
+
+logger = logging.getLogger("app.pubsub")
+
+Handler = Callable[[dict], None]
+
+_handlers: dict[str, list[Handler]] = defaultdict(list)
+_origin = uuid.uuid4().hex
+_transport: Optional["_Transport"] = None
+
+
+def subscribe(channel: str, handler: Handler):
+    """Call ``handler(data)`` for every message published on ``channel``"""
+    _handlers[channel].append(handler)
+
+
+def publish(channel: str, data: dict):
+    """Deliver ``data`` to this worker's subscribers now and to other workers"""
+    _dispatch(channel, data)
+    if _transport is not None:
+        try:
+            _transport.send(json.dumps({"channel": channel, "origin": _origin, "data": data}))
+        except Exception:
+            logger.exception("Failed to publish on %s", channel)
+
+
+def _dispatch(channel: str, data: dict):
+    for handler in list(_handlers.get(channel, ())):
+        try:
+            handler(data)
+        except Exception:
+            logger.exception("Subscriber for %s failed", channel)
+
+
+def _receive(raw: str):
+    try:
+        message = json.loads(raw)
+    except ValueError:
+        logger.warning("Dropping malformed pub/sub message: %.200r", raw)
+        return
+    if message.get("origin") != _origin:
+        _dispatch(message["channel"], message["data"])
+
+
+class _Transport(ABC):
+    """Delivers serialized messages to the other workers and reads theirs on a thread"""
+
+    name = "transport"
+
+    def __init__(self):
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"pubsub-{self.name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    @abstractmethod
+    def send(self, raw: str):
+        """Deliver ``raw`` to every other worker"""
+
+    @abstractmethod
+    def _run(self):
+        """Receive messages from the other workers until stopped"""
+
+
+class _SocketTransport(_Transport):
+    """One Unix datagram socket per worker in a shared directory"""
+
+    name = "socket"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{os.getpid()}-{_origin[:8]}.sock"
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self.path))
+        self._sock.settimeout(0.5)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def send(self, raw: str):
+        payload = raw.encode()
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sender.sendto(payload, str(peer))
+            except ConnectionRefusedError:
+                # Left behind by a worker that died without cleaning up
+                peer.unlink(missing_ok=True)
+            except (FileNotFoundError, BlockingIOError):
+                pass
+
+    def stop(self):
+        super().stop()
+        self._sock.close()
+        self._sender.close()
+        self.path.unlink(missing_ok=True)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                payload = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            _receive(payload.decode())
+
+
+class _PostgresTransport(_Transport):
+    """``LISTEN``/``NOTIFY`` on a dedicated connection to the primary"""
+
+    name = "postgres"
+    channel = "app_pubsub"
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    def send(self, raw: str):
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": raw})
+            conn.commit()
+
+    def _connect(self):
+        # Detached from the pool: this connection stays in LISTEN mode for the worker's lifetime
+        connection = self.engine.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.driver_connection
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return dbapi_connection
+
+    def _run(self):
+        delay = 0.5
+        while not self._stopping.is_set():
+            try:
+                connection = self._connect()
+            except Exception:
+                logger.exception("Pub/sub LISTEN connection failed; retrying in %.1fs", delay)
+                self._stopping.wait(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 0.5
+            try:
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], 0.5)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            _receive(connection.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Pub/sub LISTEN connection lost; reconnecting")
+            finally:
+                try:
+                    connection.close()
+                except (OSError, self.engine.dialect.dbapi.Error):
+                    logger.warning("Could not close the pub/sub LISTEN connection", exc_info=True)
+
+
+def backend_name() -> str:
+    backend = settings.PUBSUB_BACKEND
+    if backend != "auto":
+        return backend
+    if settings.DATABASE_URL.startswith("postgresql"):
+        return "postgres"
+    if settings.PUBSUB_SOCKET_DIR:
+        return "socket"
+    return "local"
+
+
+def start():
+    """Connect this worker to the other workers (called from the lifespan)"""
+    global _transport
+    if _transport is not None:
+        return
+    backend = backend_name()
+    if backend == "socket":
+        _transport = _SocketTransport(settings.PUBSUB_SOCKET_DIR)
+    elif backend == "postgres":
+        from app.database import engine
+
+        _transport = _PostgresTransport(engine)
+    elif backend != "local":
+        raise ValueError(f"Unknown PUBSUB_BACKEND {backend!r}")
+    if _transport is not None:
+        _transport.start()
+
+
+def stop():
+    global _transport
+    if _transport is not None:
+        transport, _transport = _transport, None
+        transport.stop()
@@ -0,0 +1,165 @@
+"""
+SQL query instrumentation
+
+``instrument_engine`` hooks SQLAlchemy's cursor execute events to time every
+statement. Each request gets its own ``QueryStats`` (via ``QueryStatsMiddleware``)
+so the number of statements per request can be measured, statements slower
+than ``SLOW_QUERY_MS`` are logged with their parameters, and in debug mode the
+slow statement's query plan is attached to the log record.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.metrics import DB_QUERIES_PER_REQUEST, DB_QUERY_DURATION
+
+logger = logging.getLogger("app.sql")
+
+MAX_LOGGED_PARAMETERS = 500
+
+
+@dataclass
+class QueryStats:
+    """Statements executed within one request (or ``track_queries`` block)"""
+    count: int = 0
+    duration: float = 0.0
+    statements: list[str] = field(default_factory=list)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Stats for the request being served, if any"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect stats for statements run in this context (and threads it spawns)"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[QueryStats]:
+    """
+    Count every statement run through ``engine`` while the block is active
+
+    Unlike ``track_queries`` this does not depend on context propagation, so it
+    also sees statements issued from the test client's server thread.
+    """
+    stats = QueryStats()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        stats.count += 1
+        stats.statements.append(statement)
+
+    event.listen(engine, "after_cursor_execute", _count)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "after_cursor_execute", _count)
+
+
+def _operation(statement: str) -> str:
+    stripped = statement.lstrip()
+    return stripped.split(None, 1)[0].upper() if stripped else "UNKNOWN"
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """Query plan for a SELECT, run on a separate raw cursor"""
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" | ".join(str(col) for col in row) for row in cursor.fetchall())
+    except conn.dialect.dbapi.Error as e:
+        # A raw DB-API cursor, so driver errors are not wrapped in SQLAlchemyError
+        logger.debug("EXPLAIN failed for %s", statement, exc_info=True)
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine: Engine):
+    """Time, count and log every statement run through ``engine``"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = _operation(statement)
+        DB_QUERY_DURATION.labels(operation).observe(elapsed)
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            stats.statements.append(statement)
+
+        if elapsed * 1000 < settings.SLOW_QUERY_MS:
+            return
+
+        plan = None
+        if settings.DEBUG and operation == "SELECT" and not executemany:
+            plan = _explain(conn, statement, parameters)
+        logger.warning(
+            "Slow query (%.1f ms): %s | parameters=%.*r%s",
+            elapsed * 1000,
+            statement,
+            MAX_LOGGED_PARAMETERS,
+            parameters,
+            f"\nplan:\n{plan}" if plan else "",
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware giving each request its own ``QueryStats``
+
+    Records statements per request by route template, warns when a request
+    exceeds ``QUERY_COUNT_WARN`` statements, and in debug mode reports the
+    count in an ``X-Query-Count`` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(stats.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                DB_QUERIES_PER_REQUEST.labels(scope["method"], route).observe(stats.count)
+                if stats.count > settings.QUERY_COUNT_WARN:
+                    logger.warning(
+                        "%s %s issued %d queries (%.1f ms)",
+                        scope["method"], route, stats.count, stats.duration * 1000,
+                    )
@@ -0,0 +1,94 @@
+"""
+Read-your-writes markers shared between workers
+
+A request that writes on behalf of a user is answered with a signed marker
+holding the time of the write, both as a ``last_write`` cookie and as an
+``X-Last-Write`` header (for clients that do not keep cookies and echo it back
+instead). Requests carrying a valid marker younger than
+``READ_YOUR_WRITES_SECONDS`` read from the primary (see
+``app.dependencies.get_read_db``) whichever worker serves them, so the
+per-process window in ``app.database`` is only a fast path.
+
+The signature covers the user's email, so a marker never routes another user,
+or an anonymous request from the same browser, to the primary.
+"""
+import hashlib
+import hmac
+import math
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.config import settings
+
+COOKIE = "last_write"
+HEADER = "x-last-write"
+
+# Users who wrote during the request being served, filled by app.database
+_request_writes: ContextVar[Optional[dict[str, float]]] = ContextVar("request_writes", default=None)
+
+
+def _signature(user_key: str, written_at: str) -> str:
+    message = f"{user_key}\n{written_at}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def sign(user_key: str, written_at: float) -> str:
+    """Marker for a write by ``user_key`` at ``written_at`` (epoch seconds)"""
+    stamp = f"{written_at:.3f}"
+    return f"{stamp}.{_signature(user_key, stamp)}"
+
+
+def marker_is_recent(user_key: str, marker: Optional[str]) -> bool:
+    """Whether ``marker`` was signed for ``user_key`` within the window"""
+    if not marker:
+        return False
+    stamp, _, signature = marker.rpartition(".")
+    if not hmac.compare_digest(signature, _signature(user_key, stamp)):
+        return False
+    try:
+        age = time.time() - float(stamp)
+    except ValueError:
+        return False
+    # Allow a little clock skew between the hosts that signed and read it
+    return -1.0 <= age < settings.READ_YOUR_WRITES_SECONDS
+
+
+def note_write(user_key: str):
+    """Record that the current request wrote for ``user_key``"""
+    writes = _request_writes.get()
+    if writes is not None:
+        writes[user_key] = time.time()
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware sending a marker with responses to requests that wrote"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes: dict[str, float] = {}
+        token = _request_writes.set(writes)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writes:
+                # A request writes for one user; the latest write is the one to wait for
+                user_key, written_at = max(writes.items(), key=lambda item: item[1])
+                marker = sign(user_key, written_at)
+                max_age = max(1, math.ceil(settings.READ_YOUR_WRITES_SECONDS))
+                cookie = f"{COOKIE}={marker}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode()))
+                headers.append((HEADER.encode(), marker.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
@@ -0,0 +1,192 @@
+"""
+Structured, non-blocking request logging
+
+Every request produces a single JSON event with its request id, route, status,
+duration, per-stage timings (see ``stage``) and any fields added with
+``annotate``. Records are handed to a ``QueueHandler`` as-is; formatting and
+I/O happen on the ``QueueListener`` thread, never on the event loop.
+
+Successful requests are sampled with ``LOG_SAMPLE_RATE``; errors and requests
+slower than ``LOG_SLOW_REQUEST_MS`` are always logged.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+
+from app.config import settings
+from app.query_stats import current_stats
+
+logger = logging.getLogger("app.request")
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+@dataclass
+class RequestContext:
+    """Per-request state collected for the request's log event"""
+    request_id: str
+    stages: dict[str, float] = field(default_factory=dict)
+    fields: dict = field(default_factory=dict)
+
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    context = _current_request.get()
+    return context.request_id if context else None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block and report it in the request's ``stages`` (milliseconds)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        context = _current_request.get()
+        if context is not None:
+            context.stages[name] = round((time.perf_counter() - started) * 1000, 3)
+
+
+def annotate(**fields):
+    """Attach fields to the current request's log event"""
+    context = _current_request.get()
+    if context is not None:
+        context.fields.update(fields)
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            event = dict(record.msg)
+        else:
+            event = {"message": record.getMessage()}
+        event.setdefault("request_id", getattr(record, "request_id", None))
+        event["ts"] = datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+        event["level"] = record.levelname
+        event["logger"] = record.name
+        if record.exc_info:
+            event["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id()
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> QueueListener:
+    """Route the ``app`` logger hierarchy through a queue to a JSON stdout handler"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(_RequestIdFilter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL)
+    app_logger.addHandler(queue_handler)
+    app_logger.propagate = False
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _should_log(status_code: int, duration_ms: float) -> bool:
+    if status_code >= 400 or duration_ms >= settings.LOG_SLOW_REQUEST_MS:
+        return True
+    return random.random() < settings.LOG_SAMPLE_RATE
+
+
+class RequestLogMiddleware:
+    """ASGI middleware emitting one structured log event per request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:128]
+                break
+        context = RequestContext(request_id=request_id or uuid.uuid4().hex)
+        token = _current_request.set(context)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, context.request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if _should_log(status_code, duration_ms):
+                stats = current_stats()
+                event = {
+                    "event": "request",
+                    "request_id": context.request_id,
+                    "method": scope["method"],
+                    "route": getattr(scope.get("route"), "path", None),
+                    "path": scope["path"],
+                    "status": status_code,
+                    "outcome": "error" if status_code >= 500 else "rejected" if status_code >= 400 else "ok",
+                    "duration_ms": round(duration_ms, 3),
+                    "stages": context.stages,
+                    **context.fields,
+                }
+                if stats is not None:
+                    event["queries"] = stats.count
+                    event["query_ms"] = round(stats.duration * 1000, 3)
+                logger.log(logging.ERROR if status_code >= 500 else logging.INFO, event)
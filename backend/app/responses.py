@@ -0,0 +1,37 @@
+"""
+Response helpers
+
+``ORJSONResponse`` is the application's default response class. Routes that
+return ORM rows build their response model once with ``model_validate`` and
+hand it to ``model_response``; returning a ``Response`` makes FastAPI skip its
+own ``response_model`` validation and ``jsonable_encoder`` pass, so each
+payload is validated and serialized exactly once. Cached payloads are stored
+as ``dump_json`` bytes and returned with ``json_bytes_response``.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (UTC datetimes as ``Z``, like pydantic)"""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize ``content`` exactly as ``ORJSONResponse`` does"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> ORJSONResponse:
+    """Serialize an already validated response model"""
+    return ORJSONResponse(model.model_dump(), status_code=status_code)
+
+
+def json_bytes_response(content: bytes, status_code: int = 200) -> Response:
+    """Return already serialized JSON"""
+    return Response(content, status_code=status_code, media_type="application/json")
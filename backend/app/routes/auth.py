@@ -9,6 +9,7 @@ from app.services.auth_service import create_access_token
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.config import settings
+from app.responses import model_response
 
 router = APIRouter()
 
@@ -25,10 +26,12 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
               detail="Email already registered"
           )
 
-      # Create new user
+      # Create new user; tagging the session sends a read-your-writes marker
+      # so /auth/me right after reads the new row from the primary
+      db.info["user_key"] = user.email
       db_user = create_user(db=db, user=user)
 
-      return db_user
+      return model_response(UserResponse.model_validate(db_user), status_code=status.HTTP_201_CREATED)
 
 @router.post("/login", response_model=Token)
 def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
@@ -60,4 +63,4 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
       Get current logged-in user information
       This is a protected route - requires valid JWT token
       """
-      return current_user
\ No newline at end of file
+      return model_response(UserResponse.model_validate(current_user))
\ No newline at end of file
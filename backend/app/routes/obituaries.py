@@ -1,20 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+import asyncio
+import csv
+import io
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, status, File, UploadFile, Form, Header, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import Optional
-from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from typing import Iterator, Literal, Optional
+from uuid import UUID
+from app import events
+from app.feed import public_feed
+from app.similar import similarity_index
+from app.config import settings
 from app.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_read_db
 from app.models.user import User
-from app.schemas.obituary import ObituaryCreate, ObituaryResponse, ObituaryListResponse
-from app.services import obituary_service
+from app.schemas.obituary import (
+    ObituaryBulkDelete, ObituaryBulkDeleteResponse, ObituaryCreate, ObituaryResponse, ObituaryListResponse,
+    SimilarObituaryListResponse, SimilarObituaryResponse,
+)
+from app.services import idempotency_service, obituary_service
 from app.services.ai_service import generate_obituary_text
 from app.services.lambda_service import upload_image_to_lambda, generate_tts_audio
-import logging
-
-logger = logging.getLogger("uvicorn")
+from app.request_log import annotate, stage
+from app.scheduler import Lane, generation_scheduler, tts_scheduler
+from app.responses import dump_json, json_bytes_response, model_response
 
 router = APIRouter()
 
+# Lazy TTS synthesis in progress in this worker, shared by concurrent first plays
+_audio_in_flight: dict[UUID, asyncio.Task] = {}
+
+
+async def _begin_idempotent_request(db: Session, user_id: UUID, key: str, request_hash: str) -> Optional[Response]:
+    """
+    Claim an Idempotency-Key for this request
+
+    Returns None when the caller should run the request, or the stored response
+    of an earlier (possibly concurrent, awaited here) request with the same key.
+    """
+    if len(key) > 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key must be at most 255 characters"
+        )
+
+    for _ in range(2):
+        existing = idempotency_service.claim_key(db, user_id, key, request_hash)
+        if existing is None:
+            return None
+
+        if existing.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used with a different request"
+            )
+
+        if existing.status_code is None:
+            existing = await idempotency_service.wait_for_key(
+                db, user_id, key, timeout=settings.IDEMPOTENCY_WAIT_SECONDS
+            )
+            if existing is None:
+                continue  # the original request failed and released the key
+            if existing.status_code is None:
+                break
+
+        annotate(idempotent_replay=True)
+        return Response(
+            content=existing.response_body,
+            status_code=existing.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress"
+    )
+
 
 @router.post("/", response_model=ObituaryResponse, status_code=status.HTTP_201_CREATED)
 async def create_obituary(
@@ -23,112 +88,343 @@ async def create_obituary(
     death_date: str = Form(...),
     is_public: bool = Form(True),
     image: Optional[UploadFile] = File(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    priority: Lane = Header("interactive", alias="X-Request-Priority"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Create a new obituary with AI-generated text, optional image, and TTS audio.
+    Create a new obituary with AI-generated text, optional image, and TTS audio
+    (deferred to GET /obituaries/{id}/audio when LAZY_TTS is set).
     Works with multipart/form-data.
+
+    Send an Idempotency-Key header to make retries safe: a repeated request
+    returns the stored response instead of generating a new obituary.
+
+    Generation and TTS wait their turn in per-user fair queues; scripts creating
+    many obituaries should send ``X-Request-Priority: bulk``.
     """
-    logger.info("📥 Incoming obituary creation request")
-    logger.info(f"name={name!r}, birth_date={birth_date!r}, death_date={death_date!r}, is_public={is_public!r}, image={image.filename if image else None}")
-    # Log incoming data
-    logger.info("📥 Incoming obituary creation request")
-    logger.info(f"name: {name!r}")
-    logger.info(f"birth_date: {birth_date!r}")
-    logger.info(f"death_date: {death_date!r}")
-    logger.info(f"is_public: {is_public!r}")
-    logger.info(f"image: {image.filename if image else None}")
-
-    # Generate obituary text using AI
-    obituary_text = generate_obituary_text(
-        name=name,
-        birth_date=birth_date,
-        death_date=death_date
-    )
+    # Validate the dates before spending an LLM call on the request
+    try:
+        obituary_data = ObituaryCreate(
+            name=name,
+            birth_date=birth_date,
+            death_date=death_date,
+            is_public=is_public
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False, include_context=False)) from e
 
-    # Upload image if provided
-    image_url = None
-    if image:
-        logger.info(f"📤 Uploading image: {image.filename}")
-        image_data = await image.read()
-        logger.info(f"📦 Image size: {len(image_data)} bytes")
-        image_url = await upload_image_to_lambda(image_data, image.filename)
-        if image_url:
-            logger.info(f"✅ Image uploaded successfully: {image_url}")
-        else:
-            logger.error(f"❌ Image upload failed for {image.filename}")
-
-    # Create obituary data object
-    obituary_data = ObituaryCreate(
-        name=name,
-        birth_date=birth_date,
-        death_date=death_date,
-        is_public=is_public
-    )
+    image_data = await image.read() if image else None
 
-    # Create obituary in database (without audio_url yet)
-    obituary = obituary_service.create_obituary(
-        db=db,
-        user_id=current_user.id,
-        obituary_data=obituary_data,
-        obituary_text=obituary_text,
-        image_url=image_url,
-        audio_url=None
-    )
+    if idempotency_key:
+        request_hash = idempotency_service.request_fingerprint(
+            {
+                "name": name,
+                "birth_date": birth_date,
+                "death_date": death_date,
+                "is_public": is_public,
+                "filename": image.filename if image else None,
+            },
+            image_data
+        )
+        replay = await _begin_idempotent_request(db, current_user.id, idempotency_key, request_hash)
+        if replay is not None:
+            return replay
+
+    try:
+        # Generate obituary text using AI
+        async with generation_scheduler.slot(current_user.id, priority):
+            with stage("generate_text"):
+                generation = await generate_obituary_text(
+                    name=name,
+                    birth_date=obituary_data.birth_date.isoformat(),
+                    death_date=obituary_data.death_date.isoformat()
+                )
+        obituary_text = generation.text
+        annotate(text_model=generation.model)
+
+        # Upload image if provided
+        image_url = None
+        if image:
+            with stage("upload_image"):
+                image_url = await upload_image_to_lambda(image_data, image.filename)
+            annotate(image_bytes=len(image_data), image_uploaded=image_url is not None)
 
-    # Generate TTS audio in background
-    audio_url = await generate_tts_audio(obituary_text, obituary.id)
+        # Create obituary in database (without audio_url yet)
+        with stage("db_insert"):
+            obituary = obituary_service.create_obituary(
+                db=db,
+                user_id=current_user.id,
+                obituary_data=obituary_data,
+                obituary_text=obituary_text,
+                image_url=image_url,
+                audio_url=None,
+                text_model=generation.model
+            )
 
-    # Update obituary with audio URL
-    if audio_url:
-        obituary.audio_url = audio_url
-        db.commit()
-        db.refresh(obituary)
+        # Generate TTS audio now, or on first playback with LAZY_TTS
+        audio_url = None
+        if not settings.LAZY_TTS:
+            async with tts_scheduler.slot(obituary.user_id, priority):
+                with stage("tts"):
+                    audio_url = await generate_tts_audio(obituary_text, obituary.id)
 
-    logger.info(f"✅ Obituary created with ID: {obituary.id}")
+        # Update obituary with audio URL
+        if audio_url:
+            with stage("db_update"):
+                obituary_service.set_audio_url(db, obituary, audio_url)
 
-   
-    return jsonable_encoder(obituary)
+        annotate(obituary_id=str(obituary.id), audio_generated=audio_url is not None)
+
+        response = model_response(ObituaryResponse.model_validate(obituary), status_code=status.HTTP_201_CREATED)
+    except BaseException:
+        if idempotency_key:
+            idempotency_service.release_key(db, current_user.id, idempotency_key)
+        raise
+
+    if idempotency_key:
+        idempotency_service.complete_key(db, current_user.id, idempotency_key, response.status_code, response.body)
+
+    return response
 
 @router.get("/", response_model=ObituaryListResponse)
 def get_obituaries(
       skip: int = 0,
       limit: int = 100,
-      db: Session = Depends(get_db)
+      died_after: Optional[date] = Query(None, description="Only obituaries with death_date on or after this date"),
+      died_before: Optional[date] = Query(None, description="Only obituaries with death_date on or before this date"),
+      db: Session = Depends(get_read_db)
+  ):
+      """
+      Get all public obituaries, optionally within a death date range
+
+      Unfiltered pages within the newest ``PUBLIC_FEED_SIZE`` come from the
+      worker's in-memory feed.
+      """
+      if died_after is None and died_before is None:
+          content = public_feed.page(db, skip, limit)
+          if content is not None:
+              return json_bytes_response(content)
+
+      obituaries = obituary_service.get_obituaries(
+          db=db,
+          skip=skip,
+          limit=limit,
+          died_after=died_after,
+          died_before=died_before
+      )
+      return model_response(ObituaryListResponse(
+          obituaries=[ObituaryResponse.model_validate(o) for o in obituaries],
+          total=len(obituaries)
+      ))
+
+
+@router.get("/anniversaries", response_model=ObituaryListResponse)
+def get_anniversaries(
+      on: str = Query(..., alias="date", pattern=r"^\d{2}-\d{2}$", description="Month and day, MM-DD"),
+      skip: int = 0,
+      limit: int = 100,
+      db: Session = Depends(get_read_db)
   ):
       """
-      Get all public obituaries
+      Public obituaries of people born or who died on this day, in any year
       """
-      obituaries = obituary_service.get_obituaries(db=db, skip=skip, limit=limit)
-      return {
-          "obituaries": obituaries,
-          "total": len(obituaries)
-      }
+      month, day = (int(part) for part in on.split("-"))
+      try:
+          date(2000, month, day)  # a leap year, so 02-29 is valid
+      except ValueError:
+          raise HTTPException(
+              status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+              detail="date must be a valid MM-DD"
+          ) from None
+
+      obituaries = obituary_service.get_anniversaries(db=db, month=month, day=day, skip=skip, limit=limit)
+      return model_response(ObituaryListResponse(
+          obituaries=[ObituaryResponse.model_validate(o) for o in obituaries],
+          total=len(obituaries)
+      ))
 
 
 @router.get("/my-obituaries", response_model=ObituaryListResponse)
 def get_my_obituaries(
+      died_after: Optional[date] = Query(None, description="Only obituaries with death_date on or after this date"),
+      died_before: Optional[date] = Query(None, description="Only obituaries with death_date on or before this date"),
       current_user: User = Depends(get_current_user),
-      db: Session = Depends(get_db)
+      db: Session = Depends(get_read_db)
   ):
       """
-      Get current user's obituaries (protected route)
+      Get current user's obituaries (protected route), optionally within a death date range
+      """
+      obituaries = obituary_service.get_obituaries(
+          db=db,
+          user_id=current_user.id,
+          died_after=died_after,
+          died_before=died_before
+      )
+      return model_response(ObituaryListResponse(
+          obituaries=[ObituaryResponse.model_validate(o) for o in obituaries],
+          total=len(obituaries)
+      ))
+
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _export_chunks(batches: Iterator[list], format_: str) -> Iterator[bytes]:
+    """Render each batch of rows as one chunk of NDJSON lines or CSV records"""
+    if format_ == "csv":
+        fields = list(ObituaryResponse.model_fields)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(ObituaryResponse.model_validate(o).model_dump(mode="json") for o in batch)
+            yield buffer.getvalue().encode()
+    else:
+        for batch in batches:
+            yield b"".join(dump_json(ObituaryResponse.model_validate(o).model_dump()) + b"\n" for o in batch)
+
+
+@router.get("/my-obituaries/export", response_class=StreamingResponse)
+def export_my_obituaries(
+      format_: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+      current_user: User = Depends(get_current_user),
+      db: Session = Depends(get_read_db)
+  ):
       """
-      obituaries = obituary_service.get_obituaries(db=db, user_id=current_user.id)
-      return {
-          "obituaries": obituaries,
-          "total": len(obituaries)
-      }
+      Download all of the current user's obituaries as NDJSON or CSV
+
+      Rows are streamed in batches straight from the database cursor, so memory
+      use does not grow with the number of obituaries.
+      """
+      batches = obituary_service.iter_user_obituaries(db, current_user.id, batch_size=EXPORT_BATCH_SIZE)
+      return StreamingResponse(
+          _export_chunks(batches, format_),
+          media_type=EXPORT_MEDIA_TYPES[format_],
+          headers={"Content-Disposition": f'attachment; filename="obituaries.{format_}"'}
+      )
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def obituary_events(
+      current_user: User = Depends(get_current_user),
+      db: Session = Depends(get_read_db)
+  ):
+      """
+      Server-Sent Events stream of changes to the current user's obituaries
+
+      Sends ``created``, ``updated``, ``deleted`` and ``media`` (generated audio
+      attached) events with the obituary id, and ``resync`` if the client fell
+      too far behind. Needs the bearer token, so browsers should use a
+      fetch-based EventSource.
+      """
+      user_id = current_user.id
+      # Give the connection back now rather than when the stream ends
+      db.close()
+      return StreamingResponse(
+          events.stream(user_id, settings.SSE_HEARTBEAT_SECONDS, settings.SSE_STREAM_SECONDS),
+          media_type="text/event-stream",
+          headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+      )
 
 
 @router.get("/{obituary_id}", response_model=ObituaryResponse)
 def get_obituary(
+      obituary_id: str,
+      db: Session = Depends(get_read_db)
+  ):
+      """
+      Get a single obituary by ID (served from the worker's cache when possible)
+      """
+      content = obituary_service.get_obituary_json(db=db, obituary_id=obituary_id)
+
+      if content is None:
+          raise HTTPException(
+              status_code=status.HTTP_404_NOT_FOUND,
+              detail="Obituary not found"
+          )
+
+      return json_bytes_response(content)
+
+
+async def _scheduled_tts(owner_id: UUID, obituary_id: UUID, obituary_text: str) -> Optional[str]:
+    # Lazy synthesis is charged to the obituary's owner, however many people press play
+    async with tts_scheduler.slot(owner_id):
+        return await generate_tts_audio(obituary_text, obituary_id)
+
+
+async def _synthesize_audio(obituary_id: UUID, obituary_text: str, owner_id: UUID) -> Optional[str]:
+    """Generate audio once per obituary no matter how many requests ask at the same time"""
+    task = _audio_in_flight.get(obituary_id)
+    if task is None:
+        task = asyncio.ensure_future(_scheduled_tts(owner_id, obituary_id, obituary_text))
+        _audio_in_flight[obituary_id] = task
+        task.add_done_callback(lambda _: _audio_in_flight.pop(obituary_id, None))
+        annotate(audio="generated")
+    else:
+        annotate(audio="coalesced")
+
+    # Shielded so one client disconnecting does not cancel synthesis for the others
+    return await asyncio.shield(task)
+
+
+@router.get("/{obituary_id}/audio", response_class=RedirectResponse, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+async def get_obituary_audio(
       obituary_id: str,
       db: Session = Depends(get_db)
   ):
       """
-      Get a single obituary by ID
+      Redirect to an obituary's narration, synthesizing it on first request
+      """
+      # Database calls run on the thread pool to keep the event loop free while
+      # other requests wait on synthesis; the text is only loaded if it is needed
+      obituary = await run_in_threadpool(obituary_service.get_obituary_by_id, db, obituary_id, with_text=False)
+
+      if not obituary:
+          raise HTTPException(
+              status_code=status.HTTP_404_NOT_FOUND,
+              detail="Obituary not found"
+          )
+
+      audio_url = obituary.audio_url
+      if audio_url is None:
+          obituary_text = await run_in_threadpool(getattr, obituary, "obituary_text")
+          with stage("tts"):
+              audio_url = await _synthesize_audio(obituary.id, obituary_text, obituary.user_id)
+          if audio_url is None:
+              raise HTTPException(
+                  status_code=status.HTTP_502_BAD_GATEWAY,
+                  detail="Audio generation failed"
+              )
+          # Another worker may have stored its own copy first; everyone redirects to that one
+          with stage("db_update"):
+              audio_url = await run_in_threadpool(obituary_service.store_audio_url, db, obituary.id, audio_url)
+          if audio_url is None:
+              raise HTTPException(
+                  status_code=status.HTTP_404_NOT_FOUND,
+                  detail="Obituary not found"
+              )
+      else:
+          annotate(audio="stored")
+
+      return RedirectResponse(audio_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+
+@router.get("/{obituary_id}/similar", response_model=SimilarObituaryListResponse)
+def get_similar_obituaries(
+      obituary_id: str,
+      k: int = Query(10, ge=1, le=50, description="Number of obituaries to return"),
+      db: Session = Depends(get_read_db)
+  ):
+      """
+      Public obituaries whose text is most similar to this one's, best first
       """
       obituary = obituary_service.get_obituary_by_id(db=db, obituary_id=obituary_id)
 
@@ -138,7 +434,36 @@ def get_obituary(
               detail="Obituary not found"
           )
 
-      return obituary
+      matches = similarity_index.similar(db, obituary.obituary_text, k, exclude=obituary.id)
+      rows = {o.id: o for o in obituary_service.get_obituaries_by_ids(db, [match_id for match_id, _ in matches])}
+      similar = [
+          SimilarObituaryResponse(**ObituaryResponse.model_validate(rows[match_id]).model_dump(), score=score)
+          for match_id, score in matches
+          if match_id in rows and rows[match_id].is_public
+      ]
+      return model_response(SimilarObituaryListResponse(obituaries=similar, total=len(similar)))
+
+
+@router.delete("/", response_model=ObituaryBulkDeleteResponse)
+def delete_obituaries(
+      payload: ObituaryBulkDelete,
+      current_user: User = Depends(get_current_user),
+      db: Session = Depends(get_db)
+  ):
+      """
+      Delete several of the current user's obituaries at once (up to 1000 ids)
+
+      Ids that do not exist or belong to someone else are skipped; the response
+      lists the ones actually deleted. Images and audio are removed from S3 in
+      the background.
+      """
+      deleted = obituary_service.delete_obituaries(
+          db=db,
+          obituary_ids=list(dict.fromkeys(payload.ids)),
+          user_id=current_user.id
+      )
+      annotate(requested=len(payload.ids), deleted=len(deleted))
+      return model_response(ObituaryBulkDeleteResponse(deleted=deleted, total=len(deleted)))
 
 
 @router.delete("/{obituary_id}", status_code=status.HTTP_204_NO_CONTENT)
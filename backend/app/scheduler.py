@@ -0,0 +1,140 @@
+"""
+Fair scheduling of upstream work between users
+
+Groq and the TTS Lambda are slow and rate limited, so each worker admits at
+most ``capacity`` calls to each at a time through a ``FairScheduler``.
+Waiting calls are queued per user and dequeued round-robin across users, so a
+user scripting hundreds of creates gets one turn per round like everyone else
+and never more than ``per_user_limit`` calls at once.
+
+Each call also names a lane. ``interactive`` (the default) is dequeued
+``LANE_WEIGHTS["interactive"]`` times for every ``bulk`` turn while both have
+waiters, so batch clients that send ``X-Request-Priority: bulk`` still make
+progress without delaying people at the dashboard.
+
+Queue depth, running calls and time spent waiting are exported per scheduler
+and lane. Scheduling is per worker process and must be used from its event
+loop.
+"""
+import asyncio
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable, Literal, Optional
+
+from app.config import settings
+from app.metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_RUNNING, SCHEDULER_WAIT
+from app.request_log import stage
+
+Lane = Literal["interactive", "bulk"]
+
+# Dequeue turns per round while both lanes have waiters
+LANE_WEIGHTS: dict[str, int] = {"interactive": 4, "bulk": 1}
+
+
+class FairScheduler:
+    """Per-user round-robin admission with weighted lanes and per-user caps"""
+
+    def __init__(self, name: str, capacity: int, per_user_limit: int):
+        self.name = name
+        self.capacity = capacity
+        self.per_user_limit = per_user_limit
+        self.running = 0
+        self._running_by_user: dict[Hashable, int] = defaultdict(int)
+        # lane -> user -> waiting futures; dict order is the round-robin order
+        self._queues: dict[str, OrderedDict[Hashable, deque[asyncio.Future]]] = {
+            lane: OrderedDict() for lane in LANE_WEIGHTS
+        }
+        self._turns = [lane for lane, weight in LANE_WEIGHTS.items() for _ in range(weight)]
+        self._turn = 0
+
+    def depth(self, lane: Optional[str] = None) -> int:
+        lanes = [lane] if lane else list(self._queues)
+        return sum(len(waiters) for lane in lanes for waiters in self._queues[lane].values())
+
+    @asynccontextmanager
+    async def slot(self, user: Hashable, lane: Lane = "interactive") -> AsyncIterator[None]:
+        """Wait for this user's turn, hold a slot for the block, then hand it on"""
+        with stage(f"{self.name}_queue"):
+            await self._acquire(user, lane)
+        try:
+            yield
+        finally:
+            self._release(user)
+
+    async def _acquire(self, user: Hashable, lane: str):
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].setdefault(user, deque()).append(future)
+        SCHEDULER_QUEUE_DEPTH.labels(self.name, lane).inc()
+        started = time.perf_counter()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up; pass the slot on
+                self._release(user)
+            else:
+                self._discard(user, lane, future)
+            raise
+        finally:
+            SCHEDULER_WAIT.labels(self.name, lane).observe(time.perf_counter() - started)
+
+    def _discard(self, user: Hashable, lane: str, future: asyncio.Future):
+        waiters = self._queues[lane].get(user)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            SCHEDULER_QUEUE_DEPTH.labels(self.name, lane).dec()
+            if not waiters:
+                del self._queues[lane][user]
+
+    def _release(self, user: Hashable):
+        self.running -= 1
+        SCHEDULER_RUNNING.labels(self.name).dec()
+        self._running_by_user[user] -= 1
+        if not self._running_by_user[user]:
+            del self._running_by_user[user]
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.capacity:
+            picked = self._next()
+            if picked is None:
+                return
+            user, lane, future = picked
+            SCHEDULER_QUEUE_DEPTH.labels(self.name, lane).dec()
+            self.running += 1
+            SCHEDULER_RUNNING.labels(self.name).inc()
+            self._running_by_user[user] += 1
+            future.set_result(None)
+
+    def _next(self) -> Optional[tuple[Hashable, str, asyncio.Future]]:
+        """Next waiter: lanes by weighted turn, users round-robin, capped users skipped"""
+        for offset in range(len(self._turns)):
+            lane = self._turns[(self._turn + offset) % len(self._turns)]
+            queue = self._queues[lane]
+            for user in list(queue):
+                if self._running_by_user.get(user, 0) >= self.per_user_limit:
+                    continue
+                waiters = queue.pop(user)
+                future = waiters.popleft()
+                while future.cancelled() and waiters:
+                    # Cancelled but its coroutine has not run _discard yet
+                    SCHEDULER_QUEUE_DEPTH.labels(self.name, lane).dec()
+                    future = waiters.popleft()
+                if waiters:
+                    queue[user] = waiters  # back of the round
+                if future.cancelled():
+                    SCHEDULER_QUEUE_DEPTH.labels(self.name, lane).dec()
+                    continue
+                self._turn = (self._turn + offset + 1) % len(self._turns)
+                return user, lane, future
+        return None
+
+
+generation_scheduler = FairScheduler(
+    "generation", settings.SCHEDULER_GENERATION_CONCURRENCY, settings.SCHEDULER_PER_USER_CONCURRENCY
+)
+tts_scheduler = FairScheduler(
+    "tts", settings.SCHEDULER_TTS_CONCURRENCY, settings.SCHEDULER_PER_USER_CONCURRENCY
+)
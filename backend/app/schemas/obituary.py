@@ -1,19 +1,26 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from datetime import date, datetime
+from uuid import UUID
 from typing import Optional
 
 class ObituaryCreate(BaseModel):
     name: str
-    birth_date: str  # "YYYY-MM-DD"
-    death_date: str  # "YYYY-MM-DD"
+    birth_date: date  # "YYYY-MM-DD"
+    death_date: date  # "YYYY-MM-DD"
     is_public: bool = False
     image: Optional[str] = None  # Base64 encoded image or will be file upload
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.death_date < self.birth_date:
+            raise ValueError("death_date must not be before birth_date")
+        return self
 class ObituaryResponse(BaseModel):
-    id: str
-    user_id: str
+    id: UUID
+    user_id: UUID
     name: str
-    birth_date: str
-    death_date: str
+    birth_date: date
+    death_date: date
     obituary_text: str
     image_url: Optional[str]
     audio_url: Optional[str]
@@ -24,4 +31,18 @@ class ObituaryResponse(BaseModel):
         from_attributes = True
 class ObituaryListResponse(BaseModel):
     obituaries: list[ObituaryResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+class SimilarObituaryResponse(ObituaryResponse):
+    score: float  # cosine similarity of the texts, 0-1
+
+class SimilarObituaryListResponse(BaseModel):
+    obituaries: list[SimilarObituaryResponse]
+    total: int
+
+class ObituaryBulkDelete(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=1000)
+
+class ObituaryBulkDeleteResponse(BaseModel):
+    deleted: list[UUID]
+    total: int
@@ -0,0 +1,126 @@
+"""
+Production server entry point
+
+    python -m app.serve                       # one worker per CPU
+    python -m app.serve --workers 4 --max-requests 5000
+
+Runs uvicorn's process supervisor with ``WEB_CONCURRENCY`` workers sharing one
+listening socket. On SIGTERM/SIGINT each worker stops accepting connections and
+drains in-flight requests (including long generation calls) for up to
+``GRACEFUL_TIMEOUT`` seconds before running the lifespan shutdown. With
+``MAX_REQUESTS`` set, a worker exits after serving that many requests (plus up
+to ``MAX_REQUESTS_JITTER``, so workers do not all recycle at once) and the
+supervisor starts a fresh one, bounding memory growth.
+
+With ``AUTO_CREATE_SCHEMA`` on and several workers, the schema is created once
+here before they start (workers booting together would race on ``CREATE
+TABLE``) and turned off for the workers.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+import uvicorn
+
+from app.config import settings
+
+
+class WorkerConfig(uvicorn.Config):
+    """uvicorn Config whose request limit gets per-process jitter"""
+
+    max_requests_jitter: int = 0
+
+    @property
+    def limit_max_requests(self):
+        base = self._limit_max_requests
+        if not base:
+            return None
+        # Resolved once in each worker process
+        if getattr(self, "_jitter_pid", None) != os.getpid():
+            self._jitter_pid = os.getpid()
+            self._jitter = random.randint(0, self.max_requests_jitter)
+        return base + self._jitter
+
+    @limit_max_requests.setter
+    def limit_max_requests(self, value):
+        self._limit_max_requests = value
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run The Last Show API with multiple workers")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or os.cpu_count() or 1)
+    parser.add_argument("--max-requests", type=int, default=settings.MAX_REQUESTS,
+                        help="Recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.GRACEFUL_TIMEOUT,
+                        help="Seconds to drain in-flight requests on shutdown")
+    return parser.parse_args(argv)
+
+
+def build_config(args: argparse.Namespace) -> WorkerConfig:
+    config = WorkerConfig(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        limit_max_requests=args.max_requests or None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        # Requests are logged as structured events by RequestLogMiddleware
+        access_log=False,
+        proxy_headers=True,
+    )
+    config.max_requests_jitter = args.max_requests_jitter
+    return config
+
+
+def create_schema_once():
+    """Create the schema in the supervisor and stop the workers doing it again"""
+    from app.database import engine
+    from app.main import create_schema
+
+    create_schema()
+    # Workers are spawned and build their own engine
+    engine.dispose()
+    os.environ["AUTO_CREATE_SCHEMA"] = "false"
+    settings.AUTO_CREATE_SCHEMA = False
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Workers write metrics to a shared directory so /metrics aggregates all of them
+    metrics_dir = None
+    if args.workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        metrics_dir = tempfile.mkdtemp(prefix="lastshow-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    # Without Postgres, workers exchange cache invalidations over sockets in a shared directory
+    pubsub_dir = None
+    if args.workers > 1 and not os.environ.get("PUBSUB_SOCKET_DIR"):
+        pubsub_dir = tempfile.mkdtemp(prefix="lastshow-pubsub-")
+        os.environ["PUBSUB_SOCKET_DIR"] = pubsub_dir
+
+    if args.workers > 1 and settings.AUTO_CREATE_SCHEMA:
+        create_schema_once()
+
+    try:
+        server = uvicorn.Server(build_config(args))
+        if args.workers > 1:
+            from uvicorn.supervisors import Multiprocess
+
+            sock = server.config.bind_socket()
+            Multiprocess(server.config, target=server.run, sockets=[sock]).run()
+        else:
+            server.run()
+    finally:
+        for directory in (metrics_dir, pubsub_dir):
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,148 @@
 
-from groq import Groq
+import asyncio
+import logging
+import time
+from typing import NamedTuple
 from app.config import settings
+from app.metrics import LLM_GENERATIONS, LLM_HEDGES, LLM_REQUEST_DURATION, LLM_TOKENS, UPSTREAMS_IN_PROGRESS
+from app.services.model_router import HedgeBudget, ModelRouter, Route, parse_routes
 
-client = Groq(api_key=settings.GROQ_API_KEY)
+logger = logging.getLogger(__name__)
 
-def generate_obituary_text(name: str, birth_date: str, death_date: str) -> str:
+# Recorded as the model when every model failed and the template was used
+FALLBACK_MODEL = "template"
+
+_client = None
+_router = None
+_hedge_budget = None
+
+
+class Generation(NamedTuple):
+    text: str
+    model: str  # Groq model that wrote the text, or FALLBACK_MODEL
+
+
+def get_client():
+    """Async Groq client, created on first use (the lifespan creates it at startup)"""
+    global _client
+    if _client is None:
+        from groq import AsyncGroq
+        _client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+    return _client
+
+
+async def close_client():
+    """Close the Groq client's connection pool"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_router() -> ModelRouter:
+    """Per-worker model router built from ``GROQ_MODELS``"""
+    global _router
+    if _router is None:
+        _router = ModelRouter(
+            parse_routes(settings.GROQ_MODELS),
+            window=settings.MODEL_ROUTER_WINDOW,
+            window_seconds=settings.MODEL_ROUTER_WINDOW_SECONDS,
+            max_error_rate=settings.MODEL_ROUTER_MAX_ERROR_RATE,
+        )
+    return _router
+
+
+def get_hedge_budget() -> HedgeBudget:
+    global _hedge_budget
+    if _hedge_budget is None:
+        _hedge_budget = HedgeBudget(settings.LLM_HEDGE_MAX_RATE, settings.MODEL_ROUTER_WINDOW_SECONDS)
+    return _hedge_budget
+
+
+async def _complete(model: str, prompt: str, timeout: float) -> str:
+    """One chat completion; raises on error or after ``timeout`` seconds"""
+    started = time.perf_counter()
+    UPSTREAMS_IN_PROGRESS.labels("groq").inc()
+    try:
+          # No SDK retries: a retry would blow the budget, the router falls back instead
+          chat_completion = await get_client().with_options(timeout=timeout, max_retries=0).chat.completions.create(
+              messages=[
+                  {
+                      "role": "system",
+                      "content": "You are a professional obituary writer. Write respectful, heartfelt, and dignified obituaries that honor the deceased with compassion and care."
+                  },
+                  {
+                      "role": "user",
+                      "content": prompt
+                  }
+              ],
+              model=model,
+              temperature=0.7,
+              max_tokens=600,
+          )
+          LLM_REQUEST_DURATION.labels(model, "success").observe(time.perf_counter() - started)
+          if chat_completion.usage:
+              LLM_TOKENS.labels(model, "prompt").inc(chat_completion.usage.prompt_tokens)
+              LLM_TOKENS.labels(model, "completion").inc(chat_completion.usage.completion_tokens)
+
+          return chat_completion.choices[0].message.content.strip()
+
+    except asyncio.CancelledError:
+          # The other call of a hedged pair finished first
+          LLM_REQUEST_DURATION.labels(model, "cancelled").observe(time.perf_counter() - started)
+          raise
+    except Exception:
+          LLM_REQUEST_DURATION.labels(model, "error").observe(time.perf_counter() - started)
+          raise
+    finally:
+          UPSTREAMS_IN_PROGRESS.labels("groq").dec()
+
+
+async def _hedged_complete(route: Route, prompt: str, timeout: float) -> str:
+    """
+    Call ``route.model``; if it has not answered by the LLM_HEDGE_PERCENTILE
+    of its recent latency, send the same request again and return whichever
+    succeeds first, cancelling the other. Hedges are capped at
+    LLM_HEDGE_MAX_RATE of calls.
+    """
+    budget = get_hedge_budget()
+    budget.record_call()
+    started = time.monotonic()
+    first = asyncio.create_task(_complete(route.model, prompt, timeout))
+    pending = {first}
+    try:
+          hedge_after = None
+          if settings.LLM_HEDGE_PERCENTILE > 0:
+              hedge_after = get_router().latency_percentile(route.model, settings.LLM_HEDGE_PERCENTILE)
+          if hedge_after is None or hedge_after >= timeout:
+              return await first
+
+          done, _ = await asyncio.wait(pending, timeout=hedge_after)
+          if done:
+              return first.result()
+          if not budget.try_acquire():
+              LLM_HEDGES.labels(route.model, "capped").inc()
+              return await first
+
+          LLM_HEDGES.labels(route.model, "fired").inc()
+          second = asyncio.create_task(_complete(route.model, prompt, timeout - (time.monotonic() - started)))
+          pending.add(second)
+          error = None
+          while pending:
+              done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+              for task in done:
+                  if task.exception() is None:
+                      if task is second:
+                          LLM_HEDGES.labels(route.model, "won").inc()
+                      return task.result()
+                  error = error or task.exception()
+          raise error
+    finally:
+          for task in pending:
+              task.cancel()
+
+
+async def generate_obituary_text(name: str, birth_date: str, death_date: str) -> Generation:
     """
     Generate obituary text using Groq (free!)
       Args:
@@ -13,7 +151,10 @@ def generate_obituary_text(name: str, birth_date: str, death_date: str) -> str:
           death_date: Death date in YYYY-MM-DD format
 
       Returns:
-          Generated obituary text
+          Generated obituary text and the model that wrote it. Models are
+          tried in the router's order, each limited to its latency budget and
+          all of them to LLM_DEADLINE_SECONDS; if none succeeds a template is
+          returned.
       """
     prompt = f"""Write a respectful and heartfelt obituary for a fictional character named {name}.
 
@@ -29,27 +170,30 @@ def generate_obituary_text(name: str, birth_date: str, death_date: str) -> str:
 
   Keep the tone dignified, compassionate, and touching. Make it feel genuine and respectful."""
 
-    try:
-          chat_completion = client.chat.completions.create(
-              messages=[
-                  {
-                      "role": "system",
-                      "content": "You are a professional obituary writer. Write respectful, heartfelt, and dignified obituaries that honor the deceased with compassion and care."
-                  },
-                  {
-                      "role": "user",
-                      "content": prompt
-                  }
-              ],
-              model="llama-3.3-70b-versatile",  # Best free model
-              temperature=0.7,
-              max_tokens=600,
-          )
+    import httpx
+    from groq import APIError
 
-          obituary_text = chat_completion.choices[0].message.content.strip()
-          return obituary_text
+    router = get_router()
+    deadline = time.monotonic() + settings.LLM_DEADLINE_SECONDS
+    for route in router.candidates():
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+              break
+          started = time.monotonic()
+          try:
+              obituary_text = await _hedged_complete(route, prompt, timeout=min(route.budget, remaining))
+          except (APIError, httpx.HTTPError) as e:
+              # Timeouts arrive as APITimeoutError, an APIError
+              router.record(route.model, time.monotonic() - started, ok=False)
+              logger.warning("Error generating obituary with Groq model %s: %s", route.model, e)
+              continue
+          router.record(route.model, time.monotonic() - started, ok=True)
+          LLM_GENERATIONS.labels(route.model).inc()
+          return Generation(obituary_text, route.model)
 
-    except Exception as e:
-          print(f"Error generating obituary with Groq: {e}")
-          # Fallback if Groq API fails
-          return f"{name} was born on {birth_date} and passed away on {death_date}. They will be deeply missed by family and friends. A memorial service will be held to celebrate their life and legacy."
\ No newline at end of file
+    # Fallback if every model failed or the deadline passed
+    LLM_GENERATIONS.labels(FALLBACK_MODEL).inc()
+    return Generation(
+        f"{name} was born on {birth_date} and passed away on {death_date}. They will be deeply missed by family and friends. A memorial service will be held to celebrate their life and legacy.",
+        FALLBACK_MODEL,
+    )
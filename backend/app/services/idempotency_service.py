@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+
+def request_fingerprint(payload: dict, body: Optional[bytes] = None) -> str:
+    """Stable hash of a request's fields (and optional file content)"""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode())
+    if body is not None:
+        digest.update(hashlib.sha256(body).digest())
+    return digest.hexdigest()
+
+
+def _age_seconds(record: IdempotencyKey) -> float:
+    created_at = record.created_at
+    if created_at is None:
+        return 0.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created_at).total_seconds()
+
+
+def _is_expired(record: IdempotencyKey) -> bool:
+    """Completed keys expire after the TTL; in-flight ones after the lock timeout (crashed owner)"""
+    if record.status_code is None:
+        return _age_seconds(record) > settings.IDEMPOTENCY_LOCK_SECONDS
+    return _age_seconds(record) > settings.IDEMPOTENCY_TTL_HOURS * 3600
+
+
+# monotonic time of this worker's last purge
+_last_purge = 0.0
+
+
+def purge_expired(db: Session) -> int:
+    """Delete every expired key (completed past the TTL, in flight past the lock timeout)"""
+    now = datetime.now(timezone.utc)
+    deleted = db.query(IdempotencyKey).filter(or_(
+        IdempotencyKey.created_at < now - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+        and_(
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        ),
+    )).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def _purge_if_due(db: Session):
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < settings.IDEMPOTENCY_PURGE_SECONDS:
+        return
+    _last_purge = now
+    purge_expired(db)
+
+
+def get_key(db: Session, user_id: UUID, key: str) -> Optional[IdempotencyKey]:
+    """Fetch the current state of a key, bypassing the session's identity map"""
+    return (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .execution_options(populate_existing=True)
+        .first()
+    )
+
+
+def claim_key(db: Session, user_id: UUID, key: str, request_hash: str) -> Optional[IdempotencyKey]:
+    """
+    Try to take ownership of an idempotency key
+
+    Returns:
+        None if this request now owns the key, otherwise the existing record
+    """
+    # Keys are otherwise only removed when reused, and each holds a full response
+    _purge_if_due(db)
+    for _ in range(2):
+        db.add(IdempotencyKey(user_id=user_id, key=key, request_hash=request_hash))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        existing = get_key(db, user_id, key)
+        if existing is None:
+            continue  # released between our insert and select
+        if not _is_expired(existing):
+            return existing
+        db.delete(existing)
+        db.commit()
+
+    return get_key(db, user_id, key)
+
+
+async def wait_for_key(db: Session, user_id: UUID, key: str, timeout: float) -> Optional[IdempotencyKey]:
+    """
+    Wait for the request owning ``key`` to finish
+
+    Returns:
+        The completed record, the still in-flight record if ``timeout`` passed,
+        or None if the owner failed and released the key
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = 0.05
+    while True:
+        record = get_key(db, user_id, key)
+        if record is None or record.status_code is not None:
+            return record
+        if loop.time() >= deadline:
+            return record
+        await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+        delay = min(delay * 2, 1.0)
+
+
+def complete_key(db: Session, user_id: UUID, key: str, status_code: int, response_body: bytes):
+    """Store the response for replay"""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).update({"status_code": status_code, "response_body": response_body.decode()})
+    db.commit()
+
+
+def release_key(db: Session, user_id: UUID, key: str):
+    """Drop an in-flight key after a failure so the client can retry"""
+    db.rollback()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status_code.is_(None)
+    ).delete()
+    db.commit()
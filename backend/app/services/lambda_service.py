@@ -1,13 +1,34 @@
 
-import httpx
 import base64
 import logging
+import time
 from typing import Optional
+from uuid import UUID
 from app.config import settings
+from app.metrics import UPSTREAM_REQUEST_DURATION, UPSTREAMS_IN_PROGRESS
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_http_client = None
+
+
+def get_http_client():
+      """Shared HTTP client for Lambda calls, so connections are reused across requests"""
+      global _http_client
+      if _http_client is None:
+          import httpx
+          _http_client = httpx.AsyncClient()
+      return _http_client
+
+
+async def close_http_client():
+      """Close the shared HTTP client"""
+      global _http_client
+      if _http_client is not None:
+          await _http_client.aclose()
+          _http_client = None
+
 
 async def upload_image_to_lambda(image_data: bytes, filename: str) -> Optional[str]:
       """
@@ -20,39 +41,50 @@ async def upload_image_to_lambda(image_data: bytes, filename: str) -> Optional[s
       Returns:
           S3 URL of uploaded image or None if failed
       """
+      import httpx
+
+      started = time.perf_counter()
+      outcome = "error"
+      UPSTREAMS_IN_PROGRESS.labels("image_lambda").inc()
       try:
-          logger.info(f"Uploading image: {filename} ({len(image_data)} bytes)")
+          logger.debug("Uploading image: %s (%d bytes)", filename, len(image_data))
 
           # Encode image as base64
           image_base64 = base64.b64encode(image_data).decode('utf-8')
 
-          async with httpx.AsyncClient(timeout=30.0) as client:
-              response = await client.post(
-                  settings.IMAGE_UPLOAD_LAMBDA_URL,
-                  json={
-                      "image": image_base64,
-                      "filename": filename
-                  }
-              )
-
-              if response.status_code == 200:
-                  result = response.json()
-                  image_url = result.get('image_url')
-                  logger.info(f"Image uploaded successfully: {image_url}")
-                  return image_url
-              else:
-                  logger.error(f"Image upload failed: {response.status_code} - {response.text}")
-                  return None
+          response = await get_http_client().post(
+              settings.IMAGE_UPLOAD_LAMBDA_URL,
+              json={
+                  "image": image_base64,
+                  "filename": filename
+              },
+              timeout=30.0
+          )
+
+          if response.status_code == 200:
+              outcome = "success"
+              result = response.json()
+              image_url = result.get('image_url')
+              logger.debug("Image uploaded successfully: %s", image_url)
+              return image_url
+          else:
+              outcome = "http_error"
+              logger.error("Image upload failed: %s - %s", response.status_code, response.text)
+              return None
 
       except httpx.TimeoutException:
-          logger.error(f"Image upload timed out for {filename}")
+          outcome = "timeout"
+          logger.error("Image upload timed out for %s", filename)
           return None
       except Exception as e:
-          logger.error(f"Error uploading image to Lambda: {e}", exc_info=True)
+          logger.error("Error uploading image to Lambda: %s", e, exc_info=True)
           return None
+      finally:
+          UPSTREAMS_IN_PROGRESS.labels("image_lambda").dec()
+          UPSTREAM_REQUEST_DURATION.labels("image_lambda", outcome).observe(time.perf_counter() - started)
 
 
-async def generate_tts_audio(text: str, obituary_id: str) -> Optional[str]:
+async def generate_tts_audio(text: str, obituary_id: UUID) -> Optional[str]:
       """
       Generate text-to-speech audio via Lambda function using Amazon Polly
 
@@ -63,31 +95,41 @@ async def generate_tts_audio(text: str, obituary_id: str) -> Optional[str]:
       Returns:
           S3 URL of generated audio file or None if failed
       """
+      import httpx
+
+      started = time.perf_counter()
+      outcome = "error"
+      UPSTREAMS_IN_PROGRESS.labels("tts_lambda").inc()
       try:
-          logger.info(f"Generating TTS audio for obituary: {obituary_id}")
-          logger.debug(f"Text length: {len(text)} characters")
-
-          async with httpx.AsyncClient(timeout=60.0) as client:
-              response = await client.post(
-                  settings.TTS_LAMBDA_URL,
-                  json={
-                      "text": text,
-                      "obituary_id": obituary_id
-                  }
-              )
-
-              if response.status_code == 200:
-                  result = response.json()
-                  audio_url = result.get('audio_url')
-                  logger.info(f"TTS audio generated successfully: {audio_url}")
-                  return audio_url
-              else:
-                  logger.error(f"TTS generation failed: {response.status_code} - {response.text}")
-                  return None
+          logger.debug("Generating TTS audio for obituary %s (%d characters)", obituary_id, len(text))
+
+          response = await get_http_client().post(
+              settings.TTS_LAMBDA_URL,
+              json={
+                  "text": text,
+                  "obituary_id": str(obituary_id)
+              },
+              timeout=60.0
+          )
+
+          if response.status_code == 200:
+              outcome = "success"
+              result = response.json()
+              audio_url = result.get('audio_url')
+              logger.debug("TTS audio generated successfully: %s", audio_url)
+              return audio_url
+          else:
+              outcome = "http_error"
+              logger.error("TTS generation failed: %s - %s", response.status_code, response.text)
+              return None
 
       except httpx.TimeoutException:
-          logger.error(f"TTS generation timed out for obituary: {obituary_id}")
+          outcome = "timeout"
+          logger.error("TTS generation timed out for obituary: %s", obituary_id)
           return None
       except Exception as e:
-          logger.error(f"Error generating TTS via Lambda: {e}", exc_info=True)
+          logger.error("Error generating TTS via Lambda: %s", e, exc_info=True)
           return None
+      finally:
+          UPSTREAMS_IN_PROGRESS.labels("tts_lambda").dec()
+          UPSTREAM_REQUEST_DURATION.labels("tts_lambda", outcome).observe(time.perf_counter() - started)
@@ -0,0 +1,136 @@
+"""
+S3 media (obituary images and narration audio)
+
+The Lambdas store objects at ``https://{bucket}.s3.amazonaws.com/{key}``.
+Deleting an obituary queues its objects here; a background thread removes
+them with batched ``DeleteObjects`` calls so request handlers never wait on
+S3. The queue is in memory: objects lost in a crash are picked up later by the
+orphan collector (``app.media_gc``).
+
+Only objects in the configured ``IMAGES_BUCKET``/``AUDIO_BUCKET`` are ever
+deleted; with neither set, media cleanup is disabled.
+"""
+import logging
+import queue
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.metrics import MEDIA_OBJECTS_DELETED
+
+logger = logging.getLogger(__name__)
+
+# S3 accepts at most this many keys per DeleteObjects request
+DELETE_BATCH_SIZE = 1000
+
+_STOP = object()
+_deletions: queue.SimpleQueue = queue.SimpleQueue()
+_worker: Optional[threading.Thread] = None
+
+
+def media_buckets() -> set[str]:
+    return {bucket for bucket in (settings.IMAGES_BUCKET, settings.AUDIO_BUCKET) if bucket}
+
+
+@lru_cache
+def get_s3_client():
+    """Shared boto3 S3 client (``S3_ENDPOINT_URL`` points it at a local stand-in)"""
+    import boto3
+
+    return boto3.client("s3", endpoint_url=settings.S3_ENDPOINT_URL or None)
+
+
+def object_from_url(url: Optional[str]) -> Optional[tuple[str, str]]:
+    """``(bucket, key)`` for a URL in one of our buckets, else None"""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    key = parts.path.lstrip("/")
+    if not key:
+        return None
+    # Bucket names may contain dots, so match each configured bucket as a prefix
+    for bucket in sorted(media_buckets(), key=len, reverse=True):
+        if not host.startswith(f"{bucket}."):
+            continue
+        domain = host[len(bucket) + 1:]
+        if domain == "s3.amazonaws.com" or (domain.startswith("s3.") and domain.endswith(".amazonaws.com")):
+            return bucket, key
+    return None
+
+
+def delete_objects(bucket: str, keys: list[str], source: str) -> list[str]:
+    """Delete ``keys`` from ``bucket`` in batches; return the keys S3 reported as deleted"""
+    client = get_s3_client()
+    deleted = []
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start:start + DELETE_BATCH_SIZE]
+        response = client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": False},
+        )
+        deleted.extend(item["Key"] for item in response.get("Deleted", []))
+        for error in response.get("Errors", []):
+            logger.warning("Could not delete s3://%s/%s: %s", bucket, error.get("Key"), error.get("Message"))
+    MEDIA_OBJECTS_DELETED.labels(source).inc(len(deleted))
+    return deleted
+
+
+def enqueue_deletion(urls: Iterable[Optional[str]]):
+    """Queue media URLs for background removal; URLs outside our buckets are ignored"""
+    for url in urls:
+        location = object_from_url(url)
+        if location is not None:
+            _deletions.put(location)
+
+
+def _drain(block: bool) -> bool:
+    """Delete everything currently queued, grouped per bucket; False once stopped"""
+    try:
+        first = _deletions.get(block=block)
+    except queue.Empty:
+        return True
+    items = [first]
+    while True:
+        try:
+            items.append(_deletions.get_nowait())
+        except queue.Empty:
+            break
+
+    stopped = any(item is _STOP for item in items)
+    by_bucket: dict[str, list[str]] = defaultdict(list)
+    for item in items:
+        if item is not _STOP:
+            by_bucket[item[0]].append(item[1])
+    for bucket, keys in by_bucket.items():
+        try:
+            delete_objects(bucket, keys, source="obituary_delete")
+        except Exception:
+            # Left for the orphan collector
+            logger.exception("Deleting %d objects from %s failed", len(keys), bucket)
+    return not stopped
+
+
+def _run():
+    while _drain(block=True):
+        pass
+
+
+def start():
+    """Start the background deletion thread (called from the lifespan)"""
+    global _worker
+    if _worker is None and media_buckets():
+        _worker = threading.Thread(target=_run, name="media-deletions", daemon=True)
+        _worker.start()
+
+
+def stop(timeout: float = 30.0):
+    """Finish queued deletions and stop the thread"""
+    global _worker
+    if _worker is not None:
+        _deletions.put(_STOP)
+        _worker.join(timeout)
+        _worker = None
@@ -0,0 +1,157 @@
+"""
+Latency-aware routing across Groq models
+
+``GROQ_MODELS`` lists models in order of preference, each with a latency
+budget in seconds (``llama-3.3-70b-versatile:8,llama-3.1-8b-instant:4``). The
+router keeps the recent calls of every model (at most ``window`` calls from
+the last ``window_seconds``) and treats a model as unhealthy while its p95
+latency is over budget or its error rate is over ``max_error_rate``.
+
+``candidates()`` returns the healthy models in configured order followed by
+the unhealthy ones, so a slow or failing primary is skipped in favour of a
+faster model but is still tried if everything else fails. Samples age out, so
+a model that recovers is routed to again once its bad window has passed.
+
+``HedgeBudget`` caps how many calls may be hedged (duplicated after the
+model's recent latency percentile, see ``ai_service``) within the same window.
+
+Stats are per worker process.
+"""
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+# Fewer samples than this say nothing about a model; it is treated as healthy
+MIN_SAMPLES = 5
+
+
+@dataclass(frozen=True)
+class Route:
+    model: str
+    budget: float  # seconds
+
+
+def parse_routes(spec: str) -> list[Route]:
+    """``"model:budget,model:budget"`` → routes, in order"""
+    routes = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, budget = item.rpartition(":")
+        if not model:
+            raise ValueError(f"GROQ_MODELS entry {item!r} must be model:budget_seconds")
+        routes.append(Route(model, float(budget)))
+    if not routes:
+        raise ValueError("GROQ_MODELS must list at least one model")
+    return routes
+
+
+class ModelStats:
+    """Recent (timestamp, latency, ok) samples for one model"""
+
+    def __init__(self, window: int, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._samples: deque[tuple[float, float, bool]] = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool, now: Optional[float] = None):
+        self._samples.append((time.monotonic() if now is None else now, latency, ok))
+
+    def _recent(self, now: float) -> list[tuple[float, float, bool]]:
+        while self._samples and self._samples[0][0] < now - self.window_seconds:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def snapshot(self, now: Optional[float] = None) -> tuple[int, Optional[float], float]:
+        """``(samples, p95 latency, error rate)`` over the window"""
+        samples = self._recent(time.monotonic() if now is None else now)
+        if not samples:
+            return 0, None, 0.0
+        latencies = sorted(latency for _, latency, _ in samples)
+        p95 = latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return len(samples), p95, errors / len(samples)
+
+    def percentile(self, q: float, now: Optional[float] = None) -> Optional[float]:
+        """Latency at quantile ``q`` of recent successful calls; None with too few"""
+        samples = self._recent(time.monotonic() if now is None else now)
+        latencies = sorted(latency for _, latency, ok in samples if ok)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(q * len(latencies)) - 1)]
+
+
+class ModelRouter:
+    """Orders models for each generation by recent latency and errors"""
+
+    def __init__(self, routes: list[Route], window: int = 50, window_seconds: float = 300.0,
+                 max_error_rate: float = 0.25):
+        self.routes = routes
+        self.max_error_rate = max_error_rate
+        self._stats = {route.model: ModelStats(window, window_seconds) for route in routes}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, latency: float, ok: bool):
+        with self._lock:
+            self._stats[model].record(latency, ok)
+
+    def healthy(self, route: Route, now: Optional[float] = None) -> bool:
+        with self._lock:
+            samples, p95, error_rate = self._stats[route.model].snapshot(now)
+        if samples < MIN_SAMPLES:
+            return True
+        return p95 <= route.budget and error_rate <= self.max_error_rate
+
+    def candidates(self, now: Optional[float] = None) -> list[Route]:
+        healthy, unhealthy = [], []
+        for route in self.routes:
+            (healthy if self.healthy(route, now) else unhealthy).append(route)
+        return healthy + unhealthy
+
+    def latency_percentile(self, model: str, q: float) -> Optional[float]:
+        with self._lock:
+            return self._stats[model].percentile(q)
+
+    def stats(self) -> dict[str, dict]:
+        """Current window per model, for logs and debugging"""
+        with self._lock:
+            snapshots = {model: stats.snapshot() for model, stats in self._stats.items()}
+        return {
+            model: {"samples": samples, "p95": p95, "error_rate": error_rate}
+            for model, (samples, p95, error_rate) in snapshots.items()
+        }
+
+
+class HedgeBudget:
+    """Allows at most ``max_rate`` of the calls in the last ``window_seconds`` to be hedged"""
+
+    def __init__(self, max_rate: float, window_seconds: float = 300.0):
+        self.max_rate = max_rate
+        self.window_seconds = window_seconds
+        self._calls: deque[float] = deque()
+        self._hedges: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        for times in (self._calls, self._hedges):
+            while times and times[0] < now - self.window_seconds:
+                times.popleft()
+
+    def record_call(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """Take a hedge if that keeps hedges within ``max_rate`` of calls"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._trim(now)
+            if len(self._hedges) + 1 > self.max_rate * max(len(self._calls), 1):
+                return False
+            self._hedges.append(now)
+            return True
@@ -1,22 +1,58 @@
-from sqlalchemy.orm import Session
-from app.models.obituary import Obituary
-from app.schemas.obituary import ObituaryCreate
-from typing import List, Optional
-import uuid
+from sqlalchemy import delete, or_, update
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.orm.attributes import set_committed_value
+from app import pubsub
+from app.cache import LRUCache
+from app.config import settings
+from app.models.obituary import Obituary, month_day
+from app.responses import dump_json
+from app.schemas.obituary import ObituaryCreate, ObituaryResponse
+from app.services import media_service
+from app.ids import parse_uuid, uuid7
+from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Union
+from uuid import UUID
+
+# Channel carrying {"event": ..., "id": ..., "user_id": ...} for every obituary change.
+# Events are "created", "updated", "deleted" and "media" (with "kind": "audio")
+# when generated media is attached.
+OBITUARY_EVENTS = "obituaries"
+
+# Serialized ObituaryResponse bodies, per worker
+obituary_cache = LRUCache(
+    "obituary",
+    maxsize=settings.OBITUARY_CACHE_SIZE,
+    ttl=settings.OBITUARY_CACHE_TTL_SECONDS
+)
+
+
+def _invalidate_cached_obituary(message: dict):
+    if message["event"] != "created":
+        obituary_cache.invalidate(UUID(message["id"]))
+
+
+pubsub.subscribe(OBITUARY_EVENTS, _invalidate_cached_obituary)
+
+
+def publish_obituary_event(event: str, obituary_id: UUID, user_id: UUID, **fields):
+    """Tell every worker that an obituary changed (after commit)"""
+    pubsub.publish(OBITUARY_EVENTS, {"event": event, "id": str(obituary_id), "user_id": str(user_id), **fields})
 
 
 def create_obituary(
     db: Session,
-    user_id: str,
+    user_id: UUID,
     obituary_data: ObituaryCreate,
     obituary_text: str,
     image_url: Optional[str] = None,
-    audio_url: Optional[str] = None
+    audio_url: Optional[str] = None,
+    text_model: Optional[str] = None
 ) -> Obituary:
     """Create a new obituary"""
     
     db_obituary = Obituary(
-        id=str(uuid.uuid4()),
+        id=uuid7(),
         user_id=user_id,
         name=obituary_data.name,
         birth_date=obituary_data.birth_date,
@@ -24,23 +60,63 @@ def create_obituary(
         obituary_text=obituary_text,
         image_url=image_url,
         audio_url=audio_url,
+        text_model=text_model,
         is_public=obituary_data.is_public
     )
 
     db.add(db_obituary)
     db.commit()
     db.refresh(db_obituary)
+    # Known already; saves reloading and decompressing it
+    set_committed_value(db_obituary, "obituary_text", obituary_text)
+    publish_obituary_event("created", db_obituary.id, db_obituary.user_id)
 
     return db_obituary
 
+
+def set_audio_url(db: Session, obituary: Obituary, audio_url: str) -> Obituary:
+    """Attach generated audio to an obituary"""
+    obituary.audio_url = audio_url
+    text = obituary.__dict__.get("obituary_text")  # loaded text survives the commit, no reload
+    db.commit()
+    db.refresh(obituary)
+    if text is not None:
+        set_committed_value(obituary, "obituary_text", text)
+    publish_obituary_event("media", obituary.id, obituary.user_id, kind="audio")
+    return obituary
+
+
+def store_audio_url(db: Session, obituary_id: UUID, audio_url: str) -> Optional[str]:
+    """
+    Attach lazily generated audio unless another request already did
+
+    Returns:
+        The audio URL now on the row (the first one stored wins), or None if
+        the obituary was deleted meanwhile
+    """
+    owner_id = db.execute(
+        update(Obituary)
+        .where(Obituary.id == obituary_id, Obituary.audio_url.is_(None))
+        .values(audio_url=audio_url)
+        .returning(Obituary.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.commit()
+    if owner_id is not None:
+        publish_obituary_event("media", obituary_id, owner_id, kind="audio")
+        return audio_url
+    return db.query(Obituary.audio_url).filter(Obituary.id == obituary_id).scalar()
+
 def get_obituaries(
     db: Session,
-    user_id: Optional[str] = None,
+    user_id: Optional[UUID] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    died_after: Optional[date] = None,
+    died_before: Optional[date] = None
 ) -> List[Obituary]:
-    """Get all obituaries (optionally filtered by user)"""
-    query = db.query(Obituary)
+    """Get all obituaries (optionally filtered by user and death date range, both bounds inclusive)"""
+    query = db.query(Obituary).options(undefer(Obituary.obituary_text))
 
     if user_id:
         query = query.filter(Obituary.user_id == user_id)
@@ -48,22 +124,123 @@ def get_obituaries(
         # Only show public obituaries if no user filter
         query = query.filter(Obituary.is_public == True)
 
-    return query.order_by(Obituary.created_at.desc()).offset(skip).limit(limit).all()
+    # Range scan on ix_obituaries_death_date
+    if died_after is not None:
+        query = query.filter(Obituary.death_date >= died_after)
+    if died_before is not None:
+        query = query.filter(Obituary.death_date <= died_before)
 
-def get_obituary_by_id(db: Session, obituary_id: str) -> Optional[Obituary]:
-    """Get a single obituary by ID"""
-    return db.query(Obituary).filter(Obituary.id == obituary_id).first()
+    # id breaks created_at ties so pages (and app.feed) agree on one order
+    return query.order_by(Obituary.created_at.desc(), Obituary.id.desc()).offset(skip).limit(limit).all()
 
-def delete_obituary(db: Session, obituary_id: str, user_id: str) -> bool:
-    """Delete an obituary (only if user owns it)"""
-    obituary = db.query(Obituary).filter(
-        Obituary.id == obituary_id,
-        Obituary.user_id == user_id
-    ).first()
+def get_anniversaries(db: Session, month: int, day: int, skip: int = 0, limit: int = 100) -> List[Obituary]:
+    """
+    Public obituaries of people born or who died on this month and day, in any year
 
-    if not obituary:
-        return False
+    Seeks ix_obituaries_birth_month_day and ix_obituaries_death_month_day.
+    """
+    key = month_day(date(2000, month, day))
+    return (
+        db.query(Obituary)
+        .options(undefer(Obituary.obituary_text))
+        .filter(or_(Obituary.death_month_day == key, Obituary.birth_month_day == key), Obituary.is_public == True)
+        .order_by(Obituary.created_at.desc(), Obituary.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
-    db.delete(obituary)
+def iter_public_texts(db: Session, batch_size: int = 5000) -> Iterator[tuple[UUID, str]]:
+    """(id, obituary_text) of every public obituary, streamed"""
+    rows = db.query(Obituary.id, Obituary.obituary_text).filter(Obituary.is_public == True).yield_per(batch_size)
+    for row in rows:
+        yield row.id, row.obituary_text
+
+def get_obituaries_by_ids(db: Session, obituary_ids: Iterable[UUID]) -> List[Obituary]:
+    """The obituaries with the given ids that exist, in no particular order"""
+    return db.query(Obituary).options(undefer(Obituary.obituary_text)).filter(Obituary.id.in_(list(obituary_ids))).all()
+
+def iter_user_obituaries(db: Session, user_id: UUID, batch_size: int = 500) -> Iterator[List[Obituary]]:
+    """
+    Stream a user's obituaries, oldest first, in batches of ``batch_size``
+
+    Uses ``yield_per`` (a server-side cursor on PostgreSQL), so only one batch
+    is held in memory however many rows the user has.
+    """
+    rows = iter(
+        db.query(Obituary)
+        .options(undefer(Obituary.obituary_text))
+        .filter(Obituary.user_id == user_id)
+        .order_by(Obituary.created_at, Obituary.id)
+        .yield_per(batch_size)
+    )
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+def get_obituary_by_id(db: Session, obituary_id: Union[UUID, str], with_text: bool = True) -> Optional[Obituary]:
+    """
+    Get a single obituary by ID (None for ids that are not UUIDs)
+
+    With ``with_text=False`` the text is only fetched if it is accessed.
+    """
+    obituary_id = parse_uuid(obituary_id)
+    if obituary_id is None:
+        return None
+    query = db.query(Obituary).filter(Obituary.id == obituary_id)
+    if with_text:
+        query = query.options(undefer(Obituary.obituary_text))
+    return query.first()
+
+
+def get_obituary_json(db: Session, obituary_id: Union[UUID, str]) -> Optional[bytes]:
+    """Serialized ObituaryResponse for an obituary, from this worker's cache when possible"""
+    obituary_id = parse_uuid(obituary_id)
+    if obituary_id is None:
+        return None
+    content = obituary_cache.get(obituary_id)
+    if content is not None:
+        return content
+
+    generation = obituary_cache.generation()
+    obituary = get_obituary_by_id(db, obituary_id)
+    if obituary is None:
+        return None
+    content = dump_json(ObituaryResponse.model_validate(obituary).model_dump())
+    # A replica may not have caught up with a change that just invalidated the
+    # entry; serve what it returned but leave the cache for a fresher read
+    if not (db.info.get("replica")
+            and obituary_cache.invalidated_within(obituary_id, settings.READ_YOUR_WRITES_SECONDS)):
+        obituary_cache.set(obituary_id, content, generation)
+    return content
+
+def delete_obituaries(db: Session, obituary_ids: List[UUID], user_id: UUID) -> List[UUID]:
+    """
+    Delete the given obituaries the user owns in one statement
+
+    Their images and audio are queued for background removal from S3.
+
+    Returns:
+        Ids that were deleted (others did not exist or belong to someone else)
+    """
+    if not obituary_ids:
+        return []
+    rows = db.execute(
+        delete(Obituary)
+        .where(Obituary.id.in_(obituary_ids), Obituary.user_id == user_id)
+        .returning(Obituary.id, Obituary.image_url, Obituary.audio_url)
+    ).all()
     db.commit()
-    return True
+
+    for row in rows:
+        publish_obituary_event("deleted", row.id, user_id)
+    media_service.enqueue_deletion(url for row in rows for url in (row.image_url, row.audio_url))
+    return [row.id for row in rows]
+
+
+def delete_obituary(db: Session, obituary_id: Union[UUID, str], user_id: UUID) -> bool:
+    """Delete an obituary (only if user owns it)"""
+    obituary_id = parse_uuid(obituary_id)
+    if obituary_id is None:
+        return False
+    return bool(delete_obituaries(db, [obituary_id], user_id))
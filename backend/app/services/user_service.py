@@ -2,14 +2,18 @@ from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.services.auth_service import get_password_hash
-import uuid
+from app.ids import parse_uuid, uuid7
+from uuid import UUID
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     """Get user by email"""
     return db.query(User).filter(User.email == email).first()
 
-def get_user_by_id(db: Session, user_id: str) -> User | None:
+def get_user_by_id(db: Session, user_id: UUID | str) -> User | None:
     """Get user by ID"""
+    user_id = parse_uuid(user_id)
+    if user_id is None:
+        return None
     return db.query(User).filter(User.id == user_id).first()
 
 def create_user(db: Session, user: UserCreate) -> User:
@@ -17,7 +21,7 @@ def create_user(db: Session, user: UserCreate) -> User:
     hashed_password = get_password_hash(user.password)
 
     db_user = User(
-        id=str(uuid.uuid4()),
+        id=uuid7(),
         email=user.email,
         hashed_password=hashed_password,
         full_name=user.full_name
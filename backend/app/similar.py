@@ -0,0 +1,384 @@
+"""
+Similar obituaries
+
+``SimilarityIndex`` holds a TF-IDF matrix of every public obituary's text,
+per worker, for ``GET /obituaries/{id}/similar``. The matrix is stored
+transposed (terms x documents, CSR), so a query is one sparse row-vector
+product that only touches the postings of the query's terms, followed by
+``argpartition`` over the documents that share at least one term.
+
+Document vectors keep their ``SIMILAR_DOC_TERMS`` heaviest terms and are
+L2-normalized, so scores are cosine similarities in [0, 1]. The vocabulary
+and IDF weights are fixed when the matrix is built:
+
+- Obituaries created or edited afterwards go into a small delta matrix,
+  re-read from the database on the next query, as ``app.feed`` does.
+  Terms that are new since the build are ignored until the next one.
+- Deletions clear the document's slot in place.
+- A background thread rebuilds everything from the primary every
+  ``SIMILAR_REBUILD_SECONDS``. The delta is also folded into the main
+  matrix once it holds ``SIMILAR_MAX_DELTA`` documents.
+
+Queries that arrive while the first build is running return no results
+rather than starting a second build.
+"""
+import logging
+import re
+from array import array
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app import pubsub
+from app.config import settings
+from app.database import SessionLocal
+from app.services import obituary_service
+
+if TYPE_CHECKING:
+    # numpy and scipy are imported where they are used, so they cost nothing at boot
+    import numpy as np
+    from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z]+")
+STOP_WORDS = frozenset(
+    "a about after all also an and any are as at be been being but by can could did do does during each "
+    "for from had has have he her hers him his how i if in into is it its just me more most my no not of "
+    "on one or other our out over own she so some such than that the their them then there these they "
+    "this those through to too under until up very was we were what when where which while who whom why "
+    "will with would you your".split()
+)
+
+# Heaviest query terms used for scoring; the rest barely move the ranking
+QUERY_TERMS = 64
+
+# Documents weighed at a time while building
+BUILD_CHUNK = 50_000
+
+
+def term_counts(text: str) -> Counter:
+    return Counter(
+        token for token in TOKEN.findall(text.lower()) if len(token) > 2 and token not in STOP_WORDS
+    )
+
+
+def _weights(counts: Counter, vocabulary: dict[str, int], idf: "np.ndarray", keep: int) -> tuple["np.ndarray", "np.ndarray"]:
+    """Column indices and L2-normalized sublinear TF-IDF weights of the ``keep`` heaviest known terms"""
+    import numpy as np
+
+    columns = np.fromiter((vocabulary[term] for term in counts if term in vocabulary), dtype=np.int32)
+    if not len(columns):
+        return columns, np.zeros(0, dtype=np.float32)
+    tf = np.fromiter((counts[term] for term in counts if term in vocabulary), dtype=np.float32)
+    weights = (1 + np.log(tf)) * idf[columns]
+    if len(columns) > keep:
+        heaviest = np.argpartition(weights, -keep)[-keep:]
+        columns, weights = columns[heaviest], weights[heaviest]
+    order = np.argsort(columns)
+    columns, weights = columns[order], weights[order]
+    return columns, weights / np.linalg.norm(weights)
+
+
+def _csr(rows: list[tuple["np.ndarray", "np.ndarray"]], width: int) -> "sparse.csr_matrix":
+    import numpy as np
+    from scipy import sparse
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(columns) for columns, _ in rows])
+    indices = np.concatenate([columns for columns, _ in rows]) if rows else np.zeros(0, dtype=np.int32)
+    data = np.concatenate([weights for _, weights in rows]) if rows else np.zeros(0, dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), width))
+
+
+class SimilarityIndex:
+    """TF-IDF vectors of public obituaries, queried by cosine similarity"""
+
+    def __init__(self, doc_terms: int, max_delta: int):
+        self.doc_terms = doc_terms
+        self.max_delta = max_delta
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._loaded = False
+        self._vocabulary: dict[str, int] = {}
+        # Set by the first build
+        self._idf: Optional["np.ndarray"] = None
+        # Main matrix, transposed: terms x documents
+        self._postings: Optional["sparse.csr_matrix"] = None
+        self._ids: list[UUID] = []
+        self._alive: Optional["np.ndarray"] = None
+        self._slots: dict[UUID, int] = {}
+        # Documents added since the build: id -> (columns, weights)
+        self._delta: dict[UUID, tuple["np.ndarray", "np.ndarray"]] = {}
+        self._delta_matrix: Optional["sparse.csr_matrix"] = None
+        self._delta_ids: list[UUID] = []
+        self._stale: set[UUID] = set()
+        # Deleted since the last build began, so a build that raced the delete drops them
+        self._deleted: set[UUID] = set()
+        # Bumped by ``clear`` so a build that was already running is discarded
+        self._generation = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            alive = int(self._alive.sum()) if self._alive is not None else 0
+            return alive + len(self._delta)
+
+    def clear(self):
+        with self._lock:
+            self._loaded = False
+            self._vocabulary, self._idf, self._postings = {}, None, None
+            self._ids, self._alive, self._slots = [], None, {}
+            self._delta, self._delta_matrix, self._delta_ids = {}, None, []
+            self._stale.clear()
+            self._deleted.clear()
+            self._generation += 1
+
+    def handle_event(self, message: dict):
+        """pub/sub handler (any thread)"""
+        obituary_id = UUID(message["id"])
+        with self._lock:
+            if message["event"] == "deleted":
+                self._deleted.add(obituary_id)
+                self._stale.discard(obituary_id)
+                self._remove(obituary_id)
+            elif message["event"] != "media":  # audio does not change the text
+                self._stale.add(obituary_id)
+
+    def build(self, documents: Iterable[tuple[UUID, str]]):
+        """Replace the index with ``documents`` (id, text); builds run one at a time"""
+        with self._build_lock:
+            self._build(documents)
+
+    def _build(self, documents: Iterable[tuple[UUID, str]]):
+        """Under the build lock"""
+        import numpy as np
+        from scipy import sparse
+
+        with self._lock:
+            deleted_before = set(self._deleted)
+            stale_before = set(self._stale)
+            generation = self._generation
+
+        # One pass: term ids and counts of every document, flat
+        vocabulary: dict[str, int] = {}
+        ids, lengths = [], array("i")
+        columns, counts = array("i"), array("f")
+        for obituary_id, text in documents:
+            terms = term_counts(text)
+            ids.append(obituary_id)
+            lengths.append(len(terms))
+            columns.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+            counts.extend(terms.values())
+
+        columns = np.array(columns, dtype=np.int32)
+        counts = np.array(counts, dtype=np.float32)
+        lengths = np.array(lengths, dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        idf = (np.log((1 + len(ids)) / (1 + np.bincount(columns, minlength=len(vocabulary)))) + 1).astype(np.float32)
+
+        # Weigh, prune and normalize a chunk of documents at a time to bound the temporaries
+        kept_rows, kept_columns, kept_weights = [], [], []
+        for first in range(0, len(ids), BUILD_CHUNK):
+            last = min(first + BUILD_CHUNK, len(ids))
+            span = slice(offsets[first], offsets[last])
+            chunk_lengths = lengths[first:last]
+            rows = np.repeat(np.arange(first, last), chunk_lengths)
+            weights = (1 + np.log(counts[span])) * idf[columns[span]]
+            # Rank each term within its document by weight; keep the heaviest
+            order = np.lexsort((-weights, rows))
+            rank = np.arange(len(order)) - np.repeat(offsets[first:last] - offsets[first], chunk_lengths)
+            kept = order[rank < self.doc_terms]
+            rows, weights = rows[kept], weights[kept]
+            norms = np.sqrt(np.bincount(rows - first, weights=weights * weights, minlength=last - first))
+            kept_rows.append(rows.astype(np.int32))
+            kept_columns.append(columns[span][kept])
+            kept_weights.append((weights / norms[rows - first]).astype(np.float32))
+        postings = sparse.csr_matrix(
+            (
+                np.concatenate(kept_weights) if kept_weights else np.zeros(0, np.float32),
+                (
+                    np.concatenate(kept_columns) if kept_columns else np.zeros(0, np.int32),
+                    np.concatenate(kept_rows) if kept_rows else np.zeros(0, np.int32),
+                ),
+            ),
+            shape=(len(vocabulary), len(ids)),
+            dtype=np.float32,
+        )
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._vocabulary, self._idf, self._postings = vocabulary, idf, postings
+            self._ids = ids
+            self._slots = {obituary_id: slot for slot, obituary_id in enumerate(ids)}
+            self._alive = np.ones(len(ids), dtype=bool)
+            # Added while building, with the old vocabulary: re-read on the next query
+            self._stale |= set(self._delta) - self._slots.keys()
+            self._delta, self._delta_matrix, self._delta_ids = {}, None, []
+            for obituary_id in self._deleted:
+                self._remove(obituary_id)
+            self._deleted -= deleted_before
+            # Changes published before the build read the rows are in it
+            self._stale -= stale_before
+            self._loaded = True
+
+    def load(self, db: Session):
+        self.build(obituary_service.iter_public_texts(db))
+
+    def add(self, obituary_id: UUID, text: str):
+        """Index (or re-index) one document in the delta matrix"""
+        with self._lock:
+            self._remove(obituary_id)
+            if obituary_id in self._deleted:
+                return
+            if not self._loaded:
+                # No vocabulary yet: read it again once a build has finished
+                self._stale.add(obituary_id)
+                return
+            self._delta[obituary_id] = _weights(term_counts(text), self._vocabulary, self._idf, self.doc_terms)
+            self._delta_matrix = None
+            if len(self._delta) >= self.max_delta:
+                self._merge_delta()
+
+    def similar(self, db: Session, text: str, k: int, exclude: Optional[UUID] = None) -> list[tuple[UUID, float]]:
+        """Up to ``k`` (id, cosine similarity) of the documents most similar to ``text``, best first"""
+        import numpy as np
+        from scipy import sparse
+
+        if not self._loaded and not self._load_unless_building(db):
+            # The first build is still running on another thread; reading every
+            # text again here would only double its cost
+            return []
+        if self._stale:
+            self._refresh_stale(db)
+
+        with self._lock:
+            columns, weights = _weights(term_counts(text), self._vocabulary, self._idf, QUERY_TERMS)
+            if not len(columns):
+                return []
+            query = sparse.csr_matrix(
+                (weights, columns, [0, len(columns)]), shape=(1, len(self._vocabulary))
+            )
+            # One sparse product over the postings of the query's terms
+            scores = query @ self._postings
+            candidates, values = scores.indices, scores.data
+            keep = self._alive[candidates]
+            candidates, values = candidates[keep], values[keep]
+            ids, delta_ids = self._ids, []
+            excluded = self._slots.get(exclude, -1)
+
+            if self._delta:
+                if self._delta_matrix is None:
+                    self._delta_ids = list(self._delta)
+                    self._delta_matrix = _csr(list(self._delta.values()), len(self._vocabulary))
+                if exclude in self._delta:
+                    excluded = len(ids) + self._delta_ids.index(exclude)
+                delta_scores = (self._delta_matrix @ query.T).toarray().ravel()
+                candidates = np.concatenate([candidates, len(ids) + np.arange(len(delta_scores))])
+                values = np.concatenate([values, delta_scores])
+                delta_ids = self._delta_ids
+
+        positive = (values > 0) & (candidates != excluded)
+        candidates, values = candidates[positive], values[positive]
+        if len(values) > k:
+            top = np.argpartition(values, -k)[-k:]
+            candidates, values = candidates[top], values[top]
+        results = []
+        for i in np.argsort(-values, kind="stable"):
+            slot = int(candidates[i])
+            obituary_id = ids[slot] if slot < len(ids) else delta_ids[slot - len(ids)]
+            results.append((obituary_id, round(float(values[i]), 6)))
+        return results
+
+    def _load_unless_building(self, db: Session) -> bool:
+        """Build from ``db`` if no other thread is building; False if one is"""
+        if not self._build_lock.acquire(blocking=False):
+            return False
+        try:
+            if not self._loaded:
+                self._build(obituary_service.iter_public_texts(db))
+        finally:
+            self._build_lock.release()
+        return True
+
+    def _refresh_stale(self, db: Session):
+        with self._lock:
+            stale, self._stale = self._stale, set()
+        rows = {o.id: o for o in obituary_service.get_obituaries_by_ids(db, stale)}
+        for obituary_id, obituary in rows.items():
+            if obituary.is_public:
+                self.add(obituary_id, obituary.obituary_text)
+            else:
+                with self._lock:
+                    self._remove(obituary_id)
+        with self._lock:
+            # Not visible to this session yet (a lagging replica): retry on the
+            # next query; deletions were already applied from their events
+            self._stale |= (stale - rows.keys()) - self._deleted
+
+    def _remove(self, obituary_id: UUID):
+        """Under the lock"""
+        slot = self._slots.get(obituary_id)
+        if slot is not None:
+            self._alive[slot] = False
+        if self._delta.pop(obituary_id, None) is not None:
+            self._delta_matrix = None
+
+    def _merge_delta(self):
+        """Under the lock: append the delta documents to the main matrix"""
+        import numpy as np
+        from scipy import sparse
+
+        delta_ids = list(self._delta)
+        rows = _csr(list(self._delta.values()), len(self._vocabulary))
+        self._postings = sparse.hstack([self._postings, rows.T], format="csr")
+        self._slots.update({obituary_id: len(self._ids) + i for i, obituary_id in enumerate(delta_ids)})
+        self._ids = self._ids + delta_ids
+        self._alive = np.concatenate([self._alive, np.ones(len(delta_ids), dtype=bool)])
+        self._delta, self._delta_matrix, self._delta_ids = {}, None, []
+
+
+similarity_index = SimilarityIndex(settings.SIMILAR_DOC_TERMS, settings.SIMILAR_MAX_DELTA)
+pubsub.subscribe(obituary_service.OBITUARY_EVENTS, similarity_index.handle_event)
+
+_stopping = threading.Event()
+_builder: Optional[threading.Thread] = None
+
+
+def _build_from_primary():
+    db = SessionLocal()
+    try:
+        similarity_index.load(db)
+    finally:
+        db.close()
+
+
+def _run():
+    # The first build happens here rather than in the lifespan: it reads every public obituary
+    while True:
+        try:
+            _build_from_primary()
+        except Exception:
+            logger.exception("Building the similarity index failed")
+        if _stopping.wait(settings.SIMILAR_REBUILD_SECONDS):
+            return
+
+
+def start():
+    """Build the index and rebuild it periodically on a background thread (called from the lifespan)"""
+    global _builder
+    if _builder is None:
+        _stopping.clear()
+        _builder = threading.Thread(target=_run, name="similarity-index", daemon=True)
+        _builder.start()
+
+
+def stop():
+    global _builder
+    if _builder is not None:
+        _stopping.set()
+        _builder.join(timeout=5)
+        _builder = None
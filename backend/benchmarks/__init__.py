@@ -0,0 +1,5 @@
+"""
+Benchmark suite for The Last Show API
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_api``.
+"""
@@ -0,0 +1,304 @@
+"""
+End-to-end API benchmark
+
+Starts the stubbed upstreams and the API as separate processes, then drives
+register, login, /auth/me, the list endpoints, GET /obituaries/{id} and
+POST /obituaries/ at several concurrency levels. p50/p95/p99 latency and
+throughput are written to JSON and optionally compared against a baseline:
+
+    python -m benchmarks.bench_api --output bench.json
+    python -m benchmarks.bench_api --baseline baseline.json --threshold 0.15
+    python -m benchmarks.bench_api --baseline baseline.json --update-baseline
+
+The process exits with status 1 when any scenario regresses past the threshold.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from benchmarks.report import compare_to_baseline, load_results, summarize, write_results
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_PASSWORD = "benchpassword123"
+TINY_JPEG = bytes.fromhex("ffd8ffe000104a46494600010100000100010000ffd9")
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 30.0):
+    """Poll a URL until it answers, or raise if the process never comes up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def start_process(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+# --- Scenarios ----------------------------------------------------------------
+# Each scenario is (expected status, coroutine issuing one request).
+
+async def register(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    return await client.post(
+        "/auth/register",
+        json={
+            # Unique per call: the warm-up and measured passes both count i from 0
+            "email": f"bench-{ctx['run_id']}-{uuid.uuid4().hex}@example.com",
+            "password": BENCH_PASSWORD,
+            "full_name": "Bench User",
+        },
+    )
+
+
+async def login(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    return await client.post(
+        "/auth/login",
+        json={"email": ctx["email"], "password": BENCH_PASSWORD},
+    )
+
+
+async def me(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    return await client.get("/auth/me", headers=ctx["headers"])
+
+
+async def list_public(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    return await client.get("/obituaries/")
+
+
+async def list_mine(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    return await client.get("/obituaries/my-obituaries", headers=ctx["headers"])
+
+
+async def get_obituary(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    obituary_ids = ctx["obituary_ids"]
+    return await client.get(f"/obituaries/{obituary_ids[i % len(obituary_ids)]}")
+
+
+async def create_obituary(client: httpx.AsyncClient, ctx: dict, i: int) -> httpx.Response:
+    return await client.post(
+        "/obituaries/",
+        headers=ctx["headers"],
+        data={
+            "name": f"Bench Person {i}",
+            "birth_date": "1950-01-15",
+            "death_date": "2024-11-30",
+            "is_public": "true",
+        },
+        files={"image": ("bench.jpg", TINY_JPEG, "image/jpeg")},
+    )
+
+
+SCENARIOS = {
+    "register": (201, register),
+    "login": (200, login),
+    "me": (200, me),
+    "list_public": (200, list_public),
+    "list_mine": (200, list_mine),
+    "get_obituary": (200, get_obituary),
+    "create_obituary": (201, create_obituary),
+}
+
+
+async def run_level(client: httpx.AsyncClient, ctx: dict, scenario: str, concurrency: int, requests: int) -> dict:
+    """Issue ``requests`` calls of one scenario from ``concurrency`` workers"""
+    expected_status, call = SCENARIOS[scenario]
+    latencies: list[float] = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            started = time.perf_counter()
+            try:
+                response = await call(client, ctx, i)
+                ok = response.status_code == expected_status
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def seed(client: httpx.AsyncClient, ctx: dict, count: int):
+    """Create the user and obituaries that read scenarios operate on"""
+    ctx["email"] = f"bench-{ctx['run_id']}@example.com"
+    response = await client.post(
+        "/auth/register",
+        json={"email": ctx["email"], "password": BENCH_PASSWORD, "full_name": "Bench User"},
+    )
+    response.raise_for_status()
+    response = await client.post("/auth/login", json={"email": ctx["email"], "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    ctx["headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    semaphore = asyncio.Semaphore(8)
+
+    async def create_one(i: int) -> str:
+        async with semaphore:
+            response = await create_obituary(client, ctx, i)
+            response.raise_for_status()
+            return response.json()["id"]
+
+    ctx["obituary_ids"] = await asyncio.gather(*(create_one(i) for i in range(count)))
+
+
+async def run_benchmark(base_url: str, args: argparse.Namespace) -> dict:
+    ctx = {"run_id": uuid.uuid4().hex[:8], "level": 0}
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    results: dict = {}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        await seed(client, ctx, args.seed_obituaries)
+
+        for scenario in args.scenarios:
+            results[scenario] = {}
+            requests = args.create_requests if scenario == "create_obituary" else args.requests
+            for concurrency in args.concurrency:
+                ctx["level"] = concurrency
+                # Warm connections and any lazily initialised state first
+                await run_level(client, ctx, scenario, concurrency, min(concurrency, requests))
+                summary = await run_level(client, ctx, scenario, concurrency, requests)
+                results[scenario][str(concurrency)] = summary
+                print(
+                    f"{scenario:>16} c={concurrency:<3} "
+                    f"p50={summary['p50_ms']:8.1f}ms p95={summary['p95_ms']:8.1f}ms "
+                    f"p99={summary['p99_ms']:8.1f}ms {summary['throughput_rps']:8.1f} rps "
+                    f"errors={summary['errors']}"
+                )
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark The Last Show API with stubbed upstreams")
+    parser.add_argument("--base-url", help="Benchmark an already running API instead of starting one")
+    parser.add_argument("--database-url", help="Database for the spawned API (default: temporary SQLite file)")
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda v: [int(c) for c in v.split(",")])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), type=lambda v: v.split(","))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--create-requests", type=int, default=40, help="Requests per level for POST /obituaries/")
+    parser.add_argument("--seed-obituaries", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stubbed Groq latency in seconds")
+    parser.add_argument("--image-latency", type=float, default=0.1, help="Stubbed image Lambda latency in seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Stubbed TTS Lambda latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative stub latency jitter")
+    parser.add_argument("--output", type=Path, default=Path("bench-results.json"))
+    parser.add_argument("--baseline", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to --baseline")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    processes: list[subprocess.Popen] = []
+    tmpdir = tempfile.TemporaryDirectory(prefix="lastshow-bench-")
+
+    try:
+        base_url = args.base_url
+        if base_url is None:
+            stub_port, api_port = free_port(), free_port()
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            processes.append(start_process(
+                [
+                    "-m", "benchmarks.stubs", "--port", str(stub_port),
+                    "--llm-latency", str(args.llm_latency),
+                    "--image-latency", str(args.image_latency),
+                    "--tts-latency", str(args.tts_latency),
+                    "--jitter", str(args.jitter),
+                ],
+                dict(os.environ),
+            ))
+            wait_until_ready(f"{stub_url}/docs")
+
+            env = dict(os.environ)
+            env.update({
+                "DATABASE_URL": args.database_url or f"sqlite:///{tmpdir.name}/bench.db",
+                "SECRET_KEY": env.get("SECRET_KEY", "benchmark-secret-key"),
+                "GROQ_API_KEY": "stub",
+                "GROQ_BASE_URL": stub_url,
+                "IMAGE_UPLOAD_LAMBDA_URL": f"{stub_url}/image",
+                "TTS_LAMBDA_URL": f"{stub_url}/tts",
+            })
+            processes.append(start_process(
+                ["-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(api_port),
+                 "--log-level", "warning"],
+                env,
+            ))
+            base_url = f"http://127.0.0.1:{api_port}"
+            wait_until_ready(f"{base_url}/health")
+
+        results = asyncio.run(run_benchmark(base_url, args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        tmpdir.cleanup()
+
+    config = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "create_requests": args.create_requests,
+        "llm_latency": args.llm_latency,
+        "image_latency": args.image_latency,
+        "tts_latency": args.tts_latency,
+        "jitter": args.jitter,
+    }
+    write_results(args.output, results, config)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    if args.update_baseline or not args.baseline.exists():
+        write_results(args.baseline, results, config)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare_to_baseline(results, load_results(args.baseline), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
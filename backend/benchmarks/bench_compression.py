@@ -0,0 +1,82 @@
+"""
+Response compression benchmark
+
+Builds list-endpoint bodies (``ObituaryListResponse`` rendered by
+``model_response``, as ``GET /obituaries/`` and ``/my-obituaries`` send them)
+with varied English obituary text, then reports the bytes on the wire and the
+CPU time per request for each encoding and level. Brotli rows are skipped
+unless the optional ``brotli`` package is installed.
+
+    python -m benchmarks.bench_compression --rows 10,100 --iterations 200
+"""
+import argparse
+import gzip
+import random
+import time
+
+from benchmarks.bench_serialization import make_rows, model_response_path
+
+WORDS = (
+    "beloved mother father grandmother grandfather friend teacher nurse farmer engineer "
+    "passed away peacefully surrounded by family after long full life born raised "
+    "town valley river church school community volunteer garden music piano fishing "
+    "kindness laughter generosity patience wisdom stories recipes holidays summers "
+    "survived children grandchildren siblings cousins neighbours colleagues "
+    "service celebration memorial chapel afternoon donations charity hospital "
+    "remembered cherished missed dearly always quietly proudly warmly"
+).split()
+
+
+def obituary_text(rng: random.Random, sentences: int = 24) -> str:
+    """~3-4 paragraphs of plausible, not-repetitive text"""
+    out = []
+    for _ in range(sentences):
+        words = rng.choices(WORDS, k=rng.randint(8, 18))
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+def encoders() -> dict:
+    from app.compression import brotli
+
+    options = {f"gzip-{level}": (lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0))
+               for level in (1, 4, 6, 9)}
+    if brotli is not None:
+        for quality in (1, 2, 4, 11):
+            options[f"br-{quality}"] = lambda body, quality=quality: brotli.compress(body, quality=quality)
+    return options
+
+
+def measure(encode, body: bytes, iterations: int) -> dict:
+    encoded = encode(body)
+    started = time.process_time()
+    for _ in range(iterations):
+        encode(body)
+    cpu = (time.process_time() - started) / iterations
+    return {"bytes": len(encoded), "ratio": len(body) / len(encoded), "cpu_ms": cpu * 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes and CPU per list response by encoding")
+    parser.add_argument("--rows", default="10,100", help="Comma-separated list sizes")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    for count in (int(r) for r in args.rows.split(",")):
+        rows = make_rows(count)
+        for row in rows:
+            row.obituary_text = obituary_text(rng)
+        body = model_response_path(rows)
+        print(f"{count} obituaries: {len(body) / 1024:.1f} KiB uncompressed")
+        for name, encode in encoders().items():
+            result = measure(encode, body, args.iterations)
+            print(
+                f"  {name:<8} {result['bytes'] / 1024:8.1f} KiB  x{result['ratio']:5.1f}  "
+                f"{result['cpu_ms']:7.3f} ms CPU"
+            )
+
+
+if __name__ == "__main__":
+    main()
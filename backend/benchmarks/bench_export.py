@@ -0,0 +1,97 @@
+"""
+Export memory benchmark
+
+Seeds a temporary SQLite database with one user owning N obituaries, then runs
+the ``/my-obituaries/export`` pipeline (``iter_user_obituaries`` +
+``_export_chunks``) and reports peak Python memory (tracemalloc), time to the
+first chunk and total time. Peak memory should stay flat as N grows.
+
+    python -m benchmarks.bench_export --rows 1000,10000,100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.stubs import STUB_TEXT
+
+
+def seed(session, rows: int):
+    from app.ids import uuid7
+    from app.models.obituary import Obituary
+    from app.models.user import User
+
+    user = User(id=uuid7(), email="export@example.com", hashed_password="x", full_name="Export")
+    session.add(user)
+    session.commit()
+    created_at = datetime(2024, 12, 1, tzinfo=timezone.utc)
+    for offset in range(0, rows, 5000):
+        session.execute(insert(Obituary), [
+            {
+                "id": uuid7(),
+                "user_id": user.id,
+                "name": f"Person {i}",
+                "birth_date": date(1950, 1, 15),
+                "death_date": date(2024, 11, 30),
+                "obituary_text": STUB_TEXT,
+                "is_public": True,
+                "created_at": created_at + timedelta(seconds=i),
+            }
+            for i in range(offset, min(rows, offset + 5000))
+        ])
+    session.commit()
+    return user.id
+
+
+def measure(session, user_id, format: str) -> dict:
+    from app.routes.obituaries import EXPORT_BATCH_SIZE, _export_chunks
+    from app.services.obituary_service import iter_user_obituaries
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_chunk = None
+    total_bytes = 0
+    for chunk in _export_chunks(iter_user_obituaries(session, user_id, EXPORT_BATCH_SIZE), format):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"first_chunk_ms": first_chunk * 1000, "total_s": elapsed, "peak_mib": peak / 2**20, "bytes": total_bytes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak memory of the streaming export")
+    parser.add_argument("--rows", default="1000,10000,100000", help="Comma-separated row counts")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args(argv)
+
+    from app.database import Base
+    from app.models import obituary, user  # noqa: F401  (register tables on Base.metadata)
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'export.db')}")
+            Base.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+            try:
+                user_id = seed(session, rows)
+                session.expunge_all()
+                result = measure(session, user_id, args.format)
+            finally:
+                session.close()
+                engine.dispose()
+        print(
+            f"{rows:>8} rows: first chunk {result['first_chunk_ms']:7.1f} ms  total {result['total_s']:6.2f} s  "
+            f"peak {result['peak_mib']:6.1f} MiB  {result['bytes'] / 2**20:7.1f} MiB out"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+List-endpoint serialization benchmark
+
+Compares the cost of turning N ORM rows into the ``ObituaryListResponse`` body:
+
+- ``fastapi_default``: the route returns a dict of ORM rows, FastAPI validates it
+  against ``response_model``, serializes the validated model back to plain data
+  and renders that with the stdlib ``json`` module (the behaviour before
+  ``model_response``; the extra threadpool hop FastAPI makes for the validation
+  step of sync routes is not included)
+- ``model_response``: rows are validated once into response models and
+  rendered with orjson
+
+    python -m benchmarks.bench_serialization --rows 100 --iterations 500
+"""
+import argparse
+import statistics
+import time
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+
+from benchmarks.stubs import STUB_TEXT
+
+
+def make_rows(count: int) -> list:
+    """Transient ORM rows shaped like real obituaries"""
+    from app.models.obituary import Obituary
+
+    return [
+        Obituary(
+            id=UUID(f"00000000-0000-7000-8000-{i:012d}"),
+            user_id=UUID("00000000-0000-7000-8000-000000000000"),
+            name=f"Person {i}",
+            birth_date=date(1950, 1, 15),
+            death_date=date(2024, 11, 30),
+            obituary_text=STUB_TEXT,
+            image_url=f"https://images.s3.amazonaws.com/images/{i}.jpg",
+            audio_url=f"https://audio.s3.amazonaws.com/audio/{i}.mp3",
+            is_public=True,
+            created_at=datetime(2024, 12, 1, tzinfo=timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+
+def fastapi_default(rows: list, _fields: dict = {}) -> bytes:
+    """Mirror of ``fastapi.routing.serialize_response`` for a response_model route"""
+    from app.schemas.obituary import ObituaryListResponse
+
+    # FastAPI builds the response field once per route, not per request
+    if "list" not in _fields:
+        _fields["list"] = create_model_field(name="response", type_=ObituaryListResponse, mode="serialization")
+    field = _fields["list"]
+    value, errors = field.validate({"obituaries": rows, "total": len(rows)}, {}, loc=("response",))
+    assert not errors
+    return JSONResponse(field.serialize(value, by_alias=True)).body
+
+
+def model_response_path(rows: list) -> bytes:
+    from app.responses import model_response
+    from app.schemas.obituary import ObituaryListResponse, ObituaryResponse
+
+    return model_response(ObituaryListResponse(
+        obituaries=[ObituaryResponse.model_validate(o) for o in rows],
+        total=len(rows),
+    )).body
+
+
+def measure(fn, rows: list, iterations: int) -> dict:
+    fn(rows)  # warm up
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(statistics.fmean(timings) * 1000, 4),
+        "p50_ms": round(statistics.median(timings) * 1000, 4),
+        "bytes": len(fn(rows)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare list-endpoint serialization paths")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+    before = measure(fastapi_default, rows, args.iterations)
+    after = measure(model_response_path, rows, args.iterations)
+
+    print(f"{args.rows} rows, {args.iterations} iterations")
+    for label, result in (("fastapi_default", before), ("model_response", after)):
+        print(f"  {label:>16}: mean {result['mean_ms']:8.3f} ms  p50 {result['p50_ms']:8.3f} ms  {result['bytes']} bytes")
+    print(f"  speedup: {before['mean_ms'] / after['mean_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
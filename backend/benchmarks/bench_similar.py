@@ -0,0 +1,133 @@
+"""
+Similar obituaries benchmark
+
+Builds a ``SimilarityIndex`` over synthetic obituaries and reports build time,
+matrix memory, query latency (p50/p95 over random documents used as queries)
+and the cost of incremental adds and of folding the delta into the main
+matrix. Texts mix the shared obituary vocabulary with words drawn from a
+Zipf-distributed synthetic vocabulary, so term frequencies look like real
+prose rather than a few dozen words repeated everywhere.
+
+    python -m benchmarks.bench_similar --docs 100000,1000000
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+
+import numpy as np
+
+from app.ids import uuid7
+from app.similar import SimilarityIndex
+from benchmarks.bench_compression import WORDS
+
+
+def synthetic_texts(count: int, words: int, vocabulary: int, seed: int):
+    """``count`` texts of ``words`` words each: one in three from WORDS, the rest Zipf over ``vocabulary``"""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    lexicon = ["".join(rng.choice(letters, size=rng.integers(4, 10))) for _ in range(vocabulary)]
+    ranks = np.arange(1, vocabulary + 1)
+    probabilities = 1 / ranks
+    probabilities /= probabilities.sum()
+    lexicon = np.array(lexicon + WORDS)
+    common = np.arange(vocabulary, len(lexicon))
+    for start in range(0, count, 10_000):
+        chunk = min(10_000, count - start)
+        # Drawn for the whole chunk at once; one choice() per text would dominate the run
+        rare = rng.choice(vocabulary, size=(chunk, words - words // 3), p=probabilities)
+        shared = rng.choice(common, size=(chunk, words // 3))
+        for row in lexicon[np.hstack([shared, rare])]:
+            yield " ".join(row)
+
+
+def matrix_bytes(index: SimilarityIndex) -> int:
+    postings = index._postings
+    return postings.data.nbytes + postings.indices.nbytes + postings.indptr.nbytes
+
+
+def run(count: int, words: int, vocabulary: int, queries: int, k: int, doc_terms: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    # Keep only the texts used as queries; a million texts would not fit next to the build
+    picked = {rng.randrange(count) for _ in range(queries)}
+    queried = []
+    generating = 0.0
+
+    def documents():
+        nonlocal generating
+        texts = synthetic_texts(count, words, vocabulary, seed)
+        for i in range(count):
+            started = time.perf_counter()
+            text = next(texts)
+            generating += time.perf_counter() - started
+            obituary_id = uuid7()
+            if i in picked:
+                queried.append((obituary_id, text))
+            yield obituary_id, text
+
+    index = SimilarityIndex(doc_terms, max_delta=count + 1)
+    started = time.perf_counter()
+    index.build(documents())
+    build = time.perf_counter() - started - generating
+
+    latencies = []
+    for obituary_id, text in queried:
+        started = time.perf_counter()
+        index.similar(None, text, k, exclude=obituary_id)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    added = list(synthetic_texts(1000, words, vocabulary, seed + 1))
+    started = time.perf_counter()
+    for text in added:
+        index.add(uuid7(), text)
+    add = (time.perf_counter() - started) / len(added)
+    started = time.perf_counter()
+    index.similar(None, queried[0][1], k)
+    with_delta = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with index._lock:
+        index._merge_delta()
+    merge = time.perf_counter() - started
+
+    return {
+        "build_s": build,
+        "matrix_mib": matrix_bytes(index) / 2**20,
+        "vocabulary": len(index._vocabulary),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "add_ms": add * 1000,
+        "query_with_delta_ms": with_delta * 1000,
+        "merge_s": merge,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query cost of the similar obituaries index")
+    parser.add_argument("--docs", default="100000,1000000", help="Comma-separated document counts")
+    parser.add_argument("--words", type=int, default=150, help="Words per synthetic obituary")
+    parser.add_argument("--vocabulary", type=int, default=50_000, help="Size of the synthetic Zipf vocabulary")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--doc-terms", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for count in (int(d) for d in args.docs.split(",")):
+        result = run(count, args.words, args.vocabulary, args.queries, args.k, args.doc_terms, args.seed)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f"{count} docs: build {result['build_s']:.1f} s, matrix {result['matrix_mib']:.0f} MiB "
+            f"({result['vocabulary']} terms), peak RSS {peak:.0f} MiB"
+        )
+        print(
+            f"  query p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms  "
+            f"add {result['add_ms']:.2f} ms  query with 1000 in delta {result['query_with_delta_ms']:.1f} ms  "
+            f"merge {result['merge_s']:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Import-time report for application boot
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter and
+summarizes the result: total time, the slowest top-level packages and whether
+any module that should be imported lazily was pulled in at boot.
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --runs 5 --budget-ms 1500 --output importtime.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Imported on first use or in the lifespan, never by ``import app.main``
+LAZY_MODULES = ("groq", "passlib", "jose", "httpx", "boto3", "numpy", "scipy")
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+PLACEHOLDER_ENV = {
+    "DATABASE_URL": "sqlite://",
+    "SECRET_KEY": "importtime",
+    "GROQ_API_KEY": "importtime",
+    "IMAGE_UPLOAD_LAMBDA_URL": "http://localhost/image",
+    "TTS_LAMBDA_URL": "http://localhost/tts",
+}
+
+
+def measure(module: str) -> list[tuple[str, int, int, int]]:
+    """Import ``module`` in a subprocess; return (name, self_us, cumulative_us, depth) rows"""
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def summarize(rows: list[tuple[str, int, int, int]], module: str, top: int) -> dict:
+    total_us = next(cumulative for name, _, cumulative, _ in rows if name == module)
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    imported = {name for name, _, _, _ in rows}
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        },
+        "eager_lazy_modules": sorted(m for m in LAZY_MODULES if m in imported),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize -X importtime for application boot")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3, help="Report the median of several runs")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="Fail when the median total exceeds this")
+    parser.add_argument("--output", type=Path, help="Write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summaries = [summarize(measure(args.module), args.module, args.top) for _ in range(args.runs)]
+    summary = sorted(summaries, key=lambda s: s["total_ms"])[len(summaries) // 2]
+    summary["runs_total_ms"] = [s["total_ms"] for s in summaries]
+    summary["median_total_ms"] = statistics.median(summary["runs_total_ms"])
+
+    print(f"import {args.module}: {summary['median_total_ms']:.1f} ms (median of {args.runs})")
+    print("Slowest packages (self time):")
+    for package, ms in summary["packages_ms"].items():
+        print(f"  {package:<24} {ms:8.1f} ms")
+
+    failed = False
+    if summary["eager_lazy_modules"]:
+        print(f"Imported eagerly but expected lazily: {', '.join(summary['eager_lazy_modules'])}")
+        failed = True
+    if args.budget_ms is not None and summary["median_total_ms"] > args.budget_ms:
+        print(f"Boot import time {summary['median_total_ms']:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        failed = True
+
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Benchmark result summaries, JSON baselines and regression checks
+"""
+import json
+import math
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """Summarize request latencies (seconds) into milliseconds and throughput"""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "throughput_rps": round(len(values) / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+def write_results(path: Path, results: dict, config: Optional[dict] = None):
+    """Write results with enough metadata to judge whether runs are comparable"""
+    document = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config or {},
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: Path) -> dict:
+    """Load the ``results`` section of a file written by ``write_results``"""
+    return json.loads(path.read_text())["results"]
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare results against a baseline
+
+    Both are nested ``{scenario: {concurrency: summary}}`` dicts. Latency
+    percentiles may grow and throughput may shrink by at most ``threshold``
+    (a fraction, e.g. 0.15 for 15%) before a regression is reported.
+
+    Returns:
+        Human readable regression descriptions, empty when within threshold
+    """
+    regressions = []
+    for scenario, levels in results.items():
+        for level, current in levels.items():
+            previous = baseline.get(scenario, {}).get(level)
+            if previous is None:
+                continue
+
+            if current["errors"] > previous["errors"]:
+                regressions.append(
+                    f"{scenario} @ c={level}: errors {previous['errors']} -> {current['errors']}"
+                )
+
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                limit = previous[key] * (1 + threshold)
+                if previous[key] > 0 and current[key] > limit:
+                    regressions.append(
+                        f"{scenario} @ c={level}: {key} {previous[key]:.1f} -> {current[key]:.1f} "
+                        f"(limit {limit:.1f})"
+                    )
+
+            floor = previous["throughput_rps"] * (1 - threshold)
+            if current["throughput_rps"] < floor:
+                regressions.append(
+                    f"{scenario} @ c={level}: throughput {previous['throughput_rps']:.1f} -> "
+                    f"{current['throughput_rps']:.1f} rps (floor {floor:.1f})"
+                )
+    return regressions
@@ -0,0 +1,114 @@
+"""
+Stub upstreams for benchmarking
+
+Serves a Groq-compatible chat completion endpoint and the image upload and
+TTS Lambda endpoints with configurable latency, so benchmark runs never touch
+the real providers and stay reproducible.
+
+    python -m benchmarks.stubs --port 9100 --llm-latency 0.8 --tts-latency 0.5
+
+``--model-latency MODEL=SECONDS`` slows one model down, e.g. to watch the
+model router fall back to the next one in ``GROQ_MODELS``.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Optional
+
+from fastapi import FastAPI, Request
+
+STUB_TEXT = (
+    "It is with great sadness that we announce the passing of a beloved friend. "
+    "They touched the lives of everyone they met and will be deeply missed. "
+) * 8
+
+
+def create_stub_app(
+    llm_latency: float = 0.0,
+    image_latency: float = 0.0,
+    tts_latency: float = 0.0,
+    jitter: float = 0.0,
+    seed: int = 0,
+    model_latency: Optional[dict[str, float]] = None,
+) -> FastAPI:
+    """Create the stub upstream app with the given latencies (seconds)"""
+    app = FastAPI()
+    rng = random.Random(seed)
+
+    async def delay(base: float):
+        if base <= 0:
+            return
+        await asyncio.sleep(max(0.0, base + rng.uniform(-jitter, jitter) * base))
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await delay((model_latency or {}).get(body.get("model"), llm_latency))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": STUB_TEXT},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 120,
+                "completion_tokens": 300,
+                "total_tokens": 420,
+            },
+        }
+
+    @app.post("/image")
+    async def upload_image(request: Request):
+        body = await request.json()
+        await delay(image_latency)
+        ext = body.get("filename", "image.jpg").split(".")[-1]
+        return {"image_url": f"https://stub-images.s3.amazonaws.com/images/{uuid.uuid4()}.{ext}"}
+
+    @app.post("/tts")
+    async def text_to_speech(request: Request):
+        body = await request.json()
+        await delay(tts_latency)
+        return {"audio_url": f"https://stub-audio.s3.amazonaws.com/audio/{body['obituary_id']}.mp3"}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run stubbed Groq and Lambda upstreams")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--image-latency", type=float, default=0.0)
+    parser.add_argument("--tts-latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative jitter, e.g. 0.2 for +/-20%%")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="Latency for one model instead of --llm-latency (repeatable)")
+    args = parser.parse_args()
+    model_latency = {
+        model: float(seconds) for model, _, seconds in (item.rpartition("=") for item in args.model_latency)
+    }
+
+    app = create_stub_app(
+        llm_latency=args.llm_latency,
+        image_latency=args.image_latency,
+        tts_latency=args.tts_latency,
+        jitter=args.jitter,
+        seed=args.seed,
+        model_latency=model_latency,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Native UUID keys for users and obituaries
+
+``users.id``, ``obituaries.id``, ``obituaries.user_id`` and
+``idempotency_keys.user_id`` become ``uuid`` columns on PostgreSQL (16 bytes
+instead of 36 characters, in the primary key and foreign key indexes).
+Existing uuid4 values are kept; new rows get time-ordered UUIDv7 keys from
+``app.ids``.
+
+SQLite has no UUID type: SQLAlchemy stores ``Uuid`` as 32 hex characters, so
+existing hyphenated values are rewritten in place.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs holding user or obituary ids
+ID_COLUMNS = [
+    ("users", "id"),
+    ("obituaries", "id"),
+    ("obituaries", "user_id"),
+    ("idempotency_keys", "user_id"),
+]
+
+FOREIGN_KEYS = [
+    # (name, source table, local column, ondelete)
+    ("obituaries_user_id_fkey", "obituaries", "user_id", None),
+    ("idempotency_keys_user_id_fkey", "idempotency_keys", "user_id", "CASCADE"),
+]
+
+
+def _convert(to_uuid: bool):
+    bind = op.get_bind()
+    old_type, new_type = (sa.String(), sa.Uuid()) if to_uuid else (sa.Uuid(), sa.String())
+
+    if bind.dialect.name == "postgresql":
+        for name, table, _, _ in FOREIGN_KEYS:
+            op.drop_constraint(name, table, type_="foreignkey")
+        for table, column in ID_COLUMNS:
+            cast = "uuid" if to_uuid else "text"
+            op.alter_column(
+                table, column, type_=new_type, existing_type=old_type,
+                postgresql_using=f"{column}::{cast}"
+            )
+        for name, table, column, ondelete in FOREIGN_KEYS:
+            op.create_foreign_key(name, table, "users", [column], ["id"], ondelete=ondelete)
+        return
+
+    for table, column in ID_COLUMNS:
+        if to_uuid:
+            op.execute(f"UPDATE {table} SET {column} = lower(replace({column}, '-', ''))")
+        else:
+            op.execute(
+                f"UPDATE {table} SET {column} = substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' || "
+                f"substr({column}, 13, 4) || '-' || substr({column}, 17, 4) || '-' || substr({column}, 21)"
+            )
+    for table in dict.fromkeys(table for table, _ in ID_COLUMNS):
+        with op.batch_alter_table(table) as batch_op:
+            for column in (c for t, c in ID_COLUMNS if t == table):
+                batch_op.alter_column(column, type_=new_type, existing_type=old_type)
+
+
+def upgrade():
+    _convert(to_uuid=True)
+
+
+def downgrade():
+    _convert(to_uuid=False)
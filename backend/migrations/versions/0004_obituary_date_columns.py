@@ -0,0 +1,53 @@
+"""Date columns for obituary birth and death dates
+
+``birth_date`` and ``death_date`` were ``String`` columns holding "YYYY-MM-DD".
+They become ``date`` columns, and ``death_date`` gets an index so the list
+endpoints' ``died_after``/``died_before`` filters run as index range scans.
+On PostgreSQL a row that is not a valid date makes the upgrade fail; fix it
+and re-run. SQLite stores ``Date`` as the same ISO strings, but batch mode
+would copy the data with ``CAST(... AS DATE)`` (numeric affinity, turning
+"1990-01-01" into 1990), so there the values are copied into new columns
+instead.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("birth_date", "death_date")
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for column in COLUMNS:
+            op.add_column("obituaries", sa.Column(f"{column}_new", sa.Date()))
+            op.execute(f"UPDATE obituaries SET {column}_new = {column}")
+        with op.batch_alter_table("obituaries") as batch_op:
+            for column in COLUMNS:
+                batch_op.drop_column(column)
+                batch_op.alter_column(f"{column}_new", new_column_name=column, nullable=False)
+    else:
+        for column in COLUMNS:
+            op.alter_column(
+                "obituaries", column, type_=sa.Date(), existing_type=sa.String(), existing_nullable=False,
+                postgresql_using=f"{column}::date"
+            )
+    op.create_index("ix_obituaries_death_date", "obituaries", ["death_date"])
+
+
+def downgrade():
+    op.drop_index("ix_obituaries_death_date", table_name="obituaries")
+    with op.batch_alter_table("obituaries") as batch_op:
+        for column in COLUMNS:
+            batch_op.alter_column(
+                column, type_=sa.String(), existing_type=sa.Date(), existing_nullable=False,
+                postgresql_using=f"to_char({column}, 'YYYY-MM-DD')"
+            )
@@ -0,0 +1,25 @@
+"""Index a user's obituaries by creation time
+
+``/obituaries/my-obituaries`` and its streaming export filter on ``user_id``
+and order by ``created_at``; without an index every call sorted all of the
+user's rows before the first one could be returned.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_obituaries_user_id_created_at", "obituaries", ["user_id", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_obituaries_user_id_created_at", table_name="obituaries")
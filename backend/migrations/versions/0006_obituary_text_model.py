@@ -0,0 +1,27 @@
+"""Record which model wrote each obituary
+
+Generation now falls back across several Groq models (and finally a
+template), so the model that served each obituary is stored alongside it.
+Existing rows are left NULL.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("obituaries", sa.Column("text_model", sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("obituaries") as batch_op:
+        batch_op.drop_column("text_model")
@@ -0,0 +1,80 @@
+"""Store obituary text with a codec header
+
+``obituary_text`` becomes a binary column holding the codec-prefixed bytes
+written by ``app.compressed_text``. Existing rows are rewritten uncompressed
+(the ``none`` header) in batches; compression is opt-in through
+``OBITUARY_TEXT_CODEC`` and applies to new writes, since every value carries
+its own header. The downgrade decodes zlib and uncompressed values;
+rows written with zstd have to be rewritten by the application first.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+RAW = b"\x00"
+ZLIB = b"\x01"
+
+
+def _copy(old_type, new_type, convert):
+    """Fill ``obituary_text_new`` from ``obituary_text`` batch by batch, keyed on the primary key"""
+    obituaries = sa.table(
+        "obituaries",
+        sa.column("id"),
+        sa.column("obituary_text", old_type),
+        sa.column("obituary_text_new", new_type),
+    )
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(obituaries.c.id, obituaries.c.obituary_text).order_by(obituaries.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(obituaries.c.id > last_id)
+        rows = bind.execute(query).all()
+        if not rows:
+            return
+        bind.execute(
+            obituaries.update().where(obituaries.c.id == sa.bindparam("row_id")).values(obituary_text_new=sa.bindparam("value")),
+            [{"row_id": row_id, "value": convert(value)} for row_id, value in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def _encode(text: str) -> bytes:
+    return RAW + text.encode()
+
+
+def _decompress(stored: bytes) -> str:
+    stored = bytes(stored)
+    if stored[:1] == ZLIB:
+        return zlib.decompress(stored[1:]).decode()
+    if stored[:1] == RAW:
+        return stored[1:].decode()
+    raise ValueError("obituary_text written with zstd; rewrite it with OBITUARY_TEXT_CODEC=zlib first")
+
+
+def upgrade():
+    op.add_column("obituaries", sa.Column("obituary_text_new", sa.LargeBinary()))
+    _copy(sa.Text(), sa.LargeBinary(), _encode)
+    with op.batch_alter_table("obituaries") as batch_op:
+        batch_op.drop_column("obituary_text")
+        batch_op.alter_column("obituary_text_new", new_column_name="obituary_text", nullable=False)
+
+
+def downgrade():
+    op.add_column("obituaries", sa.Column("obituary_text_new", sa.Text()))
+    _copy(sa.LargeBinary(), sa.Text(), _decompress)
+    with op.batch_alter_table("obituaries") as batch_op:
+        batch_op.drop_column("obituary_text")
+        batch_op.alter_column("obituary_text_new", new_column_name="obituary_text", nullable=False)
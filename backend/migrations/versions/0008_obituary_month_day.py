@@ -0,0 +1,51 @@
+"""Indexed month-day columns for anniversaries
+
+``GET /obituaries/anniversaries`` matches obituaries on the month and day of
+``birth_date`` or ``death_date`` in any year, which no index on the dates
+themselves can serve. ``birth_month_day`` and ``death_month_day`` hold
+``month * 100 + day`` (set by the model on insert) and are indexed, so the
+lookup is two index seeks. Existing rows are filled in one ``UPDATE``.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("birth", "death")
+
+
+def _month_day(column: str) -> str:
+    if op.get_bind().dialect.name == "sqlite":
+        # Dates are stored as YYYY-MM-DD text
+        return f"CAST(strftime('%m%d', {column}) AS INTEGER)"
+    return f"CAST(EXTRACT(MONTH FROM {column}) * 100 + EXTRACT(DAY FROM {column}) AS SMALLINT)"
+
+
+def upgrade():
+    for prefix in COLUMNS:
+        op.add_column("obituaries", sa.Column(f"{prefix}_month_day", sa.SmallInteger(), nullable=True))
+    op.execute(
+        "UPDATE obituaries SET "
+        + ", ".join(f"{prefix}_month_day = {_month_day(f'{prefix}_date')}" for prefix in COLUMNS)
+    )
+    with op.batch_alter_table("obituaries") as batch_op:
+        for prefix in COLUMNS:
+            batch_op.alter_column(f"{prefix}_month_day", existing_type=sa.SmallInteger(), nullable=False)
+    for prefix in COLUMNS:
+        op.create_index(f"ix_obituaries_{prefix}_month_day", "obituaries", [f"{prefix}_month_day"])
+
+
+def downgrade():
+    for prefix in COLUMNS:
+        op.drop_index(f"ix_obituaries_{prefix}_month_day", table_name="obituaries")
+    with op.batch_alter_table("obituaries") as batch_op:
+        for prefix in COLUMNS:
+            batch_op.drop_column(f"{prefix}_month_day")
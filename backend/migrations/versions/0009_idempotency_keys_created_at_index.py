@@ -0,0 +1,25 @@
+"""Index idempotency keys by creation time
+
+Expired keys are bulk-deleted by ``created_at`` (see
+``idempotency_service.purge_expired``); without an index every purge scanned
+the whole table, which holds a full response body per key.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys")
@@ -1,16 +1,24 @@
 """
 Pytest configuration and fixtures
 """
+import logging
 import pytest
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from app.database import Base, get_db
+from app.ids import uuid7
+from app.feed import public_feed
 from app.main import app
+from app import similar
+from app.similar import similarity_index
 from app.models.user import User
+from app.query_stats import count_queries, instrument_engine
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary, obituary_cache
 from app.services.auth_service import get_password_hash, create_access_token
 from datetime import timedelta
-import uuid
 
 # Use in-memory SQLite for testing
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -19,6 +27,7 @@ engine = create_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False}
 )
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -44,7 +53,14 @@ def client(db):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    obituary_cache.clear()
     with TestClient(app) as test_client:
+        # Warmed from the configured database at start-up; reload from this one
+        public_feed.clear()
+        # Built from the configured database on a background thread; stop it
+        # so it cannot hold the build lock while tests query the index
+        similar.stop()
+        similarity_index.clear()
         yield test_client
     app.dependency_overrides.clear()
 
@@ -53,7 +69,7 @@ def client(db):
 def test_user(db):
     """Create a test user"""
     user = User(
-        id=str(uuid.uuid4()),
+        id=uuid7(),
         email="test@example.com",
         hashed_password=get_password_hash("testpassword123"),
         full_name="Test User"
@@ -64,6 +80,20 @@ def test_user(db):
     return user
 
 
+@pytest.fixture
+def make_obituary(db, test_user):
+    """Create obituaries through the service: the test user's, public and with fixed dates unless given"""
+    def make(name="Jane Doe", text=None, birth_date="1950-01-01", death_date="2024-01-01",
+             is_public=True, user_id=None):
+        return create_obituary(
+            db,
+            user_id or test_user.id,
+            ObituaryCreate(name=name, birth_date=birth_date, death_date=death_date, is_public=is_public),
+            f"{name} will be missed." if text is None else text,
+        )
+    return make
+
+
 @pytest.fixture
 def auth_token(test_user):
     """Generate auth token for test user"""
@@ -78,3 +108,84 @@ def auth_token(test_user):
 def auth_headers(auth_token):
     """Generate auth headers with bearer token"""
     return {"Authorization": f"Bearer {auth_token}"}
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Fail when a block issues more SQL statements than allowed (catches N+1 regressions)"""
+    @contextmanager
+    def _assert_max_queries(limit):
+        with count_queries(engine) as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"Expected at most {limit} queries, got {stats.count}:\n" + "\n".join(stats.statements)
+        )
+
+    return _assert_max_queries
+
+
+@pytest.fixture
+def stub_upstreams(monkeypatch):
+    """Replace Groq and the Lambdas with instant fakes for route tests"""
+    from app.routes import obituaries as obituary_routes
+    from app.services.ai_service import Generation
+
+    async def fake_upload(image_data, filename):
+        return f"https://images.example.com/{filename}"
+
+    async def fake_tts(text, obituary_id):
+        return f"https://audio.example.com/{obituary_id}.mp3"
+
+    async def fake_generate(name, birth_date, death_date):
+        return Generation(f"In loving memory of {name}.", "test-model")
+
+    monkeypatch.setattr(obituary_routes, "generate_obituary_text", fake_generate)
+    monkeypatch.setattr(obituary_routes, "upload_image_to_lambda", fake_upload)
+    monkeypatch.setattr(obituary_routes, "generate_tts_audio", fake_tts)
+
+
+@pytest.fixture
+def app_log(caplog):
+    """caplog that also sees the app logger, which does not propagate to root"""
+    app_logger = logging.getLogger("app")
+    attached = caplog.handler not in app_logger.handlers
+    if attached:
+        app_logger.addHandler(caplog.handler)
+    caplog.set_level(logging.INFO, logger="app")
+    yield caplog
+    if attached:
+        app_logger.removeHandler(caplog.handler)
+
+
+IMAGES_BUCKET = "lastshow-images"
+AUDIO_BUCKET = "lastshow-audio"
+
+
+@pytest.fixture
+def s3(client, monkeypatch):
+    """In-memory S3 (moto) with the image and audio buckets configured"""
+    from moto import mock_aws
+    from app.config import settings
+    from app.services import media_service
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setattr(settings, "IMAGES_BUCKET", IMAGES_BUCKET)
+    monkeypatch.setattr(settings, "AUDIO_BUCKET", AUDIO_BUCKET)
+    media_service.get_s3_client.cache_clear()
+    with mock_aws():
+        s3_client = media_service.get_s3_client()
+        for bucket in (IMAGES_BUCKET, AUDIO_BUCKET):
+            s3_client.create_bucket(Bucket=bucket)
+        yield s3_client
+    media_service.get_s3_client.cache_clear()
+
+
+@pytest.fixture
+def bucket_keys(s3):
+    """Sorted keys of every object in a bucket of the ``s3`` fixture"""
+    def keys(bucket):
+        paginator = s3.get_paginator("list_objects_v2")
+        return sorted(o["Key"] for page in paginator.paginate(Bucket=bucket) for o in page.get("Contents", []))
+    return keys
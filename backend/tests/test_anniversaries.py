@@ -0,0 +1,82 @@
+"""
+Tests for GET /obituaries/anniversaries
+"""
+from datetime import date
+import pytest
+from fastapi import status
+from sqlalchemy import insert, text
+from app.models.obituary import Obituary
+
+
+@pytest.mark.unit
+class TestMonthDayColumns:
+    """Test the derived month-day columns"""
+
+    def test_set_on_create(self, make_obituary):
+        obituary = make_obituary("Jane", birth_date="1952-02-29", death_date="2024-10-19")
+
+        assert obituary.birth_month_day == 229
+        assert obituary.death_month_day == 1019
+
+    def test_set_on_bulk_insert(self, db, test_user):
+        db.execute(insert(Obituary), [
+            {"user_id": test_user.id, "name": "Bulk", "birth_date": date(1940, 12, 31),
+             "death_date": date(2020, 1, 5), "obituary_text": "text"},
+        ])
+        db.commit()
+
+        obituary = db.query(Obituary).one()
+        assert (obituary.birth_month_day, obituary.death_month_day) == (1231, 105)
+
+    def test_lookup_uses_indexes(self, db):
+        plan = " ".join(str(row) for row in db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM obituaries "
+            "WHERE is_public = 1 AND (death_month_day = 1019 OR birth_month_day = 1019)"
+        )))
+
+        assert "ix_obituaries_death_month_day" in plan
+        assert "ix_obituaries_birth_month_day" in plan
+
+
+@pytest.mark.integration
+class TestAnniversariesRoute:
+    """Test GET /obituaries/anniversaries"""
+
+    def test_birth_or_death_on_the_day(self, client, make_obituary):
+        died = make_obituary("Died", birth_date="1950-01-01", death_date="2020-10-19")
+        born = make_obituary("Born", birth_date="1930-10-19", death_date="2010-03-03")
+        make_obituary("Other day", birth_date="1950-10-18", death_date="2020-10-20")
+        make_obituary("Private", birth_date="1950-10-19", death_date="2020-10-19", is_public=False)
+
+        response = client.get("/obituaries/anniversaries", params={"date": "10-19"})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total"] == 2
+        assert {o["id"] for o in data["obituaries"]} == {str(died.id), str(born.id)}
+
+    def test_pagination(self, client, make_obituary):
+        for i in range(3):
+            make_obituary(f"Person {i}", birth_date="1950-01-01", death_date="2020-06-01")
+
+        response = client.get("/obituaries/anniversaries", params={"date": "06-01", "skip": 1, "limit": 1})
+
+        assert response.json()["total"] == 1
+
+    def test_leap_day(self, client, make_obituary):
+        make_obituary("Leapling", birth_date="1952-02-29", death_date="2020-06-01")
+
+        response = client.get("/obituaries/anniversaries", params={"date": "02-29"})
+
+        assert response.json()["total"] == 1
+
+    @pytest.mark.parametrize("value", ["13-01", "02-30", "1019", "10-19-2020", "oct-19"])
+    def test_invalid_date(self, client, value):
+        response = client.get("/obituaries/anniversaries", params={"date": value})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_date_required(self, client):
+        response = client.get("/obituaries/anniversaries")
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
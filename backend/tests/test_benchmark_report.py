@@ -0,0 +1,65 @@
+"""
+Unit tests for benchmark reporting and regression checks
+"""
+import pytest
+from benchmarks.report import compare_to_baseline, percentile, summarize
+
+
+def make_summary(p50=10.0, p95=20.0, p99=30.0, rps=100.0, errors=0):
+    return {
+        "requests": 100,
+        "errors": errors,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "throughput_rps": rps,
+    }
+
+
+@pytest.mark.unit
+class TestBenchmarkReport:
+    """Test percentile summaries and baseline comparison"""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles on a known distribution"""
+        values = [float(v) for v in range(1, 101)]
+
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 50) == 0.0
+
+    def test_summarize(self):
+        """Test latencies are reported in milliseconds with throughput"""
+        summary = summarize([0.01, 0.02, 0.03, 0.04], elapsed=2.0, errors=1)
+
+        assert summary["requests"] == 4
+        assert summary["errors"] == 1
+        assert summary["p50_ms"] == 20.0
+        assert summary["p99_ms"] == 40.0
+        assert summary["throughput_rps"] == 2.0
+
+    def test_within_threshold_passes(self):
+        """Test small changes inside the threshold are not regressions"""
+        baseline = {"login": {"8": make_summary()}}
+        results = {"login": {"8": make_summary(p95=22.0, rps=90.0)}}
+
+        assert compare_to_baseline(results, baseline, threshold=0.15) == []
+
+    def test_latency_and_throughput_regressions(self):
+        """Test slower percentiles and lower throughput are reported"""
+        baseline = {"login": {"8": make_summary()}}
+        results = {"login": {"8": make_summary(p99=40.0, rps=50.0, errors=2)}}
+
+        regressions = compare_to_baseline(results, baseline, threshold=0.15)
+
+        assert len(regressions) == 3
+        assert any("p99_ms" in r for r in regressions)
+        assert any("throughput" in r for r in regressions)
+        assert any("errors" in r for r in regressions)
+
+    def test_new_scenarios_are_ignored(self):
+        """Test scenarios missing from the baseline cannot regress"""
+        results = {"me": {"1": make_summary(p50=1000.0)}}
+
+        assert compare_to_baseline(results, {}, threshold=0.1) == []
@@ -0,0 +1,133 @@
+"""
+Tests for bulk delete and background S3 media cleanup
+"""
+import pytest
+from fastapi import status
+from app.config import settings
+from app.ids import uuid7
+from app.models.obituary import Obituary
+from app.models.user import User
+from app.schemas.obituary import ObituaryCreate
+from app.services import media_service
+from app.services.obituary_service import create_obituary
+
+IMAGES = "lastshow-images"
+AUDIO = "lastshow-audio"
+
+
+def _obituary_with_media(db, user_id, s3_client, name):
+    obituary = create_obituary(
+        db,
+        user_id,
+        ObituaryCreate(name=name, birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+        "A loving tribute...",
+        image_url=f"https://{IMAGES}.s3.amazonaws.com/images/{name}.jpg",
+        audio_url=f"https://{AUDIO}.s3.amazonaws.com/audio/{name}.mp3",
+    )
+    s3_client.put_object(Bucket=IMAGES, Key=f"images/{name}.jpg", Body=b"jpg")
+    s3_client.put_object(Bucket=AUDIO, Key=f"audio/{name}.mp3", Body=b"mp3")
+    return obituary
+
+
+@pytest.fixture
+def other_user(db):
+    user = User(id=uuid7(), email="other@example.com", hashed_password="x", full_name="Other")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.mark.integration
+class TestBulkDelete:
+    """Test DELETE /obituaries/ with a list of ids"""
+
+    def test_deletes_only_own_obituaries(self, client, db, s3, test_user, other_user, auth_headers, assert_max_queries):
+        mine = [_obituary_with_media(db, test_user.id, s3, f"mine{i}").id for i in range(3)]
+        theirs = _obituary_with_media(db, other_user.id, s3, "theirs").id
+        missing = uuid7()
+
+        with assert_max_queries(2):  # current user + one DELETE ... RETURNING
+            response = client.request(
+                "DELETE", "/obituaries/", headers=auth_headers,
+                json={"ids": [str(i) for i in [*mine, theirs, missing]]},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(response.json()["deleted"]) == sorted(str(i) for i in mine)
+        assert response.json()["total"] == 3
+        assert db.query(Obituary).count() == 1
+
+    def test_media_removed_in_background(self, client, db, s3, bucket_keys, test_user, other_user, auth_headers):
+        mine = _obituary_with_media(db, test_user.id, s3, "mine").id
+        _obituary_with_media(db, other_user.id, s3, "theirs")
+
+        client.request("DELETE", "/obituaries/", headers=auth_headers, json={"ids": [str(mine)]})
+        # Objects are still there until the background worker runs
+        assert "images/mine.jpg" in bucket_keys(IMAGES)
+        media_service._drain(block=False)
+
+        assert bucket_keys(IMAGES) == ["images/theirs.jpg"]
+        assert bucket_keys(AUDIO) == ["audio/theirs.mp3"]
+
+    def test_single_delete_removes_media(self, client, db, s3, bucket_keys, test_user, auth_headers):
+        obituary_id = _obituary_with_media(db, test_user.id, s3, "single").id
+
+        response = client.delete(f"/obituaries/{obituary_id}", headers=auth_headers)
+        media_service._drain(block=False)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert bucket_keys(IMAGES) == []
+
+    @pytest.mark.parametrize("ids", [[], [str(uuid7()) for _ in range(1001)], ["not-a-uuid"]])
+    def test_rejects_invalid_id_lists(self, client, auth_headers, ids):
+        response = client.request("DELETE", "/obituaries/", headers=auth_headers, json={"ids": ids})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+@pytest.mark.unit
+class TestMediaService:
+    """Test URL parsing and batched deletes"""
+
+    def test_object_from_url(self, monkeypatch):
+        monkeypatch.setattr(settings, "IMAGES_BUCKET", IMAGES)
+        monkeypatch.setattr(settings, "AUDIO_BUCKET", AUDIO)
+
+        assert media_service.object_from_url(f"https://{IMAGES}.s3.amazonaws.com/images/a.jpg") == (IMAGES, "images/a.jpg")
+        assert media_service.object_from_url(f"https://{AUDIO}.s3.us-east-1.amazonaws.com/audio/b.mp3") == (AUDIO, "audio/b.mp3")
+        assert media_service.object_from_url("https://someone-else.s3.amazonaws.com/images/a.jpg") is None
+        assert media_service.object_from_url("https://images.example.com/a.jpg") is None
+        assert media_service.object_from_url(None) is None
+
+    def test_object_from_url_bucket_with_dots(self, monkeypatch):
+        monkeypatch.setattr(settings, "IMAGES_BUCKET", "media.lastshow.example")
+        monkeypatch.setattr(settings, "AUDIO_BUCKET", "")
+
+        url = "https://media.lastshow.example.s3.us-west-2.amazonaws.com/images/a.jpg"
+        assert media_service.object_from_url(url) == ("media.lastshow.example", "images/a.jpg")
+        assert media_service.object_from_url("https://media.s3.amazonaws.com/images/a.jpg") is None
+
+    def test_disabled_without_buckets(self, monkeypatch):
+        monkeypatch.setattr(settings, "IMAGES_BUCKET", "")
+        monkeypatch.setattr(settings, "AUDIO_BUCKET", "")
+
+        assert media_service.object_from_url("https://lastshow-images.s3.amazonaws.com/images/a.jpg") is None
+
+    def test_delete_objects_batches_of_1000(self, s3, bucket_keys, monkeypatch):
+        keys = [f"images/{i}.jpg" for i in range(2500)]
+        calls = []
+        real_delete = s3.delete_objects
+
+        def counting_delete(**kwargs):
+            calls.append(len(kwargs["Delete"]["Objects"]))
+            return real_delete(**kwargs)
+
+        monkeypatch.setattr(s3, "delete_objects", counting_delete)
+        for key in keys[:3]:
+            s3.put_object(Bucket=IMAGES, Key=key, Body=b"x")
+
+        deleted = media_service.delete_objects(IMAGES, keys, source="test")
+
+        assert calls == [1000, 1000, 500]
+        assert len(deleted) == 2500
+        assert bucket_keys(IMAGES) == []
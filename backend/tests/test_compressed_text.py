@@ -0,0 +1,131 @@
+"""
+Tests for compressed obituary text storage
+"""
+import pytest
+from sqlalchemy import inspect, text
+from app import compressed_text
+from app.config import settings
+from app.schemas.obituary import ObituaryCreate
+from app.services import obituary_service
+
+TEXT = "She was a beloved teacher, a gardener and a friend to everyone on Elm Street. " * 20
+
+
+@pytest.fixture
+def zstd_settings(monkeypatch):
+    """Apply OBITUARY_TEXT_* overrides and drop the cached compressor/dictionary"""
+    pytest.importorskip("zstandard")
+
+    def apply(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        compressed_text._zstd_dictionary.cache_clear()
+        compressed_text._zstd_compressor.cache_clear()
+
+    yield apply
+    compressed_text._zstd_dictionary.cache_clear()
+    compressed_text._zstd_compressor.cache_clear()
+
+
+@pytest.mark.unit
+class TestCodecs:
+    """Test encode/decode"""
+
+    @pytest.mark.parametrize("codec,header", [("none", b"\x00"), ("zlib", b"\x01")])
+    def test_round_trip(self, codec, header):
+        stored = compressed_text.encode(TEXT, codec)
+
+        assert stored[:1] == header
+        assert compressed_text.decode(stored) == TEXT
+
+    def test_zlib_is_smaller(self):
+        assert len(compressed_text.encode(TEXT, "zlib")) < len(TEXT) / 5
+
+    def test_zstd_round_trip(self, zstd_settings):
+        zstd_settings(OBITUARY_TEXT_CODEC="zstd")
+
+        stored = compressed_text.encode(TEXT)
+
+        assert stored[:1] == b"\x02"
+        assert compressed_text.decode(stored) == TEXT
+
+    def test_zstd_dictionary(self, zstd_settings, tmp_path):
+        samples = [f"{name} passed away peacefully, surrounded by family, at the age of {age}. " * 3
+                   for name in ("Ann", "Bob", "Cy", "Di", "Ed") for age in range(60, 100)]
+        path = tmp_path / "obituaries.zdict"
+        path.write_bytes(compressed_text.train(samples, size=4096))
+        sample = "Flo passed away peacefully, surrounded by family, at the age of 88."
+
+        zstd_settings(OBITUARY_TEXT_CODEC="zstd")
+        plain = compressed_text.encode(sample)
+        zstd_settings(OBITUARY_TEXT_CODEC="zstd", OBITUARY_TEXT_ZSTD_DICT=str(path))
+        with_dictionary = compressed_text.encode(sample)
+
+        assert len(with_dictionary) < len(plain)
+        assert compressed_text.decode(with_dictionary) == sample
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            compressed_text.encode(TEXT, "lz4")
+
+    def test_unknown_header(self):
+        with pytest.raises(ValueError):
+            compressed_text.decode(b"\x09abc")
+
+
+@pytest.mark.unit
+class TestCompressedColumn:
+    """Test the obituary_text column"""
+
+    def _create(self, db, user_id, body=TEXT):
+        return obituary_service.create_obituary(
+            db, user_id, ObituaryCreate(name="Jane", birth_date="1950-01-01", death_date="2024-01-01"), body
+        )
+
+    def test_stored_uncompressed_by_default(self, db, test_user):
+        obituary = self._create(db, test_user.id)
+
+        stored = db.execute(
+            text("SELECT obituary_text FROM obituaries WHERE id = :id"), {"id": obituary.id.hex}
+        ).scalar_one()
+
+        assert stored == b"\x00" + TEXT.encode()
+
+    def test_stored_compressed(self, db, test_user, monkeypatch):
+        monkeypatch.setattr(settings, "OBITUARY_TEXT_CODEC", "zlib")
+        obituary = self._create(db, test_user.id)
+
+        stored = db.execute(
+            text("SELECT obituary_text FROM obituaries WHERE id = :id"), {"id": obituary.id.hex}
+        ).scalar_one()
+
+        assert stored[:1] == b"\x01"
+        assert len(stored) < len(TEXT) / 5
+        assert obituary.obituary_text == TEXT
+
+    def test_mixed_codecs_readable(self, db, test_user, monkeypatch):
+        monkeypatch.setattr(settings, "OBITUARY_TEXT_CODEC", "none")
+        first = self._create(db, test_user.id, "written raw")
+        monkeypatch.setattr(settings, "OBITUARY_TEXT_CODEC", "zlib")
+        second = self._create(db, test_user.id, "written with zlib")
+        db.expire_all()
+
+        assert obituary_service.get_obituary_by_id(db, first.id).obituary_text == "written raw"
+        assert obituary_service.get_obituary_by_id(db, second.id).obituary_text == "written with zlib"
+
+    def test_text_is_deferred(self, db, test_user):
+        obituary_id = self._create(db, test_user.id).id
+        db.expire_all()
+
+        obituary = obituary_service.get_obituary_by_id(db, obituary_id, with_text=False)
+
+        assert "obituary_text" in inspect(obituary).unloaded
+        assert obituary.obituary_text == TEXT
+
+    def test_lists_load_text(self, db, test_user):
+        self._create(db, test_user.id)
+        db.expire_all()
+
+        obituaries = obituary_service.get_obituaries(db, user_id=test_user.id)
+
+        assert "obituary_text" not in inspect(obituaries[0]).unloaded
@@ -0,0 +1,115 @@
+"""
+Tests for negotiated gzip/Brotli response compression
+"""
+import gzip
+import pytest
+from fastapi import status
+from app import compression
+from app.config import settings
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary
+
+
+@pytest.fixture
+def big_feed(db, test_user):
+    """Enough public obituaries for a list body well over the threshold"""
+    for i in range(20):
+        create_obituary(
+            db,
+            test_user.id,
+            ObituaryCreate(name=f"Person {i}", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+            "They will be remembered for their kindness and their laughter. " * 10,
+        )
+
+
+@pytest.mark.unit
+class TestChooseEncoding:
+    """Test Accept-Encoding negotiation"""
+
+    @pytest.mark.parametrize("header,expected", [
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0, identity", None),
+        ("identity", None),
+        ("", None),
+        ("deflate", None),
+    ])
+    def test_negotiation(self, header, expected):
+        pytest.importorskip("brotli")
+
+        assert compression.choose_encoding(header) == expected
+
+    def test_gzip_without_brotli(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+
+        assert compression.choose_encoding("br, gzip") == "gzip"
+        assert compression.choose_encoding("br") is None
+
+
+@pytest.mark.integration
+class TestCompressionMiddleware:
+    """Test which responses are compressed"""
+
+    def test_gzip_list(self, client, big_feed):
+        response = client.get("/obituaries/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(response.content) / 4
+        assert response.json()["total"] == 20
+
+    def test_brotli_list(self, client, big_feed):
+        pytest.importorskip("brotli")
+
+        response = client.get("/obituaries/", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["content-encoding"] == "br"
+        assert response.json()["total"] == 20
+
+    def test_identity(self, client, big_feed):
+        response = client.get("/obituaries/", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_small_body_not_compressed(self, client):
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_disabled(self, client, big_feed, monkeypatch):
+        monkeypatch.setattr(settings, "COMPRESSION", False)
+
+        response = client.get("/obituaries/", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_large_body_compressed_in_thread(self, client, big_feed, monkeypatch):
+        calls = []
+        real_run = compression.run_in_threadpool
+
+        async def tracking_run(func, *args):
+            calls.append(func)
+            return await real_run(func, *args)
+
+        monkeypatch.setattr(compression, "run_in_threadpool", tracking_run)
+        monkeypatch.setattr(settings, "COMPRESSION_THREAD_MIN_BYTES", 4096)
+
+        response = client.get("/obituaries/", headers={"Accept-Encoding": "gzip"})
+
+        assert calls == [compression.compress]
+        assert response.headers["content-encoding"] == "gzip"
+
+    def test_streamed_export_passes_through(self, client, auth_headers, big_feed):
+        response = client.get("/obituaries/my-obituaries/export", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert len(response.text.splitlines()) == 20
+
+    def test_gzip_is_deterministic(self):
+        body = b'{"obituaries": []}' * 100
+
+        assert compression.compress(body, "gzip") == compression.compress(body, "gzip")
+        assert gzip.decompress(compression.compress(body, "gzip")) == body
@@ -0,0 +1,137 @@
+"""
+Tests for the Server-Sent Events stream of obituary changes
+"""
+import asyncio
+import json
+import threading
+import time
+import pytest
+from fastapi import status
+from app import events
+from app.config import settings
+from app.ids import uuid7
+from app.schemas.obituary import ObituaryCreate
+from app.services import obituary_service
+
+
+def _frames(body: str) -> list[dict]:
+    """Parse an SSE body into its frames' fields"""
+    frames = []
+    for block in body.strip().split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            name, _, value = line.partition(": ")
+            fields[name] = value
+        frames.append(fields)
+    return frames
+
+
+async def _collect(user_id, publish, lifetime=0.2, heartbeat=10.0):
+    """Run a stream for ``lifetime`` seconds, calling ``publish()`` once it is subscribed"""
+    chunks = []
+
+    async def consume():
+        async for chunk in events.stream(user_id, heartbeat=heartbeat, lifetime=lifetime):
+            chunks.append(chunk.decode())
+            if len(chunks) == 1:
+                publish()
+
+    await consume()
+    return "".join(chunks)
+
+
+@pytest.mark.unit
+class TestEventHub:
+    """Test fan-out to the owner's streams"""
+
+    def test_only_owner_receives(self):
+        owner, other = str(uuid7()), str(uuid7())
+
+        def publish():
+            events.hub.publish({"event": "created", "id": "1", "user_id": other})
+            events.hub.publish({"event": "created", "id": "2", "user_id": owner})
+
+        body = asyncio.run(_collect(owner, publish))
+
+        frames = _frames(body)
+        assert frames[0] == {"retry": "1000"}
+        assert frames[1] == {"id": "1", "event": "created", "data": '{"event":"created","id":"2"}'}
+        assert len(frames) == 2
+        assert len(events.hub) == 0
+
+    def test_keep_alive(self):
+        body = asyncio.run(_collect(str(uuid7()), lambda: None, lifetime=0.25, heartbeat=0.1))
+
+        assert ": keep-alive" in body
+
+    def test_slow_subscriber_told_to_resync(self, monkeypatch):
+        monkeypatch.setattr(events, "QUEUE_SIZE", 3)
+
+        async def main():
+            subscriber = events.hub.subscribe("user")
+            try:
+                for i in range(5):
+                    events.hub.publish({"event": "created", "id": str(i), "user_id": "user"})
+                await asyncio.sleep(0)
+                return [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+            finally:
+                events.hub.unsubscribe(subscriber)
+
+        queued = asyncio.run(main())
+
+        assert queued == [{"event": "resync"}, {"event": "created", "id": "4", "user_id": "user"}]
+
+    def test_service_events_carry_owner(self, db, test_user):
+        received = []
+
+        async def main():
+            subscriber = events.hub.subscribe(test_user.id)
+            try:
+                obituary = obituary_service.create_obituary(
+                    db, test_user.id,
+                    ObituaryCreate(name="Jane", birth_date="1950-01-01", death_date="2024-01-01"),
+                    "text",
+                )
+                obituary_service.store_audio_url(db, obituary.id, "https://audio.example.com/a.mp3")
+                obituary_service.delete_obituary(db, obituary.id, test_user.id)
+                await asyncio.sleep(0)
+                while not subscriber.queue.empty():
+                    received.append(subscriber.queue.get_nowait())
+            finally:
+                events.hub.unsubscribe(subscriber)
+
+        asyncio.run(main())
+
+        assert [message["event"] for message in received] == ["created", "media", "deleted"]
+        assert received[1]["kind"] == "audio"
+
+
+@pytest.mark.integration
+class TestEventsRoute:
+    """Test GET /obituaries/events"""
+
+    def test_streams_own_events(self, client, auth_headers, test_user, monkeypatch):
+        monkeypatch.setattr(settings, "SSE_STREAM_SECONDS", 0.5)
+        user_id = test_user.id
+
+        def publish_when_subscribed():
+            deadline = time.monotonic() + 2
+            while not len(events.hub) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            obituary_service.publish_obituary_event("media", uuid7(), user_id, kind="audio")
+
+        publisher = threading.Thread(target=publish_when_subscribed)
+        publisher.start()
+        response = client.get("/obituaries/events", headers=auth_headers)
+        publisher.join()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        frames = _frames(response.text)
+        assert frames[1]["event"] == "media"
+        assert json.loads(frames[1]["data"])["kind"] == "audio"
+
+    def test_requires_auth(self, client):
+        response = client.get("/obituaries/events")
+
+        assert response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
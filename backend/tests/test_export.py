@@ -0,0 +1,101 @@
+"""
+Tests for streaming NDJSON/CSV export of a user's obituaries
+"""
+import csv
+import io
+import json
+import pytest
+from fastapi import status
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary, iter_user_obituaries
+
+
+@pytest.fixture
+def many_obituaries(db, test_user):
+    """Seven obituaries, enough for several export batches"""
+    return [
+        create_obituary(
+            db,
+            test_user.id,
+            ObituaryCreate(name=f"Person {i}", birth_date="1950-01-01", death_date="2024-01-01", is_public=i % 2 == 0),
+            f'Obituary text {i}, with "quotes"\nand a newline',
+        )
+        for i in range(7)
+    ]
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    from app.routes import obituaries as obituary_routes
+
+    monkeypatch.setattr(obituary_routes, "EXPORT_BATCH_SIZE", 3)
+
+
+@pytest.mark.integration
+class TestExport:
+    """Test GET /obituaries/my-obituaries/export"""
+
+    def test_ndjson(self, client, auth_headers, many_obituaries, small_batches):
+        response = client.get("/obituaries/my-obituaries/export", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["content-disposition"] == 'attachment; filename="obituaries.ndjson"'
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["name"] for row in rows] == [f"Person {i}" for i in range(7)]
+        assert rows[0]["obituary_text"] == 'Obituary text 0, with "quotes"\nand a newline'
+
+    def test_csv(self, client, auth_headers, many_obituaries, small_batches):
+        response = client.get("/obituaries/my-obituaries/export", headers=auth_headers, params={"format": "csv"})
+
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 7
+        assert rows[1]["name"] == "Person 1"
+        assert rows[1]["is_public"] == "False"
+        assert rows[1]["death_date"] == "2024-01-01"
+        assert rows[1]["obituary_text"] == 'Obituary text 1, with "quotes"\nand a newline'
+
+    def test_empty_csv_has_header(self, client, auth_headers):
+        response = client.get("/obituaries/my-obituaries/export", headers=auth_headers, params={"format": "csv"})
+
+        assert response.text.splitlines() == [
+            "id,user_id,name,birth_date,death_date,obituary_text,image_url,audio_url,is_public,created_at"
+        ]
+
+    def test_only_own_obituaries(self, client, db, auth_headers, many_obituaries):
+        from app.ids import uuid7
+        from app.models.user import User
+
+        other = User(id=uuid7(), email="other@example.com", hashed_password="x", full_name="Other")
+        db.add(other)
+        db.commit()
+        create_obituary(
+            db, other.id,
+            ObituaryCreate(name="Not Mine", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+            "text",
+        )
+
+        response = client.get("/obituaries/my-obituaries/export", headers=auth_headers)
+
+        assert "Not Mine" not in response.text
+
+    def test_requires_auth(self, client):
+        response = client.get("/obituaries/my-obituaries/export")
+
+        assert response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_format(self, client, auth_headers):
+        response = client.get("/obituaries/my-obituaries/export", headers=auth_headers, params={"format": "xml"})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+@pytest.mark.unit
+class TestIterUserObituaries:
+    """Test the service yields bounded batches"""
+
+    def test_batches(self, db, test_user, many_obituaries):
+        batches = list(iter_user_obituaries(db, test_user.id, batch_size=3))
+
+        assert [len(batch) for batch in batches] == [3, 3, 1]
@@ -0,0 +1,148 @@
+"""
+Tests for the in-memory public feed behind GET /obituaries/
+"""
+import pytest
+from fastapi import status
+from app.feed import PublicFeed
+from app.responses import dump_json
+from app.schemas.obituary import ObituaryListResponse, ObituaryResponse
+from app.services import obituary_service
+
+
+def _db_page(db, skip=0, limit=100) -> bytes:
+    obituaries = obituary_service.get_obituaries(db, skip=skip, limit=limit)
+    return dump_json(ObituaryListResponse(
+        obituaries=[ObituaryResponse.model_validate(o) for o in obituaries], total=len(obituaries)
+    ).model_dump())
+
+
+@pytest.mark.unit
+class TestPublicFeed:
+    """Test the feed against the database query it replaces"""
+
+    def test_matches_database_page(self, db, make_obituary):
+        for i in range(2):
+            make_obituary(f"Person {i}")
+        make_obituary("Private", is_public=False)
+        feed = PublicFeed(10)
+
+        assert feed.page(db, 0, 100) == _db_page(db)
+        assert feed.page(db, 1, 1) == _db_page(db, skip=1, limit=1)
+
+    def test_pages_past_the_feed_are_not_served(self, db, make_obituary):
+        for i in range(5):
+            make_obituary(f"Person {i}")
+        feed = PublicFeed(3)
+
+        assert feed.page(db, 1, 2) == _db_page(db, skip=1, limit=2)
+        assert feed.page(db, 2, 2) is None
+
+    def test_created_obituary_added_on_next_read(self, db, make_obituary, test_user):
+        feed = PublicFeed(3)
+        make_obituary("First")
+        feed.page(db, 0, 10)
+
+        newest = make_obituary("Second")
+        feed.handle_event({"event": "created", "id": str(newest.id), "user_id": str(test_user.id)})
+
+        assert feed.page(db, 0, 10) == _db_page(db, limit=10)
+        assert len(feed) == 2
+
+    def test_row_not_yet_visible_stays_stale(self, db, make_obituary, test_user, monkeypatch):
+        feed = PublicFeed(3)
+        feed.page(db, 0, 10)
+        newest = make_obituary("Not replicated yet")
+        feed.handle_event({"event": "created", "id": str(newest.id), "user_id": str(test_user.id)})
+
+        with monkeypatch.context() as patch:
+            # A lagging replica does not have the row yet
+            patch.setattr(obituary_service, "get_obituaries_by_ids", lambda db, ids: [])
+            feed.page(db, 0, 10)
+        assert len(feed) == 0
+
+        assert feed.page(db, 0, 10) == _db_page(db, limit=10)
+        assert len(feed) == 1
+
+    def test_full_feed_drops_oldest(self, db, make_obituary, test_user):
+        feed = PublicFeed(2)
+        for i in range(2):
+            make_obituary(f"Person {i}")
+        feed.page(db, 0, 1)
+
+        newest = make_obituary("Newest")
+        feed.handle_event({"event": "created", "id": str(newest.id), "user_id": str(test_user.id)})
+
+        assert feed.page(db, 0, 2) == _db_page(db, limit=2)
+        assert feed.page(db, 0, 3) is None
+
+    def test_delete_applied_without_query(self, db, make_obituary, test_user, assert_max_queries):
+        feed = PublicFeed(10)
+        keep = make_obituary("Keep")
+        gone = make_obituary("Gone")
+        feed.page(db, 0, 10)
+
+        obituary_service.delete_obituary(db, gone.id, test_user.id)
+        feed.handle_event({"event": "deleted", "id": str(gone.id), "user_id": str(test_user.id)})
+        with assert_max_queries(0):
+            body = feed.page(db, 0, 10)
+
+        assert str(keep.id).encode() in body
+        assert str(gone.id).encode() not in body
+
+    def test_reload_skips_rows_deleted_meanwhile(self, db, make_obituary, test_user):
+        feed = PublicFeed(10)
+        obituary = make_obituary("Racing")
+
+        # The delete event arrives before the reload sees the row disappear
+        feed.handle_event({"event": "deleted", "id": str(obituary.id), "user_id": str(test_user.id)})
+        feed.reload(db)
+
+        assert len(feed) == 0
+
+    def test_obituary_made_private_is_removed(self, db, make_obituary, test_user):
+        feed = PublicFeed(10)
+        obituary = make_obituary("Private later")
+        feed.page(db, 0, 10)
+
+        obituary.is_public = False
+        db.commit()
+        feed.handle_event({"event": "updated", "id": str(obituary.id), "user_id": str(test_user.id)})
+
+        assert feed.page(db, 0, 10) == _db_page(db, limit=10)
+        assert len(feed) == 0
+
+    def test_disabled(self, db):
+        assert PublicFeed(0).page(db, 0, 10) is None
+
+
+@pytest.mark.integration
+class TestFeedRoute:
+    """Test GET /obituaries/ served from memory"""
+
+    def test_second_request_runs_no_queries(self, client, make_obituary, assert_max_queries):
+        for i in range(3):
+            make_obituary(f"Person {i}")
+        first = client.get("/obituaries/")
+
+        with assert_max_queries(0):
+            second = client.get("/obituaries/")
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert second.json()["total"] == 3
+
+    def test_sees_new_obituary(self, client, make_obituary):
+        client.get("/obituaries/")
+        obituary = make_obituary("Just added")
+
+        response = client.get("/obituaries/")
+
+        assert response.json()["obituaries"][0]["id"] == str(obituary.id)
+
+    def test_date_filter_uses_database(self, client, make_obituary):
+        make_obituary("Person")
+        client.get("/obituaries/")
+
+        response = client.get("/obituaries/", params={"died_after": "2025-01-01"})
+
+        assert response.json()["total"] == 0
@@ -0,0 +1,163 @@
+"""
+Integration tests for Idempotency-Key handling on POST /obituaries/
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import status
+from sqlalchemy import text
+from app.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.models.obituary import Obituary
+from app.routes import obituaries as obituary_routes
+from app.services.ai_service import Generation
+from app.services import idempotency_service
+from app.services.idempotency_service import request_fingerprint
+from tests.conftest import TestingSessionLocal
+
+FORM = {"name": "Jane Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01", "is_public": "true"}
+
+
+def form_fingerprint():
+    return request_fingerprint(
+        {"name": "Jane Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01",
+         "is_public": True, "filename": None},
+    )
+
+
+@pytest.fixture
+def generation_calls(stub_upstreams, monkeypatch):
+    """Count calls to the (stubbed) text generator"""
+    calls = []
+
+    async def fake_generate(name, birth_date, death_date):
+        calls.append(name)
+        return Generation(f"In loving memory of {name}.", "test-model")
+
+    monkeypatch.setattr(obituary_routes, "generate_obituary_text", fake_generate)
+    return calls
+
+
+@pytest.mark.integration
+class TestIdempotency:
+    """Test retries with the same key do not repeat the pipeline"""
+
+    def test_replay_returns_stored_response(self, client, db, auth_headers, generation_calls):
+        """Test a retry returns the original response without new work"""
+        headers = {**auth_headers, "Idempotency-Key": "retry-1"}
+
+        first = client.post("/obituaries/", headers=headers, data=FORM)
+        second = client.post("/obituaries/", headers=headers, data=FORM)
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert len(generation_calls) == 1
+        assert db.query(Obituary).count() == 1
+
+    def test_without_key_creates_duplicates(self, client, db, auth_headers, generation_calls):
+        """Test requests without a key are not deduplicated"""
+        client.post("/obituaries/", headers=auth_headers, data=FORM)
+        client.post("/obituaries/", headers=auth_headers, data=FORM)
+
+        assert len(generation_calls) == 2
+        assert db.query(Obituary).count() == 2
+
+    def test_key_reused_with_different_payload(self, client, auth_headers, generation_calls):
+        """Test a key cannot be reused for a different request"""
+        headers = {**auth_headers, "Idempotency-Key": "retry-2"}
+        client.post("/obituaries/", headers=headers, data=FORM)
+
+        response = client.post("/obituaries/", headers=headers, data={**FORM, "name": "Someone Else"})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        assert len(generation_calls) == 1
+
+    def test_concurrent_duplicate_waits_for_original(self, client, db, test_user, auth_headers, generation_calls):
+        """Test a duplicate arriving mid-flight waits and replays the result"""
+        db.add(IdempotencyKey(user_id=test_user.id, key="retry-3", request_hash=form_fingerprint()))
+        db.commit()
+
+        def finish_original():
+            time.sleep(0.3)
+            session = TestingSessionLocal()
+            record = session.get(IdempotencyKey, (test_user.id, "retry-3"))
+            record.status_code = 201
+            record.response_body = '{"id": "original"}'
+            session.commit()
+            session.close()
+
+        worker = threading.Thread(target=finish_original)
+        worker.start()
+        response = client.post("/obituaries/", headers={**auth_headers, "Idempotency-Key": "retry-3"}, data=FORM)
+        worker.join()
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {"id": "original"}
+        assert generation_calls == []
+
+    def test_in_flight_duplicate_times_out(self, client, db, test_user, auth_headers, generation_calls, monkeypatch):
+        """Test a duplicate gets 409 when the original does not finish in time"""
+        monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+        db.add(IdempotencyKey(user_id=test_user.id, key="retry-4", request_hash=form_fingerprint()))
+        db.commit()
+
+        response = client.post("/obituaries/", headers={**auth_headers, "Idempotency-Key": "retry-4"}, data=FORM)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert generation_calls == []
+
+    def test_failure_releases_key(self, client, db, auth_headers, stub_upstreams, monkeypatch):
+        """Test a failed request frees its key for the retry"""
+        async def failing_generate(name, birth_date, death_date):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(obituary_routes, "generate_obituary_text", failing_generate)
+        headers = {**auth_headers, "Idempotency-Key": "retry-5"}
+
+        with pytest.raises(RuntimeError):
+            client.post("/obituaries/", headers=headers, data=FORM)
+
+        assert db.query(IdempotencyKey).count() == 0
+
+
+@pytest.mark.unit
+class TestIdempotencyPurge:
+    """Test expired keys are deleted without being reused"""
+
+    def test_claim_purges_expired_keys(self, db, test_user, monkeypatch):
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            IdempotencyKey(user_id=test_user.id, key="old", request_hash="h", status_code=201,
+                           response_body="{}", created_at=now - timedelta(hours=25)),
+            IdempotencyKey(user_id=test_user.id, key="abandoned", request_hash="h",
+                           created_at=now - timedelta(hours=1)),
+            IdempotencyKey(user_id=test_user.id, key="recent", request_hash="h", status_code=201,
+                           response_body="{}", created_at=now - timedelta(hours=1)),
+        ])
+        db.commit()
+        monkeypatch.setattr(idempotency_service, "_last_purge", 0.0)
+        monkeypatch.setattr(settings, "IDEMPOTENCY_PURGE_SECONDS", 0.0)
+
+        assert idempotency_service.claim_key(db, test_user.id, "new", "h") is None
+
+        assert sorted(k.key for k in db.query(IdempotencyKey)) == ["new", "recent"]
+
+    def test_purge_is_throttled(self, db, test_user, monkeypatch):
+        monkeypatch.setattr(idempotency_service, "_last_purge", time.monotonic())
+        db.add(IdempotencyKey(user_id=test_user.id, key="old", request_hash="h", status_code=201,
+                              response_body="{}", created_at=datetime.now(timezone.utc) - timedelta(days=2)))
+        db.commit()
+
+        idempotency_service.claim_key(db, test_user.id, "new", "h")
+
+        assert db.query(IdempotencyKey).count() == 2
+
+    def test_expiry_uses_created_at_index(self, db):
+        plan = " ".join(str(row) for row in db.execute(text(
+            "EXPLAIN QUERY PLAN DELETE FROM idempotency_keys WHERE created_at < '2026-01-01'"
+        )))
+
+        assert "ix_idempotency_keys_created_at" in plan
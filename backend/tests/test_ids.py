@@ -0,0 +1,59 @@
+"""
+Unit tests for UUIDv7 key generation
+"""
+import time
+import uuid
+import pytest
+from app.ids import parse_uuid, uuid7
+
+
+@pytest.mark.unit
+class TestUuid7:
+    """Test generated ids are valid, time-ordered UUIDv7"""
+
+    def test_version_and_variant(self):
+        value = uuid7()
+
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+
+    def test_embeds_current_time(self):
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+
+        assert before <= value.int >> 80 <= after + 1
+
+    def test_strictly_increasing(self):
+        values = [uuid7() for _ in range(10_000)]
+
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+
+    def test_parse_uuid(self):
+        value = uuid7()
+
+        assert parse_uuid(value) is value
+        assert parse_uuid(str(value)) == value
+        assert parse_uuid("missing-id") is None
+
+
+@pytest.mark.integration
+class TestUuidKeys:
+    """Test rows get native UUID keys ordered like created_at"""
+
+    def test_obituary_ids_follow_creation_order(self, client, auth_headers, stub_upstreams):
+        ids = []
+        for name in ("First", "Second", "Third"):
+            response = client.post(
+                "/obituaries/",
+                headers=auth_headers,
+                data={"name": name, "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            )
+            ids.append(uuid.UUID(response.json()["id"]))
+
+        assert ids == sorted(ids)
+        assert all(value.version == 7 for value in ids)
+
+    def test_malformed_id_is_not_found(self, client):
+        assert client.get("/obituaries/not-a-uuid").status_code == 404
@@ -0,0 +1,116 @@
+"""
+Tests for lazy, on-demand TTS generation
+"""
+import asyncio
+import pytest
+from fastapi import status
+from app.config import settings
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary, store_audio_url
+
+
+@pytest.fixture
+def tts_calls(monkeypatch, stub_upstreams):
+    """Count TTS calls made through the obituary routes"""
+    from app.routes import obituaries as obituary_routes
+
+    calls = []
+
+    async def fake_tts(text, obituary_id):
+        calls.append(obituary_id)
+        await asyncio.sleep(0.01)
+        return f"https://audio.example.com/{obituary_id}.mp3"
+
+    monkeypatch.setattr(obituary_routes, "generate_tts_audio", fake_tts)
+    monkeypatch.setattr(settings, "LAZY_TTS", True)
+    return calls
+
+
+@pytest.fixture
+def silent_obituary(db, test_user):
+    """An obituary created without audio"""
+    return create_obituary(
+        db,
+        test_user.id,
+        ObituaryCreate(name="Jane Doe", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+        "A loving tribute...",
+    )
+
+
+@pytest.mark.integration
+class TestLazyAudio:
+    """Test TTS runs on first playback only, once"""
+
+    def test_create_skips_tts(self, client, auth_headers, tts_calls):
+        response = client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["audio_url"] is None
+        assert tts_calls == []
+
+    def test_first_play_synthesizes_and_redirects(self, client, silent_obituary, tts_calls):
+        obituary_id = silent_obituary.id
+
+        response = client.get(f"/obituaries/{obituary_id}/audio", follow_redirects=False)
+
+        assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+        assert response.headers["location"] == f"https://audio.example.com/{obituary_id}.mp3"
+        assert client.get(f"/obituaries/{obituary_id}").json()["audio_url"] == response.headers["location"]
+        assert tts_calls == [obituary_id]
+
+    def test_later_plays_use_stored_url(self, client, silent_obituary, tts_calls, assert_max_queries):
+        obituary_id = silent_obituary.id
+        client.get(f"/obituaries/{obituary_id}/audio", follow_redirects=False)
+
+        with assert_max_queries(1):
+            response = client.get(f"/obituaries/{obituary_id}/audio", follow_redirects=False)
+
+        assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+        assert len(tts_calls) == 1
+
+    def test_missing_obituary(self, client, tts_calls):
+        response = client.get("/obituaries/missing-id/audio", follow_redirects=False)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_failed_synthesis(self, client, silent_obituary, monkeypatch, tts_calls):
+        from app.routes import obituaries as obituary_routes
+
+        async def failing_tts(text, obituary_id):
+            return None
+
+        monkeypatch.setattr(obituary_routes, "generate_tts_audio", failing_tts)
+
+        response = client.get(f"/obituaries/{silent_obituary.id}/audio", follow_redirects=False)
+
+        assert response.status_code == status.HTTP_502_BAD_GATEWAY
+
+
+@pytest.mark.integration
+class TestAudioCoalescing:
+    """Test concurrent first plays share one synthesis"""
+
+    def test_concurrent_requests_share_one_call(self, silent_obituary, tts_calls):
+        from app.routes.obituaries import _audio_in_flight, _synthesize_audio
+
+        async def play_many():
+            return await asyncio.gather(*(
+                _synthesize_audio(silent_obituary.id, silent_obituary.obituary_text, silent_obituary.user_id)
+                for _ in range(10)
+            ))
+
+        urls = asyncio.run(play_many())
+
+        assert len(set(urls)) == 1
+        assert tts_calls == [silent_obituary.id]
+        assert _audio_in_flight == {}
+
+    def test_first_stored_url_wins(self, db, silent_obituary):
+        first = store_audio_url(db, silent_obituary.id, "https://audio.example.com/first.mp3")
+        second = store_audio_url(db, silent_obituary.id, "https://audio.example.com/second.mp3")
+
+        assert first == second == "https://audio.example.com/first.mp3"
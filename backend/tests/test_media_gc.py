@@ -0,0 +1,144 @@
+"""
+Tests for the orphaned media garbage collector
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app import media_gc
+from app.metrics import MEDIA_BYTES_RECLAIMED
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary
+
+IMAGES = "lastshow-images"
+AUDIO = "lastshow-audio"
+
+# moto stamps objects with the current time; look at them from two days later
+LATER = datetime.now(timezone.utc) + timedelta(days=2)
+
+
+@pytest.fixture
+def referenced(db, test_user, s3):
+    """One obituary whose image and audio are in the buckets"""
+    s3.put_object(Bucket=IMAGES, Key="images/kept.jpg", Body=b"j" * 10)
+    s3.put_object(Bucket=AUDIO, Key="audio/kept.mp3", Body=b"m" * 20)
+    return create_obituary(
+        db,
+        test_user.id,
+        ObituaryCreate(name="Kept", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+        "text",
+        image_url=f"https://{IMAGES}.s3.amazonaws.com/images/kept.jpg",
+        audio_url=f"https://{AUDIO}.s3.us-east-1.amazonaws.com/audio/kept.mp3",
+    )
+
+
+@pytest.mark.integration
+class TestMediaGC:
+    """Test media_gc.collect against moto"""
+
+    def test_deletes_unreferenced_objects(self, db, s3, bucket_keys, referenced):
+        s3.put_object(Bucket=IMAGES, Key="images/orphan.jpg", Body=b"x" * 100)
+        s3.put_object(Bucket=AUDIO, Key="audio/orphan.mp3", Body=b"y" * 50)
+        before = MEDIA_BYTES_RECLAIMED._value.get()
+
+        report = media_gc.collect(db, grace=timedelta(hours=24), now=LATER)
+
+        assert bucket_keys(IMAGES) == ["images/kept.jpg"]
+        assert bucket_keys(AUDIO) == ["audio/kept.mp3"]
+        assert report.buckets[IMAGES].scanned == 2
+        assert report.buckets[IMAGES].referenced == 1
+        assert report.buckets[IMAGES].deleted == 1
+        assert report.reclaimed_bytes == 150
+        assert MEDIA_BYTES_RECLAIMED._value.get() - before == 150
+
+    def test_grace_period_protects_new_uploads(self, db, s3, bucket_keys, referenced):
+        s3.put_object(Bucket=IMAGES, Key="images/uploading.jpg", Body=b"x")
+
+        report = media_gc.collect(db, grace=timedelta(hours=24))
+
+        assert "images/uploading.jpg" in bucket_keys(IMAGES)
+        assert report.buckets[IMAGES].too_recent == 1
+        assert report.buckets[IMAGES].deleted == 0
+
+    def test_dry_run_deletes_nothing(self, db, s3, bucket_keys, referenced):
+        s3.put_object(Bucket=IMAGES, Key="images/orphan.jpg", Body=b"x" * 100)
+
+        report = media_gc.collect(db, dry_run=True, now=LATER)
+
+        assert "images/orphan.jpg" in bucket_keys(IMAGES)
+        assert report.buckets[IMAGES].deleted == 1
+        assert report.reclaimed_bytes == 100
+
+    def test_pages_and_batches(self, db, s3, bucket_keys, referenced, monkeypatch):
+        for i in range(1500):
+            s3.put_object(Bucket=IMAGES, Key=f"images/orphan-{i:04}.jpg", Body=b"x")
+        batches = []
+        real_delete = s3.delete_objects
+
+        def counting_delete(**kwargs):
+            batches.append(len(kwargs["Delete"]["Objects"]))
+            return real_delete(**kwargs)
+
+        monkeypatch.setattr(s3, "delete_objects", counting_delete)
+
+        report = media_gc.collect(db, now=LATER)
+
+        assert report.buckets[IMAGES].scanned == 1501
+        assert report.buckets[IMAGES].deleted == 1500
+        assert max(batches) <= 1000
+        assert sum(batches) == 1500
+        assert bucket_keys(IMAGES) == ["images/kept.jpg"]
+
+    def test_refuses_bucket_with_no_references(self, db, s3, bucket_keys):
+        s3.put_object(Bucket=IMAGES, Key="images/unmatched.jpg", Body=b"x")
+
+        with pytest.raises(media_gc.NoReferencesError):
+            media_gc.collect(db, now=LATER)
+
+        assert bucket_keys(IMAGES) == ["images/unmatched.jpg"]
+        assert media_gc.collect(db, dry_run=True, now=LATER).buckets[IMAGES].deleted == 1
+        assert media_gc.collect(db, now=LATER, force=True).buckets[IMAGES].deleted == 1
+
+    def test_bucket_with_dots(self, db, s3, bucket_keys, test_user, monkeypatch):
+        from app.config import settings
+
+        bucket = "media.lastshow.example"
+        monkeypatch.setattr(settings, "IMAGES_BUCKET", bucket)
+        monkeypatch.setattr(settings, "AUDIO_BUCKET", "")
+        s3.create_bucket(Bucket=bucket)
+        s3.put_object(Bucket=bucket, Key="images/kept.jpg", Body=b"j")
+        s3.put_object(Bucket=bucket, Key="images/orphan.jpg", Body=b"x")
+        create_obituary(
+            db, test_user.id,
+            ObituaryCreate(name="Kept", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+            "text",
+            image_url=f"https://{bucket}.s3.us-east-1.amazonaws.com/images/kept.jpg",
+        )
+
+        media_gc.collect(db, now=LATER)
+
+        assert bucket_keys(bucket) == ["images/kept.jpg"]
+
+    def test_cli_json_report(self, db, s3, referenced, capsys, monkeypatch):
+        import json
+        from app import database
+
+        monkeypatch.setattr(database, "SessionLocal", lambda: db)
+        monkeypatch.setattr(db, "close", lambda: None)
+        s3.put_object(Bucket=AUDIO, Key="audio/orphan.mp3", Body=b"y" * 7)
+
+        assert media_gc.main(["--grace-hours", "0", "--json"]) == 0
+
+        report = json.loads(capsys.readouterr().out)
+        assert report["reclaimed_bytes"] == 7
+        assert report["buckets"][AUDIO]["deleted"] == 1
+
+    def test_cli_refuses_without_force(self, db, s3, bucket_keys, capsys, monkeypatch):
+        from app import database
+
+        monkeypatch.setattr(database, "SessionLocal", lambda: db)
+        monkeypatch.setattr(db, "close", lambda: None)
+        s3.put_object(Bucket=IMAGES, Key="images/unmatched.jpg", Body=b"x")
+
+        assert media_gc.main(["--grace-hours", "0"]) == 1
+        assert "--force" in capsys.readouterr().err
+        assert bucket_keys(IMAGES) == ["images/unmatched.jpg"]
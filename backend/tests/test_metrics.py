@@ -0,0 +1,37 @@
+"""
+Integration tests for the Prometheus metrics endpoint
+"""
+import pytest
+from fastapi import status
+
+
+@pytest.mark.integration
+class TestMetrics:
+    """Test request metrics exposed on /metrics"""
+
+    def test_metrics_endpoint_exposes_prometheus_format(self, client):
+        """Test /metrics renders the text exposition format"""
+        response = client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "http_requests_total" in response.text
+
+    def test_requests_labelled_by_route_template(self, client):
+        """Test path parameters are collapsed into the route template"""
+        client.get("/obituaries/some-missing-id")
+
+        body = client.get("/metrics").text
+
+        assert 'route="/obituaries/{obituary_id}"' in body
+        assert 'status="404"' in body
+        assert "some-missing-id" not in body
+
+    def test_unmatched_routes_share_a_label(self, client):
+        """Test unknown paths do not create one series per path"""
+        client.get("/definitely/not/a/route")
+
+        body = client.get("/metrics").text
+
+        assert 'route="unmatched"' in body
+        assert "definitely" not in body
@@ -0,0 +1,279 @@
+"""
+Tests for latency-aware model routing and fallback
+"""
+import asyncio
+import httpx
+import pytest
+from groq import APIConnectionError, APITimeoutError
+from app.config import settings
+from app.metrics import LLM_HEDGES
+from app.services import ai_service
+from app.services.model_router import HedgeBudget, ModelRouter, ModelStats, Route, parse_routes
+
+PRIMARY = Route("big-model", 8.0)
+FAST = Route("small-model", 4.0)
+
+GROQ_REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+class FakeGroq:
+    """Groq client double; ``behaviour[model]`` is the text to return or an exception to raise"""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self.chat = self
+        self.completions = self
+
+    def with_options(self, **options):
+        self.options = options
+        return self
+
+    async def create(self, model, **kwargs):
+        self.calls.append((model, self.options["timeout"]))
+        result = self.behaviour[model]
+        if isinstance(result, Exception):
+            raise result
+        return _completion(result)
+
+
+def _completion(text):
+    class Completion:
+        usage = None
+        choices = [type("Choice", (), {"message": type("Message", (), {"content": text})})]
+
+    return Completion
+
+
+@pytest.fixture
+def groq(monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_MODELS", "big-model:8,small-model:4")
+    monkeypatch.setattr(ai_service, "_router", None)
+
+    def install(behaviour):
+        client = FakeGroq(behaviour)
+        monkeypatch.setattr(ai_service, "get_client", lambda: client)
+        return client
+
+    return install
+
+
+@pytest.mark.unit
+class TestModelRouter:
+    """Test stats and candidate ordering"""
+
+    def test_parse_routes(self):
+        assert parse_routes("llama-3.3-70b-versatile:8, llama-3.1-8b-instant:4") == [
+            Route("llama-3.3-70b-versatile", 8.0), Route("llama-3.1-8b-instant", 4.0),
+        ]
+        with pytest.raises(ValueError):
+            parse_routes("")
+
+    def test_p95_and_error_rate(self):
+        stats = ModelStats(window=100, window_seconds=60)
+        for i in range(1, 21):
+            stats.record(float(i), ok=i != 20, now=0.0)
+
+        samples, p95, error_rate = stats.snapshot(now=1.0)
+
+        assert samples == 20
+        assert p95 == 19.0
+        assert error_rate == pytest.approx(0.05)
+
+    def test_samples_age_out(self):
+        stats = ModelStats(window=100, window_seconds=60)
+        stats.record(1.0, ok=True, now=0.0)
+
+        assert stats.snapshot(now=61.0) == (0, None, 0.0)
+
+    def test_slow_primary_moves_behind_fast_model(self):
+        router = ModelRouter([PRIMARY, FAST], window_seconds=60)
+        for _ in range(10):
+            router.record(PRIMARY.model, 9.5, ok=True)
+
+        assert router.candidates() == [FAST, PRIMARY]
+
+    def test_erroring_primary_moves_behind_fast_model(self):
+        router = ModelRouter([PRIMARY, FAST], max_error_rate=0.25)
+        for i in range(10):
+            router.record(PRIMARY.model, 1.0, ok=i % 2 == 0)
+
+        assert router.candidates() == [FAST, PRIMARY]
+
+    def test_few_samples_keep_configured_order(self):
+        router = ModelRouter([PRIMARY, FAST])
+        router.record(PRIMARY.model, 30.0, ok=False)
+
+        assert router.candidates() == [PRIMARY, FAST]
+
+
+@pytest.mark.unit
+class TestGenerateObituaryText:
+    """Test generation falls back across models and records the one used"""
+
+    def test_primary_serves(self, groq):
+        client = groq({"big-model": "Text from big", "small-model": "Text from small"})
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation == ai_service.Generation("Text from big", "big-model")
+        assert client.calls == [("big-model", 8.0)]
+
+    def test_falls_back_on_error(self, groq):
+        client = groq({"big-model": APITimeoutError(GROQ_REQUEST), "small-model": "Text from small"})
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation.model == "small-model"
+        assert [model for model, _ in client.calls] == ["big-model", "small-model"]
+
+    def test_unhealthy_primary_is_skipped(self, groq):
+        client = groq({"big-model": "Text from big", "small-model": "Text from small"})
+        router = ai_service.get_router()
+        for _ in range(10):
+            router.record("big-model", 12.0, ok=False)
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation.model == "small-model"
+        assert client.calls == [("small-model", 4.0)]
+
+    def test_template_when_every_model_fails(self, groq):
+        groq({"big-model": APIConnectionError(request=GROQ_REQUEST), "small-model": httpx.ConnectError("down")})
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation.model == ai_service.FALLBACK_MODEL
+        assert generation.text.startswith("Jane was born on 1950-01-01")
+
+    def test_unexpected_errors_propagate(self, groq):
+        groq({"big-model": RuntimeError("bug"), "small-model": "Text from small"})
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+    def test_timeouts_capped_by_deadline(self, groq, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_DEADLINE_SECONDS", 5.0)
+        client = groq({"big-model": APITimeoutError(GROQ_REQUEST), "small-model": "Text from small"})
+
+        asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert client.calls[0] == ("big-model", pytest.approx(5.0, abs=0.1))
+        assert client.calls[1][1] < 5.0
+
+
+class SlowGroq(FakeGroq):
+    """Answers each successive call after the next delay in ``delays``"""
+
+    def __init__(self, delays):
+        super().__init__({})
+        self.delays = list(delays)
+        self.cancelled = 0
+
+    async def create(self, model, **kwargs):
+        call = len(self.calls)
+        self.calls.append((model, self.options["timeout"]))
+        try:
+            await asyncio.sleep(self.delays[call])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return _completion(f"call {call}")
+
+
+@pytest.fixture
+def hedging(groq, monkeypatch):
+    """Hedge after the p90 of 10 recent 50ms calls to big-model"""
+    monkeypatch.setattr(settings, "LLM_HEDGE_PERCENTILE", 0.9)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MAX_RATE", 1.0)
+    monkeypatch.setattr(ai_service, "_hedge_budget", None)
+    for _ in range(10):
+        ai_service.get_router().record("big-model", 0.05, ok=True)
+
+    def install(delays):
+        client = SlowGroq(delays)
+        monkeypatch.setattr(ai_service, "get_client", lambda: client)
+        return client
+
+    return install
+
+
+def _hedges(event):
+    return LLM_HEDGES.labels("big-model", event)._value.get()
+
+
+@pytest.mark.unit
+class TestHedging:
+    """Test a slow call is raced against a duplicate"""
+
+    def test_hedge_wins_and_first_is_cancelled(self, hedging):
+        client = hedging([1.0, 0.01])
+        fired, won = _hedges("fired"), _hedges("won")
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation == ai_service.Generation("call 1", "big-model")
+        assert client.cancelled == 1
+        assert _hedges("fired") - fired == 1
+        assert _hedges("won") - won == 1
+
+    def test_fast_call_is_not_hedged(self, hedging):
+        client = hedging([0.0])
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation.text == "call 0"
+        assert len(client.calls) == 1
+
+    def test_first_call_can_still_win(self, hedging):
+        client = hedging([0.1, 1.0])
+        won = _hedges("won")
+
+        generation = asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert generation.text == "call 0"
+        assert len(client.calls) == 2
+        assert client.cancelled == 1
+        assert _hedges("won") == won
+
+    def test_hedge_rate_is_capped(self, hedging, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_HEDGE_MAX_RATE", 0.0)
+        client = hedging([0.2])
+        capped = _hedges("capped")
+
+        asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert len(client.calls) == 1
+        assert _hedges("capped") - capped == 1
+
+    def test_disabled_by_default(self, hedging, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_HEDGE_PERCENTILE", 0.0)
+        client = hedging([0.2])
+
+        asyncio.run(ai_service.generate_obituary_text("Jane", "1950-01-01", "2024-01-01"))
+
+        assert len(client.calls) == 1
+
+
+@pytest.mark.unit
+class TestHedgeBudget:
+    """Test the hedge rate cap"""
+
+    def test_caps_share_of_calls(self):
+        budget = HedgeBudget(max_rate=0.1, window_seconds=60)
+        for _ in range(20):
+            budget.record_call(now=0.0)
+
+        assert [budget.try_acquire(now=1.0) for _ in range(3)] == [True, True, False]
+
+    def test_window_expires(self):
+        budget = HedgeBudget(max_rate=0.5, window_seconds=60)
+        budget.record_call(now=0.0)
+        budget.record_call(now=0.0)
+        assert budget.try_acquire(now=0.0)
+        assert not budget.try_acquire(now=0.0)
+
+        budget.record_call(now=100.0)
+        budget.record_call(now=100.0)
+
+        assert budget.try_acquire(now=100.0)
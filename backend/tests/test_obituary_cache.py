@@ -0,0 +1,178 @@
+"""
+Tests for the per-worker obituary cache and cross-worker invalidation
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import pytest
+from fastapi import status
+from app import pubsub
+from app.cache import LRUCache
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary, obituary_cache, publish_obituary_event
+
+
+@pytest.fixture
+def public_obituary(db, test_user):
+    return create_obituary(
+        db,
+        test_user.id,
+        ObituaryCreate(name="Jane Doe", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+        "A loving tribute...",
+    )
+
+
+@pytest.mark.unit
+class TestLRUCache:
+    """Test eviction, expiry and hit accounting"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache("test", maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_entries_expire(self):
+        cache = LRUCache("test", maxsize=2, ttl=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+    def test_hit_ratio(self):
+        cache = LRUCache("test", maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("missing")
+
+        assert cache.hit_ratio == pytest.approx(2 / 3)
+
+    def test_load_racing_invalidation_is_not_stored(self):
+        """A value read before an invalidation must not be cached after it"""
+        cache = LRUCache("test", maxsize=2, ttl=60)
+        generation = cache.generation()
+        cache.invalidate("a")
+        cache.set("a", "stale", generation)
+
+        assert cache.get("a") is None
+
+    def test_remembers_recent_invalidations(self):
+        cache = LRUCache("test", maxsize=2, ttl=60)
+        cache.invalidate("a")
+
+        assert cache.invalidated_within("a", 5)
+        assert not cache.invalidated_within("a", 0)
+        assert not cache.invalidated_within("b", 5)
+
+    def test_zero_size_disables(self):
+        cache = LRUCache("test", maxsize=0, ttl=60)
+        cache.set("a", 1)
+
+        assert len(cache) == 0
+
+
+@pytest.mark.integration
+class TestObituaryCache:
+    """Test GET /obituaries/{id} is served from the cache and invalidated on change"""
+
+    def test_repeat_views_skip_the_database(self, client, public_obituary, assert_max_queries):
+        obituary_id = public_obituary.id
+        first = client.get(f"/obituaries/{obituary_id}")
+
+        with assert_max_queries(0):
+            second = client.get(f"/obituaries/{obituary_id}")
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert second.headers["content-type"] == "application/json"
+        assert obituary_cache.hits == 1
+
+    def test_delete_invalidates(self, client, public_obituary, auth_headers):
+        obituary_id = public_obituary.id
+        client.get(f"/obituaries/{obituary_id}")
+
+        client.delete(f"/obituaries/{obituary_id}", headers=auth_headers)
+
+        assert client.get(f"/obituaries/{obituary_id}").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_update_event_invalidates(self, client, db, public_obituary):
+        obituary_id, user_id = public_obituary.id, public_obituary.user_id
+        client.get(f"/obituaries/{obituary_id}")
+        public_obituary.name = "Janet Doe"
+        db.commit()
+
+        publish_obituary_event("updated", obituary_id, user_id)
+
+        assert client.get(f"/obituaries/{obituary_id}").json()["name"] == "Janet Doe"
+
+
+@pytest.fixture
+def socket_dir():
+    # Short path: Unix socket paths are limited to ~100 bytes
+    with tempfile.TemporaryDirectory(prefix="pubsub-") as directory:
+        yield directory
+
+
+@pytest.mark.integration
+class TestSocketPubSub:
+    """Test the Unix socket transport between processes"""
+
+    def test_message_from_another_process_is_dispatched(self, socket_dir, monkeypatch):
+        received = []
+        delivered = threading.Event()
+
+        def handler(data):
+            received.append(data)
+            delivered.set()
+
+        monkeypatch.setitem(pubsub._handlers, "test-channel", [handler])
+        transport = pubsub._SocketTransport(socket_dir)
+        transport.start()
+        try:
+            script = (
+                "from app import pubsub\n"
+                "pubsub.start()\n"
+                "pubsub.publish('test-channel', {'id': 'abc'})\n"
+                "pubsub.stop()\n"
+            )
+            env = {**os.environ, "PUBSUB_BACKEND": "socket", "PUBSUB_SOCKET_DIR": socket_dir}
+            subprocess.run([sys.executable, "-c", script], env=env, check=True, timeout=60)
+
+            assert delivered.wait(5)
+        finally:
+            transport.stop()
+
+        assert received == [{"id": "abc"}]
+        assert os.listdir(socket_dir) == []
+
+    def test_own_messages_are_not_redelivered(self, socket_dir, monkeypatch):
+        received = []
+        monkeypatch.setitem(pubsub._handlers, "test-channel", [received.append])
+
+        pubsub._receive(json.dumps({"channel": "test-channel", "origin": pubsub._origin, "data": {}}))
+        pubsub._receive(json.dumps({"channel": "test-channel", "origin": "other", "data": {"id": 1}}))
+
+        assert received == [{"id": 1}]
+
+    def test_stale_sockets_are_removed(self, socket_dir):
+        import socket
+
+        stale = os.path.join(socket_dir, "1-dead.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(stale)
+        sock.close()
+        transport = pubsub._SocketTransport(socket_dir)
+        try:
+            transport.send("{}")
+        finally:
+            transport.stop()
+
+        assert not os.path.exists(stale)
@@ -0,0 +1,155 @@
+"""
+Integration tests for obituary routes
+"""
+import pytest
+from uuid import UUID
+from fastapi import status
+from app.models.obituary import Obituary
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary
+
+
+@pytest.fixture
+def public_obituary(db, test_user):
+    """Create a public obituary owned by the test user"""
+    return create_obituary(
+        db,
+        test_user.id,
+        ObituaryCreate(name="Jane Doe", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+        "A loving tribute...",
+        image_url="https://example.com/image.jpg",
+    )
+
+
+@pytest.mark.integration
+class TestObituaryRoutes:
+    """Test obituary endpoints and their response bodies"""
+
+    def test_create_obituary(self, client, db, auth_headers, stub_upstreams):
+        """Test creating an obituary returns the full response model"""
+        response = client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            files={"image": ("photo.jpg", b"\xff\xd8\xff\xd9", "image/jpeg")},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["name"] == "John Doe"
+        assert data["obituary_text"] == "In loving memory of John Doe."
+        assert data["image_url"] == "https://images.example.com/photo.jpg"
+        assert data["audio_url"] == f"https://audio.example.com/{data['id']}.mp3"
+        assert "updated_at" not in data
+        # The model that wrote the text is recorded but not exposed
+        assert "text_model" not in data
+        assert db.get(Obituary, UUID(data["id"])).text_model == "test-model"
+
+    def test_list_public_obituaries(self, client, public_obituary):
+        """Test the public feed body matches ObituaryListResponse"""
+        response = client.get("/obituaries/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["total"] == 1
+        item = data["obituaries"][0]
+        assert set(item) == {
+            "id", "user_id", "name", "birth_date", "death_date", "obituary_text",
+            "image_url", "audio_url", "is_public", "created_at",
+        }
+        assert item["audio_url"] is None
+
+    def test_list_my_obituaries(self, client, auth_headers, public_obituary):
+        """Test the owner's list includes their obituary"""
+        response = client.get("/obituaries/my-obituaries", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["total"] == 1
+
+    def test_get_obituary(self, client, public_obituary):
+        """Test fetching a single obituary"""
+        obituary_id = public_obituary.id
+
+        response = client.get(f"/obituaries/{obituary_id}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] == str(obituary_id)
+
+    def test_get_missing_obituary(self, client):
+        """Test fetching an unknown obituary returns 404"""
+        response = client.get("/obituaries/missing-id")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def dated_obituaries(db, test_user):
+    """Public obituaries with deaths in 2020, 2022 and 2024"""
+    return [
+        create_obituary(
+            db,
+            test_user.id,
+            ObituaryCreate(name=f"Died {year}", birth_date="1950-01-01", death_date=f"{year}-06-15", is_public=True),
+            "A loving tribute...",
+        )
+        for year in (2020, 2022, 2024)
+    ]
+
+
+@pytest.mark.integration
+class TestDeathDateFilter:
+    """Test date validation and the died_after/died_before filters"""
+
+    def test_dates_round_trip_as_iso_strings(self, client, dated_obituaries):
+        response = client.get("/obituaries/")
+
+        death_dates = {o["death_date"] for o in response.json()["obituaries"]}
+        assert death_dates == {"2020-06-15", "2022-06-15", "2024-06-15"}
+
+    def test_filter_public_feed(self, client, dated_obituaries):
+        response = client.get("/obituaries/", params={"died_after": "2021-01-01", "died_before": "2024-06-15"})
+
+        assert sorted(o["name"] for o in response.json()["obituaries"]) == ["Died 2022", "Died 2024"]
+
+    def test_filter_my_obituaries(self, client, dated_obituaries, auth_headers):
+        response = client.get("/obituaries/my-obituaries", headers=auth_headers, params={"died_before": "2020-12-31"})
+
+        assert [o["name"] for o in response.json()["obituaries"]] == ["Died 2020"]
+
+    def test_invalid_filter_date(self, client):
+        response = client.get("/obituaries/", params={"died_after": "last year"})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    @pytest.mark.parametrize("birth_date,death_date", [("1950-02-30", "2024-01-01"), ("2024-01-01", "1950-01-01")])
+    def test_create_rejects_bad_dates_before_generation(self, client, auth_headers, monkeypatch, birth_date, death_date):
+        from app.routes import obituaries as obituary_routes
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("generation must not run for invalid input")
+
+        monkeypatch.setattr(obituary_routes, "generate_obituary_text", fail)
+
+        response = client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": birth_date, "death_date": death_date},
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_range_filter_uses_death_date_index(self, db, dated_obituaries):
+        from datetime import date
+        from sqlalchemy import text
+        from app.models.obituary import Obituary
+
+        query = db.query(Obituary).filter(
+            Obituary.is_public == True,
+            Obituary.death_date >= date(2021, 1, 1),
+            Obituary.death_date <= date(2023, 1, 1),
+        )
+        sql = str(query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+        plan = " ".join(str(row) for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+        assert "ix_obituaries_death_date" in plan
@@ -2,12 +2,14 @@
 Unit tests for obituary service
 """
 import pytest
+from datetime import date
 from app.services.obituary_service import (
     create_obituary,
     get_obituaries,
     get_obituary_by_id,
     delete_obituary
 )
+from app.ids import uuid7
 from app.schemas.obituary import ObituaryCreate
 
 
@@ -35,8 +37,8 @@ class TestObituaryService:
 
         assert obituary.id is not None
         assert obituary.name == "John Doe"
-        assert obituary.birth_date == "1950-01-01"
-        assert obituary.death_date == "2024-01-01"
+        assert obituary.birth_date == date(1950, 1, 1)
+        assert obituary.death_date == date(2024, 1, 1)
         assert obituary.obituary_text == "A loving tribute..."
         assert obituary.user_id == test_user.id
 
@@ -128,7 +130,7 @@ class TestObituaryService:
         )
         obituary = create_obituary(db, test_user.id, obituary_data, "Protected")
 
-        result = delete_obituary(db, obituary.id, "wrong-user-id")
+        result = delete_obituary(db, obituary.id, uuid7())
 
         assert result is False
         assert get_obituary_by_id(db, obituary.id) is not None
@@ -0,0 +1,97 @@
+"""
+Query budget tests: upper bounds on SQL statements per endpoint
+
+Raising a bound here should be a deliberate decision, not a side effect of an
+N+1 query sneaking into a route.
+"""
+import pytest
+from fastapi import status
+from app.config import settings
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary
+
+
+@pytest.fixture
+def obituaries(db, test_user):
+    """Create a handful of public obituaries for list endpoints"""
+    return [
+        create_obituary(
+            db,
+            test_user.id,
+            ObituaryCreate(name=f"Person {i}", birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+            f"Obituary text {i}",
+        )
+        for i in range(10)
+    ]
+
+
+@pytest.mark.integration
+class TestQueryBudgets:
+    """Test the number of queries each endpoint issues stays bounded"""
+
+    def test_me(self, client, auth_headers, assert_max_queries):
+        with assert_max_queries(1):
+            response = client.get("/auth/me", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_login(self, client, test_user, assert_max_queries):
+        with assert_max_queries(1):
+            response = client.post(
+                "/auth/login",
+                json={"email": test_user.email, "password": "testpassword123"},
+            )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_list_public(self, client, obituaries, assert_max_queries):
+        with assert_max_queries(1):
+            response = client.get("/obituaries/")
+        assert response.json()["total"] == len(obituaries)
+
+    def test_list_mine(self, client, auth_headers, obituaries, assert_max_queries):
+        with assert_max_queries(2):
+            response = client.get("/obituaries/my-obituaries", headers=auth_headers)
+        assert response.json()["total"] == len(obituaries)
+
+    def test_get_obituary(self, client, obituaries, assert_max_queries):
+        obituary_id = obituaries[0].id
+        with assert_max_queries(1):
+            response = client.get(f"/obituaries/{obituary_id}")
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_delete_obituary(self, client, auth_headers, obituaries, assert_max_queries):
+        obituary_id = obituaries[0].id
+        with assert_max_queries(3):
+            response = client.delete(f"/obituaries/{obituary_id}", headers=auth_headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_create_obituary(self, client, auth_headers, stub_upstreams, assert_max_queries):
+        with assert_max_queries(5):
+            response = client.post(
+                "/obituaries/",
+                headers=auth_headers,
+                data={"name": "Jane Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            )
+        assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.integration
+class TestSlowQueryLog:
+    """Test slow statements are logged with their parameters"""
+
+    def test_slow_query_logged(self, client, auth_headers, monkeypatch, app_log):
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+
+        client.get("/auth/me", headers=auth_headers)
+
+        slow = [r.getMessage() for r in app_log.records if r.getMessage().startswith("Slow query")]
+        assert slow
+        assert "test@example.com" in slow[0]
+
+    def test_explain_attached_in_debug(self, client, auth_headers, monkeypatch, app_log):
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+        monkeypatch.setattr(settings, "DEBUG", True)
+
+        response = client.get("/auth/me", headers=auth_headers)
+
+        assert response.headers["x-query-count"] == "1"
+        assert any("plan:" in r.getMessage() for r in app_log.records)
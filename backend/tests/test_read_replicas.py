@@ -0,0 +1,208 @@
+"""
+Tests for read-replica routing and the read-your-writes window
+"""
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import database, read_your_writes
+from app.config import settings
+from app.database import Base
+from app.models.obituary import Obituary
+from app.models.user import User
+from app.schemas.obituary import ObituaryCreate
+from app.services.obituary_service import create_obituary, obituary_cache, publish_obituary_event
+
+REPLICA_DATABASE_URL = "sqlite:///./test_replica.db"
+
+replica_engine = create_engine(REPLICA_DATABASE_URL, connect_args={"check_same_thread": False})
+ReplicaSession = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """A second SQLite file standing in for a lagging read replica"""
+    Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [ReplicaSession])
+    database._recent_writes.clear()
+    session = ReplicaSession()
+    try:
+        yield session
+    finally:
+        session.close()
+        database._recent_writes.clear()
+        Base.metadata.drop_all(bind=replica_engine)
+
+
+@pytest.fixture
+def replicated_user(replica, test_user):
+    """Copy the test user to the replica, as replication would"""
+    replica.add(User(
+        id=test_user.id,
+        email=test_user.email,
+        hashed_password=test_user.hashed_password,
+        full_name=test_user.full_name,
+    ))
+    replica.commit()
+    return test_user
+
+
+def _add_obituary(session, user_id, name):
+    return create_obituary(
+        session,
+        user_id,
+        ObituaryCreate(name=name, birth_date="1950-01-01", death_date="2024-01-01", is_public=True),
+        "A loving tribute...",
+    )
+
+
+@pytest.mark.integration
+class TestReadReplicas:
+    """Reads go to the replica unless the user has just written"""
+
+    def test_public_feed_reads_from_replica(self, client, db, replica, test_user):
+        _add_obituary(db, test_user.id, "Primary Only")
+        _add_obituary(replica, test_user.id, "Replica Only")
+
+        response = client.get("/obituaries/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [o["name"] for o in response.json()["obituaries"]] == ["Replica Only"]
+
+    def test_get_obituary_reads_from_replica(self, client, db, replica, test_user):
+        obituary_id = _add_obituary(db, test_user.id, "Primary Only").id
+
+        response = client.get(f"/obituaries/{obituary_id}")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_authenticated_reads_use_replica(self, client, db, replicated_user, auth_headers):
+        _add_obituary(db, replicated_user.id, "Not Replicated Yet")
+
+        me = client.get("/auth/me", headers=auth_headers)
+        mine = client.get("/obituaries/my-obituaries", headers=auth_headers)
+
+        assert me.json()["email"] == replicated_user.email
+        assert mine.json()["total"] == 0
+
+    def test_user_reads_own_writes_after_create(self, client, replicated_user, auth_headers, stub_upstreams):
+        created = client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            files={"image": ("photo.jpg", b"\xff\xd8\xff\xd9", "image/jpeg")},
+        )
+        assert created.status_code == status.HTTP_201_CREATED
+
+        mine = client.get("/obituaries/my-obituaries", headers=auth_headers)
+        single = client.get(f"/obituaries/{created.json()['id']}", headers=auth_headers)
+
+        assert [o["name"] for o in mine.json()["obituaries"]] == ["John Doe"]
+        assert single.status_code == status.HTTP_200_OK
+
+    def test_other_users_still_read_replica_after_write(self, client, replicated_user, auth_headers, stub_upstreams):
+        created = client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            files={"image": ("photo.jpg", b"\xff\xd8\xff\xd9", "image/jpeg")},
+        )
+
+        response = client.get(f"/obituaries/{created.json()['id']}")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_window_expires(self, client, replicated_user, auth_headers, stub_upstreams, monkeypatch):
+        monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0.0)
+        client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            files={"image": ("photo.jpg", b"\xff\xd8\xff\xd9", "image/jpeg")},
+        )
+
+        mine = client.get("/obituaries/my-obituaries", headers=auth_headers)
+
+        assert mine.json()["total"] == 0
+
+
+@pytest.mark.integration
+class TestReadYourWritesAcrossWorkers:
+    """The write marker routes to the primary when another worker serves the read"""
+
+    def _create(self, client, auth_headers):
+        return client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+            files={"image": ("photo.jpg", b"\xff\xd8\xff\xd9", "image/jpeg")},
+        )
+
+    def test_cookie_routes_to_primary(self, client, replicated_user, auth_headers, stub_upstreams):
+        created = self._create(client, auth_headers)
+        assert read_your_writes.COOKIE in created.cookies
+        database._recent_writes.clear()  # the read lands on a worker that did not see the write
+
+        mine = client.get("/obituaries/my-obituaries", headers=auth_headers)
+
+        assert [o["name"] for o in mine.json()["obituaries"]] == ["John Doe"]
+
+    def test_header_routes_to_primary(self, client, replicated_user, auth_headers, stub_upstreams):
+        marker = self._create(client, auth_headers).headers[read_your_writes.HEADER]
+        database._recent_writes.clear()
+        client.cookies.clear()
+
+        mine = client.get("/obituaries/my-obituaries", headers={**auth_headers, "X-Last-Write": marker})
+
+        assert mine.json()["total"] == 1
+
+    def test_marker_is_bound_to_the_user(self, client, replicated_user, auth_headers, stub_upstreams):
+        marker = self._create(client, auth_headers).headers[read_your_writes.HEADER]
+        database._recent_writes.clear()
+        client.cookies.clear()
+
+        assert not read_your_writes.marker_is_recent("someone@else.com", marker)
+        assert not read_your_writes.marker_is_recent(replicated_user.email, marker.replace(".", "9.", 1))
+        assert client.get("/obituaries/my-obituaries", headers=auth_headers).json()["total"] == 0
+
+    def test_me_after_register_and_login(self, client, replica):
+        credentials = {"email": "new@example.com", "password": "newpassword123"}
+        registered = client.post("/auth/register", json={**credentials, "full_name": "New User"})
+        assert registered.status_code == status.HTTP_201_CREATED
+        assert read_your_writes.COOKIE in registered.cookies
+        database._recent_writes.clear()
+
+        token = client.post("/auth/login", json=credentials).json()["access_token"]
+        me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert me.status_code == status.HTTP_200_OK
+        assert me.json()["email"] == credentials["email"]
+
+
+@pytest.mark.integration
+class TestCacheWithReplicas:
+    """A lagging replica must not put an invalidated obituary back in the cache"""
+
+    def test_stale_replica_read_after_invalidation_is_not_cached(self, client, db, replica, test_user):
+        obituary = _add_obituary(db, test_user.id, "Jane Doe")
+        replica.merge(Obituary(**{c.name: getattr(obituary, c.name) for c in Obituary.__table__.columns}))
+        replica.commit()
+        client.get(f"/obituaries/{obituary.id}")  # cached from the replica
+
+        obituary.name = "Janet Doe"
+        db.commit()
+        publish_obituary_event("updated", obituary.id, test_user.id)
+
+        assert client.get(f"/obituaries/{obituary.id}").json()["name"] == "Jane Doe"  # replica lags
+        assert obituary_cache.get(obituary.id) is None
+
+        replica.query(Obituary).filter(Obituary.id == obituary.id).update({"name": "Janet Doe"})
+        replica.commit()
+        assert client.get(f"/obituaries/{obituary.id}").json()["name"] == "Janet Doe"
+
+    def test_replica_read_without_recent_change_is_cached(self, client, db, replica, test_user):
+        obituary = _add_obituary(replica, test_user.id, "Jane Doe")
+
+        client.get(f"/obituaries/{obituary.id}")
+
+        assert obituary_cache.get(obituary.id) is not None
@@ -0,0 +1,76 @@
+"""
+Integration tests for structured request logging
+"""
+import json
+import logging
+import pytest
+from fastapi import status
+from app.config import settings
+from app.request_log import JsonFormatter
+
+
+@pytest.fixture
+def request_events(app_log):
+    """The per-request events logged on app.request"""
+    return lambda: [r.msg for r in app_log.records if r.name == "app.request"]
+
+
+@pytest.mark.integration
+class TestRequestLog:
+    """Test one structured event is logged per request"""
+
+    def test_request_id_generated(self, client):
+        """Test a request id is generated and returned"""
+        response = client.get("/health")
+
+        assert len(response.headers["x-request-id"]) == 32
+
+    def test_request_id_propagated(self, client, request_events):
+        """Test an incoming request id is reused in the response and event"""
+        response = client.get("/health", headers={"X-Request-ID": "abc123"})
+
+        assert response.headers["x-request-id"] == "abc123"
+        assert request_events()[-1]["request_id"] == "abc123"
+
+    def test_create_event_has_stage_timings(self, client, auth_headers, stub_upstreams, request_events):
+        """Test obituary creation logs a single event with its stages"""
+        response = client.post(
+            "/obituaries/",
+            headers=auth_headers,
+            data={"name": "Jane Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        events = request_events()
+        assert len(events) == 1
+        event = events[0]
+        assert event["route"] == "/obituaries/"
+        assert event["status"] == 201
+        assert event["outcome"] == "ok"
+        assert event["obituary_id"] == response.json()["id"]
+        assert {"generate_text", "db_insert", "tts"} <= set(event["stages"])
+        assert event["queries"] >= 1
+
+    def test_successes_sampled_errors_kept(self, client, monkeypatch, request_events):
+        """Test sampling drops successful requests but never errors"""
+        monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.0)
+
+        client.get("/health")
+        client.get("/obituaries/missing-id")
+
+        events = request_events()
+        assert [e["status"] for e in events] == [404]
+        assert events[0]["outcome"] == "rejected"
+
+    def test_json_formatter(self):
+        """Test events render as single-line JSON"""
+        record = logging.LogRecord("app.request", logging.INFO, __file__, 1, {"event": "request"}, None, None)
+        record.request_id = "rid"
+
+        line = JsonFormatter().format(record)
+
+        assert "\n" not in line
+        data = json.loads(line)
+        assert data["event"] == "request"
+        assert data["request_id"] == "rid"
+        assert data["level"] == "INFO"
@@ -0,0 +1,133 @@
+"""
+Tests for fair per-user scheduling of upstream calls
+"""
+import asyncio
+import pytest
+from fastapi import status
+from app.metrics import SCHEDULER_QUEUE_DEPTH
+from app.scheduler import FairScheduler
+
+
+async def _run(scheduler, jobs, hold=0.01):
+    """Start ``(user, lane)`` jobs in order; return the order they got a slot"""
+    order = []
+
+    async def job(user, lane):
+        async with scheduler.slot(user, lane):
+            order.append(user)
+            await asyncio.sleep(hold)
+
+    tasks = []
+    for user, lane in jobs:
+        tasks.append(asyncio.create_task(job(user, lane)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.unit
+class TestFairScheduler:
+    """Test ordering, caps and cancellation"""
+
+    def test_round_robin_between_users(self):
+        scheduler = FairScheduler("test", capacity=1, per_user_limit=1)
+        jobs = [("script", "interactive")] * 5 + [("alice", "interactive"), ("bob", "interactive")]
+
+        order = asyncio.run(_run(scheduler, jobs))
+
+        # The script was first in the round, then Alice and Bob each get a turn
+        # before the rest of the script's calls
+        assert order == ["script", "script", "alice", "bob", "script", "script", "script"]
+
+    def test_interactive_lane_weighted_over_bulk(self):
+        scheduler = FairScheduler("test", capacity=1, per_user_limit=10)
+        jobs = [("blocker", "interactive")] + [(f"bulk{i}", "bulk") for i in range(3)] + \
+            [(f"user{i}", "interactive") for i in range(6)]
+
+        order = asyncio.run(_run(scheduler, jobs))
+
+        # Four interactive turns (the blocker took the first) per bulk turn
+        assert order == [
+            "blocker", "user0", "user1", "user2", "bulk0", "user3", "user4", "user5", "bulk1", "bulk2",
+        ]
+
+    def test_per_user_cap(self):
+        scheduler = FairScheduler("test", capacity=10, per_user_limit=2)
+        peak = running = 0
+
+        async def main():
+            async def job():
+                nonlocal peak, running
+                async with scheduler.slot("script"):
+                    running += 1
+                    peak = max(peak, running)
+                    await asyncio.sleep(0.01)
+                    running -= 1
+
+            await asyncio.gather(*(job() for _ in range(6)))
+
+        asyncio.run(main())
+
+        assert peak == 2
+        assert scheduler.running == 0
+
+    def test_capacity_shared_by_users(self):
+        scheduler = FairScheduler("test", capacity=3, per_user_limit=2)
+
+        async def main():
+            holders = [asyncio.create_task(_hold(scheduler, user)) for user in ("a", "a", "b", "c")]
+            await asyncio.sleep(0.01)
+            assert scheduler.running == 3
+            assert scheduler.depth() == 1
+            await asyncio.gather(*holders)
+
+        asyncio.run(main())
+
+    def test_cancelled_waiter_leaves_queue(self):
+        scheduler = FairScheduler("test", capacity=1, per_user_limit=1)
+        depth = SCHEDULER_QUEUE_DEPTH.labels("test", "interactive")
+
+        async def main():
+            holder = asyncio.create_task(_hold(scheduler, "a", 0.05))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(_hold(scheduler, "b"))
+            await asyncio.sleep(0.01)
+            assert scheduler.depth() == 1
+            waiter.cancel()
+            await asyncio.sleep(0)
+            assert scheduler.depth() == 0
+            await holder
+
+        before = depth._value.get()
+        asyncio.run(main())
+
+        assert scheduler.running == 0
+        assert depth._value.get() == before
+
+
+async def _hold(scheduler, user, seconds=0.02):
+    async with scheduler.slot(user):
+        await asyncio.sleep(seconds)
+
+
+@pytest.mark.integration
+class TestCreatePriority:
+    """Test the priority header on POST /obituaries/"""
+
+    def test_bulk_priority_accepted(self, client, auth_headers, stub_upstreams):
+        response = client.post(
+            "/obituaries/",
+            headers={**auth_headers, "X-Request-Priority": "bulk"},
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_unknown_priority_rejected(self, client, auth_headers, stub_upstreams):
+        response = client.post(
+            "/obituaries/",
+            headers={**auth_headers, "X-Request-Priority": "urgent"},
+            data={"name": "John Doe", "birth_date": "1950-01-01", "death_date": "2024-01-01"},
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
@@ -0,0 +1,68 @@
+"""
+Unit tests for the production server entry point
+"""
+import os
+import pytest
+from app import serve
+from app.config import settings
+from app.serve import build_config, parse_args
+
+
+@pytest.mark.unit
+class TestServe:
+    """Test worker configuration built by app.serve"""
+
+    def test_defaults(self):
+        """Test workers default to at least one and access logs are off"""
+        config = build_config(parse_args([]))
+
+        assert config.workers >= 1
+        assert config.access_log is False
+        assert config.limit_max_requests is None
+        assert config.timeout_graceful_shutdown == 120
+
+    def test_max_requests_jitter(self):
+        """Test the recycle limit is jittered within bounds and stable per process"""
+        config = build_config(parse_args(["--max-requests", "1000", "--max-requests-jitter", "50"]))
+
+        limit = config.limit_max_requests
+        assert 1000 <= limit <= 1050
+        assert config.limit_max_requests == limit
+
+    def test_graceful_timeout(self):
+        """Test the drain timeout is passed to uvicorn"""
+        config = build_config(parse_args(["--workers", "3", "--graceful-timeout", "30"]))
+
+        assert config.workers == 3
+        assert config.timeout_graceful_shutdown == 30
+
+    def test_schema_created_once_before_workers(self, monkeypatch):
+        """Test the supervisor creates the schema and workers skip it"""
+        calls = []
+        monkeypatch.setattr(settings, "AUTO_CREATE_SCHEMA", True)
+        monkeypatch.setenv("AUTO_CREATE_SCHEMA", "true")
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "unused")
+        monkeypatch.setenv("PUBSUB_SOCKET_DIR", "unused")
+        monkeypatch.setattr("app.main.create_schema", lambda: calls.append("schema"))
+
+        class FakeServer:
+            def __init__(self, config):
+                self.config = config
+
+            def run(self):
+                pass
+
+        class FakeMultiprocess:
+            def __init__(self, config, target, sockets):
+                calls.append(("workers", settings.AUTO_CREATE_SCHEMA, os.environ["AUTO_CREATE_SCHEMA"]))
+
+            def run(self):
+                pass
+
+        monkeypatch.setattr(serve.uvicorn, "Server", FakeServer)
+        monkeypatch.setattr("uvicorn.supervisors.Multiprocess", FakeMultiprocess)
+        monkeypatch.setattr(serve.WorkerConfig, "bind_socket", lambda self: None)
+
+        serve.main(["--workers", "3"])
+
+        assert calls == ["schema", ("workers", False, "false")]
@@ -0,0 +1,182 @@
+"""
+Tests for the TF-IDF similar obituaries index
+"""
+import pytest
+from fastapi import status
+from app.ids import uuid7
+from app.services import obituary_service
+from app.similar import SimilarityIndex, term_counts
+
+FISHING = "He loved fishing on the river, tying flies and teaching his grandchildren to cast."
+FISHING_TOO = "A lifelong fisherman, she spent summers fishing the river and tying flies for friends."
+PIANO = "She taught piano for forty years and sang in the church choir every Sunday."
+GARDEN = "He kept a vegetable garden and shared tomatoes with every neighbour on the street."
+
+
+def _index(documents: dict, doc_terms: int = 32, max_delta: int = 100) -> SimilarityIndex:
+    index = SimilarityIndex(doc_terms, max_delta)
+    index.build(documents.items())
+    return index
+
+
+@pytest.mark.unit
+class TestSimilarityIndex:
+    """Test ranking, incremental updates and rebuilds"""
+
+    def test_term_counts_drop_stop_words(self):
+        assert term_counts("The river and the RIVER's flies") == {"river": 2, "flies": 1}
+
+    def test_ranks_by_shared_terms(self):
+        ids = {name: uuid7() for name in ("fishing", "fishing_too", "piano", "garden")}
+        index = _index({ids["fishing"]: FISHING, ids["fishing_too"]: FISHING_TOO,
+                        ids["piano"]: PIANO, ids["garden"]: GARDEN})
+
+        results = index.similar(None, FISHING, k=3, exclude=ids["fishing"])
+
+        assert results[0][0] == ids["fishing_too"]
+        assert 0 < results[0][1] <= 1
+        assert ids["fishing"] not in [obituary_id for obituary_id, _ in results]
+        assert ids["piano"] not in [obituary_id for obituary_id, _ in results]  # nothing in common
+
+    def test_top_k(self):
+        documents = {uuid7(): f"{FISHING} Number {i}." for i in range(20)}
+        index = _index(documents)
+
+        results = index.similar(None, FISHING, k=5)
+
+        assert len(results) == 5
+        assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+    def test_unknown_terms_match_nothing(self):
+        index = _index({uuid7(): FISHING})
+
+        assert index.similar(None, "zzyzx quux", k=5) == []
+
+    def test_added_and_deleted(self):
+        fishing, piano = uuid7(), uuid7()
+        index = _index({fishing: FISHING, piano: PIANO})
+        added = uuid7()
+
+        index.add(added, FISHING_TOO)
+        assert index.similar(None, FISHING, k=1, exclude=fishing)[0][0] == added
+
+        index.handle_event({"event": "deleted", "id": str(added), "user_id": "u"})
+        index.handle_event({"event": "deleted", "id": str(piano), "user_id": "u"})
+        assert [obituary_id for obituary_id, _ in index.similar(None, f"{PIANO} {FISHING}", k=5)] == [fishing]
+        assert len(index) == 1
+
+    def test_delta_merged_into_main_matrix(self):
+        first = uuid7()
+        index = _index({first: FISHING, uuid7(): PIANO}, max_delta=3)
+        added = [uuid7() for _ in range(3)]
+
+        for obituary_id in added:
+            index.add(obituary_id, FISHING_TOO)
+
+        assert index._delta == {}
+        assert len(index) == 5
+        assert {obituary_id for obituary_id, _ in index.similar(None, FISHING, k=5)} == {first, *added}
+
+    def test_build_skips_rows_deleted_meanwhile(self):
+        obituary_id = uuid7()
+        index = SimilarityIndex(32, 100)
+
+        index.handle_event({"event": "deleted", "id": str(obituary_id), "user_id": "u"})
+        index.build([(obituary_id, FISHING)])
+
+        assert len(index) == 0
+
+    def test_cleared_during_build_discards_it(self):
+        index = SimilarityIndex(32, 100)
+
+        def documents():
+            index.clear()
+            yield uuid7(), FISHING
+
+        index.build(documents())
+
+        assert len(index) == 0
+
+    def test_query_during_first_build_does_not_build_again(self, db, make_obituary, monkeypatch):
+        make_obituary("Angler", FISHING)
+        index = SimilarityIndex(32, 100)
+        monkeypatch.setattr(obituary_service, "iter_public_texts", lambda db: pytest.fail("built twice"))
+
+        with index._build_lock:  # the start-up build, on another thread
+            assert index.similar(db, FISHING, k=5) == []
+
+    def test_row_not_yet_visible_stays_stale(self, db, make_obituary, test_user, monkeypatch):
+        index = SimilarityIndex(32, 100)
+        first = make_obituary("First", FISHING)
+        index.load(db)
+        second = make_obituary("Second", FISHING_TOO)
+        index.handle_event({"event": "created", "id": str(second.id), "user_id": str(test_user.id)})
+
+        with monkeypatch.context() as patch:
+            # A lagging replica does not have the row yet
+            patch.setattr(obituary_service, "get_obituaries_by_ids", lambda db, ids: [])
+            assert index.similar(db, FISHING, k=5, exclude=first.id) == []
+
+        assert [obituary_id for obituary_id, _ in index.similar(db, FISHING, k=5, exclude=first.id)] == [second.id]
+
+    def test_follows_service_events(self, db, make_obituary, test_user):
+        index = SimilarityIndex(32, 100)
+        first = make_obituary("First", FISHING)
+        index.load(db)
+
+        second = make_obituary("Second", FISHING_TOO)
+        private = make_obituary("Private", FISHING, is_public=False)
+        for obituary in (second, private):
+            index.handle_event({"event": "created", "id": str(obituary.id), "user_id": str(test_user.id)})
+
+        assert [obituary_id for obituary_id, _ in index.similar(db, FISHING, k=5, exclude=first.id)] == [second.id]
+
+
+@pytest.mark.integration
+class TestSimilarRoute:
+    """Test GET /obituaries/{id}/similar"""
+
+    def test_similar(self, client, make_obituary):
+        fishing = make_obituary("Angler", FISHING)
+        fishing_too = make_obituary("Fisher", FISHING_TOO)
+        make_obituary("Pianist", PIANO)
+        make_obituary("Hidden angler", FISHING, is_public=False)
+
+        response = client.get(f"/obituaries/{fishing.id}/similar")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total"] == 1
+        assert data["obituaries"][0]["id"] == str(fishing_too.id)
+        assert 0 < data["obituaries"][0]["score"] <= 1
+
+    def test_sees_new_and_deleted(self, client, db, make_obituary, test_user):
+        fishing = make_obituary("Angler", FISHING)
+        client.get(f"/obituaries/{fishing.id}/similar")
+
+        added = make_obituary("Fisher", FISHING_TOO)
+        assert client.get(f"/obituaries/{fishing.id}/similar").json()["obituaries"][0]["id"] == str(added.id)
+
+        obituary_service.delete_obituary(db, added.id, test_user.id)
+        assert client.get(f"/obituaries/{fishing.id}/similar").json()["total"] == 0
+
+    def test_k(self, client, make_obituary):
+        fishing = make_obituary("Angler", FISHING)
+        for i in range(4):
+            make_obituary(f"Fisher {i}", FISHING_TOO)
+
+        response = client.get(f"/obituaries/{fishing.id}/similar", params={"k": 2})
+
+        assert response.json()["total"] == 2
+
+    def test_not_found(self, client):
+        response = client.get(f"/obituaries/{uuid7()}/similar")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_k_bounds(self, client, make_obituary):
+        fishing = make_obituary("Angler", FISHING)
+
+        response = client.get(f"/obituaries/{fishing.id}/similar", params={"k": 500})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
@@ -0,0 +1,42 @@
+"""
+Tests for application start-up: lazy imports and lifespan-managed clients
+"""
+import os
+import subprocess
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import ai_service, lambda_service
+
+
+@pytest.mark.unit
+class TestStartup:
+    """Test boot stays cheap and clients follow the lifespan"""
+
+    def test_import_does_not_load_heavy_clients(self):
+        """Test importing the app does not import upstream client libraries or numpy/scipy"""
+        code = (
+            "import sys, app.main; "
+            "print(','.join(m for m in ('groq', 'passlib', 'jose', 'httpx', 'numpy', 'scipy') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert result.stdout.strip() == ""
+
+    def test_lifespan_creates_and_closes_clients(self, monkeypatch):
+        """Test upstream clients exist only while the app is running"""
+        monkeypatch.setattr("app.main.settings.AUTO_CREATE_SCHEMA", False)
+
+        with TestClient(app):
+            assert ai_service._client is not None
+            assert lambda_service._http_client is not None
+
+        assert ai_service._client is None
+        assert lambda_service._http_client is None